@@ -0,0 +1,221 @@
+import os
+import sys
+import time
+import asyncio
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import REQUEST_TIMEOUT, GROK_POOL_SIZE, GROK_INFLIGHT_PER_KEY, HEDGE_ENABLED, STREAM_IDLE_TIMEOUT
+from backend.grok_client import AsyncGrokClient, HTTPX_AVAILABLE
+from backend.scheduler import get_key_scheduler
+from backend.hedging import get_hedge_policy
+from backend.parser_service import (
+    SLEEP, POST, DISPATCH, call_steps, parse_steps, routed_steps, decode_response,
+    prepare_single_file, store_parse_result, record_result, process_parallel, extraction_event_data
+)
+from backend.progress import emit_job_event, FILE_STARTED, FILE_EXTRACTED
+
+
+# ---- ASYNC TRANSPORT ----
+# The request flows (retries, validation, field re-requests, local fields, routing) live in
+# parser_service; this engine only runs their waits and requests as awaitables.
+async def run_steps_async(steps, handlers):
+    """Async version of run_steps: drive a request flow with async handlers ({op: coroutine function})."""
+    result, error = None, None
+    while True:
+        try:
+            op, arg = steps.throw(error) if error is not None else steps.send(result)
+        except StopIteration as stop:
+            return stop.value
+        result, error = None, None
+        try:
+            result = await handlers[op](arg)
+        except Exception as e:
+            error = e
+
+
+async def post_payload_async(client, payload):
+    """One request attempt on an AsyncGrokClient; returns the decoded response body."""
+    if payload.get("stream"):
+        result_data, _ = await client.post_stream(payload, timeout=REQUEST_TIMEOUT, idle_timeout=STREAM_IDLE_TIMEOUT)
+        return result_data
+    return decode_response(await client.post(payload, timeout=REQUEST_TIMEOUT))
+
+
+def async_io(client):
+    """Handlers that run a flow's waits and requests on client without blocking the event loop."""
+    return {SLEEP: asyncio.sleep, POST: lambda payload: post_payload_async(client, payload)}
+
+
+async def call_grok_async(payload, client):
+    """Async version of call_grok: returns the decoded response body."""
+    return await run_steps_async(call_steps(payload), async_io(client))
+
+
+async def parse_with_grok_async(text, filename, client, prompt=None, tier=None, source_text=None):
+    """Async version of parse_with_grok (see parse_steps)."""
+    return await run_steps_async(parse_steps(text, filename, prompt, tier, source_text), async_io(client))
+
+
+# ---- ASYNC PROCESSING ----
+async def scheduled_attempt_async(text, filename, prompt, clients, job, api_keys, started=None, tier=None, source_text=None):
+    """One async Grok call on a scheduler-chosen key from api_keys. Sets started once a key is granted."""
+    async with get_key_scheduler().async_slot(job["id"], api_keys, job["priority"]) as api_key:
+        if started is not None:
+            started["api_key"] = api_key
+            started["event"].set()
+        start = time.monotonic()
+        result = await parse_with_grok_async(text, filename, clients[api_key], prompt=prompt, tier=tier, source_text=source_text)
+        get_hedge_policy().record_latency(time.monotonic() - start)
+        return result
+
+
+async def parse_hedged_async(text, filename, prompt, clients, job, tier=None, source_text=None):
+    """Async version of parse_hedged; the losing request is cancelled outright."""
+    policy = get_hedge_policy()
+    policy.note_primary()
+
+    started = {"event": asyncio.Event(), "api_key": None}
+    primary = asyncio.ensure_future(scheduled_attempt_async(text, filename, prompt, clients, job, job["api_keys"], started, tier, source_text))
+    started_wait = asyncio.ensure_future(started["event"].wait())
+    await asyncio.wait({primary, started_wait}, return_when=asyncio.FIRST_COMPLETED)
+    started_wait.cancel()
+    if primary.done():
+        return primary.result()
+
+    delay = policy.hedge_delay()
+    if delay is None:
+        return await primary
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done:
+        return primary.result()
+
+    other_keys = [k for k in job["api_keys"] if k != started["api_key"]]
+    if not other_keys or not policy.try_spend():
+        return await primary
+
+    hedge = asyncio.ensure_future(scheduled_attempt_async(text, filename, prompt, clients, job, other_keys, None, tier, source_text))
+    pending = {primary, hedge}
+    last_error = None
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None:
+                for other in pending:
+                    other.cancel()
+                if task is hedge:
+                    policy.note_hedge_win()
+                return task.result()
+            last_error = task.exception()
+    raise last_error
+
+
+async def dispatch_parse_async(text, filename, prompt, clients, client, job=None, tier=None, source_text=None):
+    """Async version of dispatch_parse: with a job context the global key scheduler picks the key."""
+    if job is None:
+        return await parse_with_grok_async(text, filename, client, prompt=prompt, tier=tier, source_text=source_text)
+    if HEDGE_ENABLED and len(job["api_keys"]) > 1:
+        return await parse_hedged_async(text, filename, prompt, clients, job, tier, source_text)
+    return await scheduled_attempt_async(text, filename, prompt, clients, job, job["api_keys"], tier=tier, source_text=source_text)
+
+
+async def parse_scheduled_async(text, filename, prompt, clients, client, job=None, extraction=None, source_text=None):
+    """Async version of parse_scheduled (see routed_steps)."""
+    dispatch = lambda tier: dispatch_parse_async(text, filename, prompt, clients, client, job, tier, source_text)
+    return await run_steps_async(routed_steps(text, filename, extraction), {DISPATCH: dispatch})
+
+
+async def process_file_async(filename, folder, clients, client, prompt, status_callback, stats_callback=None, job=None):
+    """Async version of process_single_file. Extraction runs in a worker thread."""
+    prepared = await asyncio.to_thread(prepare_single_file, filename, folder, prompt, status_callback, stats_callback)
+    emit_job_event(job, FILE_EXTRACTED, filename, **extraction_event_data(prepared))
+    if prepared["result"] is not None:
+        return prepared["result"]
+    if prepared["text"] is None:
+        return None
+
+    try:
+        result = await parse_scheduled_async(prepared["text"], filename, prompt, clients, client, job, prepared["extraction"], prepared["source_text"])
+        await asyncio.to_thread(store_parse_result, prepared, result, status_callback)
+        return result
+    except Exception as e:
+        if status_callback:
+            status_callback(f"[ERROR] Failed to parse {filename}: {str(e)}")
+        return None
+
+
+async def async_worker(worker_name, file_queue, result_list, folder, clients, client, prompt, progress_callback, status_callback, total_files, stats_callback=None, job=None):
+    """Coroutine counterpart of worker_thread: pulls files until the queue is drained."""
+    while True:
+        try:
+            idx, filename = file_queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+
+        if status_callback:
+            status_callback(f"Processing: {filename} ({idx}/{total_files}) [Worker {worker_name}]")
+        emit_job_event(job, FILE_STARTED, filename, index=idx, total=total_files)
+
+        result = None
+        try:
+            result = await process_file_async(filename, folder, clients, client, prompt, status_callback, stats_callback, job)
+
+            if result:
+                result_list.append(result)
+                if status_callback:
+                    status_callback(f"[SUCCESS] Parsed {filename}")
+            else:
+                if status_callback:
+                    status_callback(f"[WARNING] Skipped {filename} (extraction or parsing failed)")
+        except Exception as e:
+            if status_callback:
+                status_callback(f"[ERROR] Failed to process {filename}: {str(e)}")
+
+        await asyncio.to_thread(record_result, job, filename, result)
+        if progress_callback:
+            progress_callback(idx, total_files)
+
+
+async def process_async_engine(files, folder, api_keys, prompt, progress_callback, status_callback, total_files, stats_callback=None, job=None, inflight_per_key=GROK_INFLIGHT_PER_KEY):
+    """Drive up to inflight_per_key concurrent Grok requests per API key from one event loop."""
+    file_queue = asyncio.Queue()
+    for idx, f in enumerate(files, 1):
+        file_queue.put_nowait((idx, f))
+
+    inflight_per_key = max(1, inflight_per_key)
+    clients = {api_key: AsyncGrokClient(api_key, pool_size=max(GROK_POOL_SIZE, inflight_per_key)) for api_key in api_keys}
+    result_list = []
+
+    try:
+        workers = []
+        for k, client in enumerate(clients.values()):
+            for slot in range(inflight_per_key):
+                workers.append(async_worker(
+                    f"Async-{k+1}.{slot+1}", file_queue, result_list, folder, clients, client, prompt,
+                    progress_callback, status_callback, total_files, stats_callback, job
+                ))
+        await asyncio.gather(*workers)
+    finally:
+        for client in clients.values():
+            await client.close()
+
+    return result_list
+
+
+def process_async(files, folder, api_keys, prompt, progress_callback, status_callback, total_files, stats_callback=None, job=None):
+    """
+    Process files with the asyncio engine.
+
+    Drop-in alternative to process_parallel: same arguments, same status/progress
+    callback messages, returns the list of parsed rows. Falls back to
+    process_parallel when httpx is not installed.
+    """
+    if not HTTPX_AVAILABLE:
+        if status_callback:
+            status_callback("[WARNING] Asyncio engine requires httpx (pip install httpx). Falling back to threaded processing.")
+        return process_parallel(files, folder, api_keys, prompt, progress_callback, status_callback, total_files, stats_callback, job)
+
+    return asyncio.run(process_async_engine(
+        files, folder, api_keys, prompt, progress_callback, status_callback, total_files, stats_callback, job
+    ))
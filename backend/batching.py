@@ -0,0 +1,110 @@
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import PROMPT, BATCH_MAX_DOC_TOKENS, BATCH_TOKEN_BUDGET, BATCH_MAX_SIZE
+from backend.parser_service import build_grok_payload, call_grok, convert_experience_to_decimal, model_prompt, model_failures, apply_local_fields
+from backend.compaction import estimate_tokens
+from backend.validation import InvalidResponseError, repair_json, validate_resume, get_schema
+from backend.scheduler import get_key_scheduler
+
+BATCH_INSTRUCTION = """
+
+BATCH MODE:
+The user message contains several resumes. Each one starts with a header line
+"=== RESUME: <file name> ===".
+Parse every resume separately using the schema above and return ONLY a JSON array
+with one object per resume, in the same order. Set "Resume_File_Name" in each object
+to the exact file name from its header line.
+"""
+
+
+def is_batchable(text):
+    return text is not None and estimate_tokens(text) <= BATCH_MAX_DOC_TOKENS
+
+
+def batch_fits(texts, text):
+    """True if text can join a batch already holding texts."""
+    if len(texts) >= BATCH_MAX_SIZE:
+        return False
+    return sum(estimate_tokens(t) for t in texts) + estimate_tokens(text) <= BATCH_TOKEN_BUDGET
+
+
+def build_batch_payload(items, prompt=None):
+    """Build one chat-completion request for several (filename, text) pairs."""
+    if prompt is None:
+        prompt = PROMPT
+    user_content = "\n\n".join(f"=== RESUME: {filename} ===\n{text}" for filename, text in items)
+    payload = build_grok_payload(user_content, prompt + BATCH_INSTRUCTION)
+    # The reply is a JSON array, which single-resume structured output would reject
+    payload.pop("response_format", None)
+    # STREAM_MAX_OUTPUT_CHARS is sized for one resume and would abort a multi-resume reply
+    payload["stream"] = False
+    return payload
+
+
+def split_batch_response(result_data, filenames, prompt=None):
+    """
+    Map a batch response back to rows keyed by file name.
+    Files missing from the reply, or whose entry is not a complete JSON object, are left out.
+    """
+    if "choices" not in result_data or len(result_data["choices"]) == 0:
+        return {}
+    content = result_data["choices"][0]["message"]["content"] or ""
+
+    try:
+        parsed, _ = repair_json(content)
+    except InvalidResponseError:
+        return {}
+
+    if isinstance(parsed, dict):
+        # Tolerate {"resumes": [...]} style wrappers
+        parsed = next((v for v in parsed.values() if isinstance(v, list)), None)
+    if not isinstance(parsed, list):
+        return {}
+
+    schema = get_schema(prompt if prompt is not None else PROMPT)
+    wanted = set(filenames)
+    rows = {}
+    for entry in parsed:
+        if not isinstance(entry, dict):
+            continue
+        filename = str(entry.get("Resume_File_Name", "")).strip()
+        if filename in wanted and filename not in rows:
+            entry, failed = validate_resume(entry, schema)
+            if model_failures(failed):
+                # Let the single-resume path (with field re-requests) handle it
+                continue
+            entry = convert_experience_to_decimal(entry)
+            entry["Resume_File_Name"] = filename
+            rows[filename] = entry
+    return rows
+
+
+def parse_batch_with_grok(items, prompt=None, job=None, api_key=None, client=None, source_texts=None):
+    """
+    Parse several short resumes in one Grok request.
+
+    items is a list of (filename, text); local fields are read from source_texts
+    ({filename: uncompacted text}) when given. Returns {filename: row} for the files
+    the model answered correctly; callers fall back to single-resume calls for the rest.
+
+    Batches always go to GROK_MODEL without streaming, and bypass model routing and
+    request hedging; the single-resume fallback calls get both as usual.
+    """
+    if prompt is None:
+        prompt = PROMPT
+    request_prompt = model_prompt(prompt)
+    payload = build_batch_payload(items, request_prompt)
+    filenames = [filename for filename, _ in items]
+    if job is None:
+        result_data = call_grok(payload, api_key=api_key, client=client)
+    else:
+        with get_key_scheduler().slot(job["id"], job["api_keys"], job["priority"]) as scheduled_key:
+            result_data = call_grok(payload, api_key=scheduled_key)
+    rows = split_batch_response(result_data, filenames, request_prompt)
+    texts = dict(items)
+    texts.update(source_texts or {})
+    return {filename: apply_local_fields(row, texts[filename], filename, prompt) for filename, row in rows.items()}
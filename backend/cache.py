@@ -0,0 +1,208 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import gzip
+import hashlib
+import tempfile
+import threading
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import (
+    PARSE_CACHE_ENABLED, PARSE_CACHE_PATH, PARSE_CACHE_MAX_ENTRIES, PARSE_CACHE_TTL_DAYS,
+    TEXT_CACHE_ENABLED, TEXT_CACHE_DIR
+)
+
+
+# ---- HASHING ----
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Return the hex SHA-256 of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def text_sha256(text):
+    """Return the hex SHA-256 of a string (UTF-8)."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+# ---- PARSE RESULT CACHE ----
+class ParseCache:
+    """
+    Persistent SQLite cache of parsed resume rows.
+
+    Entries are keyed by file content hash + prompt hash + model, so a file is
+    only sent to Grok again when its bytes, the prompt or the model change.
+    Expired entries (TTL) are dropped on read and write; when the cache grows
+    past max_entries the least recently used rows are evicted.
+    """
+
+    def __init__(self, db_path=PARSE_CACHE_PATH, max_entries=PARSE_CACHE_MAX_ENTRIES, ttl_days=PARSE_CACHE_TTL_DAYS):
+        self.db_path = str(db_path)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_days * 86400 if ttl_days and ttl_days > 0 else None
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS parse_cache (
+                cache_key TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_parse_cache_accessed ON parse_cache(accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(content_hash, prompt, model, settings=""):
+        """Build the cache key from the file hash, prompt text, model name and any other settings that shape the row."""
+        return hashlib.sha256(f"{content_hash}:{text_sha256(prompt)}:{model}:{settings}".encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached row for key, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, created_at FROM parse_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            data, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM parse_cache WHERE cache_key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE parse_cache SET accessed_at = ? WHERE cache_key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(data)
+
+    def put(self, key, data):
+        """Store a parsed row and evict expired / least recently used entries."""
+        now = time.time()
+        payload = json.dumps(data, ensure_ascii=False, default=str)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO parse_cache (cache_key, data, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, payload, now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        if self.ttl_seconds is not None:
+            self._conn.execute("DELETE FROM parse_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        if self.max_entries and self.max_entries > 0:
+            count = self._conn.execute("SELECT COUNT(*) FROM parse_cache").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM parse_cache WHERE cache_key IN "
+                    "(SELECT cache_key FROM parse_cache ORDER BY accessed_at ASC LIMIT ?)",
+                    (overflow,)
+                )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM parse_cache")
+            self._conn.commit()
+
+
+_parse_cache = None
+_parse_cache_lock = threading.Lock()
+
+
+def get_parse_cache():
+    """Return the process-wide ParseCache, or None if caching is disabled or unavailable."""
+    global _parse_cache
+    if not PARSE_CACHE_ENABLED:
+        return None
+    with _parse_cache_lock:
+        if _parse_cache is None:
+            try:
+                _parse_cache = ParseCache()
+            except Exception as e:
+                print(f"[WARNING] Parse cache unavailable: {str(e)}")
+                return None
+        return _parse_cache
+
+
+# ---- EXTRACTED TEXT CACHE ----
+class TextCache:
+    """
+    Gzip-compressed on-disk cache of extracted/OCR'd text.
+
+    Entries are keyed by file content hash + extractor version and stored as
+    one file each under a two-level fan-out directory, so a retried job or a
+    prompt change re-uses the text without touching PyMuPDF or Tesseract.
+    """
+
+    def __init__(self, cache_dir=TEXT_CACHE_DIR):
+        self.cache_dir = str(cache_dir)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(content_hash, extractor_version):
+        return f"{content_hash}-v{extractor_version}"
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.txt.gz")
+
+    def get(self, key):
+        """Return the cached text for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[WARNING] Discarding unreadable text cache entry {key}: {str(e)}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def put(self, key, text):
+        """Store text for key; written to a temp file first so readers never see partial entries."""
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as f:
+                f.write((text or "").encode("utf-8"))
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"[WARNING] Could not write text cache entry {key}: {str(e)}")
+
+
+_text_cache = None
+_text_cache_lock = threading.Lock()
+
+
+def get_text_cache():
+    """Return the process-wide TextCache, or None if it is disabled or unavailable."""
+    global _text_cache
+    if not TEXT_CACHE_ENABLED:
+        return None
+    with _text_cache_lock:
+        if _text_cache is None:
+            try:
+                _text_cache = TextCache()
+            except Exception as e:
+                print(f"[WARNING] Text cache unavailable: {str(e)}")
+                return None
+        return _text_cache
@@ -0,0 +1,108 @@
+import os
+import sys
+import re
+from collections import Counter
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import COMPACT_MAX_TOKENS, COMPACT_DEDUPE_MIN_CHARS
+
+# Extraction separates PDF pages with a form feed so page furniture can be found here
+PAGE_BREAK = "\f"
+# Lines within this many lines of a page's top or bottom are header/footer candidates
+FURNITURE_EDGE_LINES = 3
+
+PAGE_NUMBER_RE = re.compile(r"^(?:page\s*)?[-–(\[]?\s*\d{1,3}\s*(?:(?:/|of)\s*\d{1,3})?\s*[-–)\]]?$", re.IGNORECASE)
+SPACES_RE = re.compile(r"[ \t\u00a0\u2000-\u200b]+")
+ALNUM_RE = re.compile(r"[^\W_]")
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token), good enough for budgets and reporting."""
+    return len(text or "") // 4 + 1
+
+
+def furniture_key(line):
+    """Normalise a header/footer line so "Page 1 of 3" and "Page 2 of 3" compare equal."""
+    return re.sub(r"\d+", "#", line.lower())
+
+
+def find_page_furniture(pages):
+    """Return keys of lines repeated near the top/bottom of at least half the pages (2+ pages)."""
+    if len(pages) < 2:
+        return set()
+    counts = Counter()
+    for lines in pages:
+        edge = lines[:FURNITURE_EDGE_LINES] + lines[-FURNITURE_EDGE_LINES:]
+        counts.update({furniture_key(line) for line in edge})
+    threshold = max(2, (len(pages) + 1) // 2)
+    return {key for key, count in counts.items() if count >= threshold}
+
+
+def cap_tokens(text, max_tokens):
+    """Cut text to about max_tokens, at a line boundary where possible."""
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind("\n", 0, max_chars)
+    return text[:cut if cut > max_chars // 2 else max_chars].rstrip()
+
+
+def compact_text(text, max_tokens=COMPACT_MAX_TOKENS):
+    """
+    Shrink extracted resume text before it is sent to the LLM. Deterministic.
+
+    - collapses runs of spaces/tabs and blank lines
+    - drops lines with no letters or digits (OCR noise, rules) and bare page numbers
+    - keeps repeated PDF page headers/footers only once (they often carry the name/contact line)
+    - drops consecutive duplicate lines, and repeats of long lines (PDF block duplicates)
+    - caps the result at max_tokens estimated tokens (0 = no cap)
+
+    Returns (compacted_text, stats) with tokens_before / tokens_after / tokens_saved.
+    """
+    if not text:
+        return text, {"tokens_before": 0, "tokens_after": 0, "tokens_saved": 0}
+
+    pages = []
+    for page in text.split(PAGE_BREAK):
+        lines = []
+        for line in page.splitlines():
+            line = SPACES_RE.sub(" ", line).strip()
+            if line and ALNUM_RE.search(line) and not PAGE_NUMBER_RE.match(line):
+                lines.append(line)
+            elif not line:
+                lines.append("")
+        pages.append(lines)
+
+    furniture = find_page_furniture([[line for line in lines if line] for lines in pages])
+
+    output = []
+    seen_long = set()
+    seen_furniture = set()
+    for lines in pages:
+        for line in lines:
+            if not line:
+                if output and output[-1]:
+                    output.append("")
+                continue
+            key = furniture_key(line) if furniture else None
+            if key in furniture:
+                if key in seen_furniture:
+                    continue
+                seen_furniture.add(key)
+            if output and output[-1] == line:
+                continue
+            if len(line) >= COMPACT_DEDUPE_MIN_CHARS:
+                if line in seen_long:
+                    continue
+                seen_long.add(line)
+            output.append(line)
+
+    compacted = "\n".join(output).strip()
+    if max_tokens and max_tokens > 0:
+        compacted = cap_tokens(compacted, max_tokens)
+
+    before = estimate_tokens(text)
+    after = estimate_tokens(compacted)
+    return compacted, {"tokens_before": before, "tokens_after": after, "tokens_saved": max(0, before - after)}
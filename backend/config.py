@@ -4,6 +4,15 @@ from pathlib import Path
 # Get the project root directory (parent of backend folder)
 BASE_DIR = Path(__file__).parent.parent
 
+
+def env_flag(name, default=False):
+    """Read a boolean flag from the environment ("1", "true", "yes", "on")."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
 # Grok API Configuration
 # Load from environment variable (required for production/hosting)
 # For local development, create a .env file with your API keys
@@ -19,11 +28,141 @@ else:
 GROK_API_KEY = GROK_API_KEYS[0] if GROK_API_KEYS else ""
 GROK_URL = os.getenv("GROK_URL", "https://api.x.ai/v1/chat/completions")
 GROK_MODEL = os.getenv("GROK_MODEL", "grok-4-fast-reasoning")
-MAX_WORKERS = min(8, len(GROK_API_KEYS) * 4) if GROK_API_KEYS else 1
 MAX_RETRIES = int(os.getenv("MAX_RETRIES", "2"))
 REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "120"))
 RETRY_DELAY = int(os.getenv("RETRY_DELAY", "2"))
 
+# HTTP connection pooling for the Grok API (one keep-alive pool per API key)
+GROK_POOL_SIZE = int(os.getenv("GROK_POOL_SIZE", "10"))
+GROK_HTTP2 = env_flag("GROK_HTTP2", False)
+
+# Streaming completions: JSON is checked as tokens arrive and the request is aborted (and retried
+# on the same key, within MAX_RETRIES) when the output is clearly malformed or runs away;
+# time-to-first-token is recorded per request
+GROK_STREAM = env_flag("GROK_STREAM", False)
+# Seconds without a new chunk before a streamed request is treated as timed out
+STREAM_IDLE_TIMEOUT = int(os.getenv("STREAM_IDLE_TIMEOUT", "30"))
+STREAM_MAX_PREAMBLE_CHARS = int(os.getenv("STREAM_MAX_PREAMBLE_CHARS", "200"))
+STREAM_MAX_OUTPUT_CHARS = int(os.getenv("STREAM_MAX_OUTPUT_CHARS", "20000"))
+STREAM_STATS_WINDOW = int(os.getenv("STREAM_STATS_WINDOW", "500"))
+
+# Structured output: "" (off), "json_object" or "json_schema" (schema from the prompt's DATA SCHEMA block).
+# Only enable it if the endpoint supports response_format.
+GROK_RESPONSE_FORMAT = os.getenv("GROK_RESPONSE_FORMAT", "").strip().lower()
+
+# Email/Phone/LinkedIn_URL are read from the text with regexes and cross-checked against the model.
+# LIGHT_PROMPT leaves them out of the schema sent to the model (fewer output tokens).
+LOCAL_EXTRACTION_ENABLED = env_flag("LOCAL_EXTRACTION_ENABLED", True)
+LIGHT_PROMPT = env_flag("LIGHT_PROMPT", False)
+
+# Tiered model routing: short, clean documents go to GROK_FAST_MODEL first ("" = off) and are
+# escalated to GROK_MODEL when its JSON fails validation or a ROUTING_REQUIRED_FIELDS field is empty
+GROK_FAST_MODEL = os.getenv("GROK_FAST_MODEL", "").strip()
+ROUTING_FAST_MAX_TOKENS = int(os.getenv("ROUTING_FAST_MAX_TOKENS", "2500"))
+ROUTING_MIN_QUALITY = float(os.getenv("ROUTING_MIN_QUALITY", "0.6"))
+ROUTING_FAST_OCR = env_flag("ROUTING_FAST_OCR", False)
+ROUTING_REQUIRED_FIELDS = [f.strip() for f in os.getenv("ROUTING_REQUIRED_FIELDS", "Full_Name,Skills").split(",") if f.strip()]
+
+# Processing engine:
+#   "threads"  - one worker thread per API key doing extraction and the API call in turn (default)
+#   "pipeline" - process-pool extraction feeding a bounded queue of LLM requests. Extraction processes
+#                are spawned, so a script calling process_folder must do so under
+#                `if __name__ == "__main__":` (the API server already does)
+#   "async"    - asyncio, many requests in flight per key
+PROCESSING_ENGINE = os.getenv("PROCESSING_ENGINE", "threads").strip().lower()
+GROK_INFLIGHT_PER_KEY = int(os.getenv("GROK_INFLIGHT_PER_KEY", "8"))
+# Cap on Grok requests in flight across all jobs and engines (enforced by the key scheduler);
+# default: GROK_INFLIGHT_PER_KEY per API key
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", str(max(1, len(GROK_API_KEYS)) * GROK_INFLIGHT_PER_KEY)))
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(os.cpu_count() or 1)))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "32"))
+
+# Adaptive per-key rate limiting: starting request rate (0 = unknown, learned from
+# x-ratelimit-* headers) and the floor for the AIMD concurrency window
+GROK_RATE_LIMIT_RPS = float(os.getenv("GROK_RATE_LIMIT_RPS", "0"))
+RATE_LIMIT_MIN_CONCURRENCY = int(os.getenv("RATE_LIMIT_MIN_CONCURRENCY", "1"))
+
+# Request hedging: duplicate a slow request on another API key once it exceeds the
+# HEDGE_PERCENTILE latency of the last HEDGE_WINDOW calls; at most HEDGE_MAX_EXTRA_RATIO extra load
+HEDGE_ENABLED = env_flag("HEDGE_ENABLED", False)
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_WINDOW = int(os.getenv("HEDGE_WINDOW", "200"))
+HEDGE_MAX_EXTRA_RATIO = float(os.getenv("HEDGE_MAX_EXTRA_RATIO", "0.1"))
+
+# Multi-resume batching (pipeline engine): resumes up to BATCH_MAX_DOC_TOKENS (estimated)
+# that queue up are sent together, up to BATCH_MAX_SIZE files / BATCH_TOKEN_BUDGET tokens per request.
+# Batch requests go to GROK_MODEL unstreamed, without model routing or request hedging.
+BATCH_ENABLED = env_flag("BATCH_ENABLED", False)
+BATCH_MAX_DOC_TOKENS = int(os.getenv("BATCH_MAX_DOC_TOKENS", "1500"))
+BATCH_TOKEN_BUDGET = int(os.getenv("BATCH_TOKEN_BUDGET", "6000"))
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "5"))
+
+# Input compaction before the Grok call (whitespace, duplicate lines, page headers/footers);
+# the Grok payload is capped at COMPACT_MAX_TOKENS estimated tokens (0 = no cap). Local field
+# extraction (LOCAL_EXTRACTION_ENABLED) always reads the full extracted text.
+COMPACT_ENABLED = env_flag("COMPACT_ENABLED", True)
+COMPACT_MAX_TOKENS = int(os.getenv("COMPACT_MAX_TOKENS", "6000"))
+# Lines at least this long are dropped when they repeat anywhere in the document
+COMPACT_DEDUPE_MIN_CHARS = int(os.getenv("COMPACT_DEDUPE_MIN_CHARS", "40"))
+
+# OCR parallelism: total pages OCR'd at once (per process) and pages in flight per document
+OCR_MAX_CONCURRENCY = int(os.getenv("OCR_MAX_CONCURRENCY", str(os.cpu_count() or 1)))
+OCR_PAGES_PER_DOC = int(os.getenv("OCR_PAGES_PER_DOC", "4"))
+# Pages whose text layer scores below this (0.0-1.0) are OCR'd individually
+PAGE_OCR_MIN_SCORE = float(os.getenv("PAGE_OCR_MIN_SCORE", "0.25"))
+# Documents with less native text than this are OCR'd page by page in full
+MIN_DOCUMENT_TEXT_CHARS = int(os.getenv("MIN_DOCUMENT_TEXT_CHARS", "50"))
+
+# Progress stream (/api/progress/{job_id}/stream): how often a job is checked for changes to push (seconds)
+PROGRESS_PUSH_INTERVAL = float(os.getenv("PROGRESS_PUSH_INTERVAL", "0.25"))
+PROGRESS_KEEPALIVE_SECONDS = float(os.getenv("PROGRESS_KEEPALIVE_SECONDS", "15"))
+# /api/progress responses at least this large are gzip-compressed (when the client accepts gzip)
+PROGRESS_GZIP_MIN_BYTES = int(os.getenv("PROGRESS_GZIP_MIN_BYTES", "1024"))
+
+# Local data directory (caches, job journals, result stores)
+DATA_DIR = Path(os.getenv("DATA_DIR", str(BASE_DIR / "data")))
+CACHE_DIR = Path(os.getenv("CACHE_DIR", str(DATA_DIR / "cache")))
+
+# Parse-result cache: skips the Grok call for files already parsed with the same prompt/model
+PARSE_CACHE_ENABLED = env_flag("PARSE_CACHE_ENABLED", True)
+PARSE_CACHE_PATH = Path(os.getenv("PARSE_CACHE_PATH", str(CACHE_DIR / "parse_cache.sqlite3")))
+PARSE_CACHE_MAX_ENTRIES = int(os.getenv("PARSE_CACHE_MAX_ENTRIES", "50000"))
+PARSE_CACHE_TTL_DAYS = float(os.getenv("PARSE_CACHE_TTL_DAYS", "30"))
+
+# Extracted-text cache: skips PyMuPDF/Tesseract for documents already extracted
+TEXT_CACHE_ENABLED = env_flag("TEXT_CACHE_ENABLED", True)
+TEXT_CACHE_DIR = Path(os.getenv("TEXT_CACHE_DIR", str(CACHE_DIR / "text")))
+
+# Near-duplicate detection (MinHash/LSH over the extracted text) against every document parsed before:
+#   "flag"  - parse as usual and name the earlier document in a Near_Duplicate_Of column (default)
+#   "reuse" - re-use the earlier document's cached parse result (Email/Phone/LinkedIn re-read from the new text);
+#             opt-in, since a near-duplicate may differ in fields the model would have read differently
+#   "off"
+NEAR_DUP_MODE = os.getenv("NEAR_DUP_MODE", "flag").strip().lower()
+# Estimated Jaccard similarity of 5-word shingles at which two documents count as near-duplicates
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.9"))
+NEAR_DUP_INDEX_PATH = Path(os.getenv("NEAR_DUP_INDEX_PATH", str(CACHE_DIR / "near_duplicates.sqlite3")))
+
+# Durable job journal (SQLite WAL): per-file state and parsed rows, used to resume interrupted jobs
+JOB_JOURNAL_ENABLED = env_flag("JOB_JOURNAL_ENABLED", True)
+JOB_JOURNAL_PATH = Path(os.getenv("JOB_JOURNAL_PATH", str(DATA_DIR / "jobs.sqlite3")))
+
+# Streaming Excel output: rows are written as files finish and the output file is rewritten
+# (always a complete workbook) at most every OUTPUT_FLUSH_SECONDS seconds (0 = only at the end)
+OUTPUT_FLUSH_SECONDS = float(os.getenv("OUTPUT_FLUSH_SECONDS", "30"))
+# Every export rewrites the whole workbook, so outputs with more rows than this are not exported
+# during or after a job; they are exported on demand with POST /api/results/export (0 = no limit).
+# Only applies with the shared result store (RESULT_STORE_ENABLED).
+OUTPUT_AUTO_EXPORT_MAX_ROWS = int(os.getenv("OUTPUT_AUTO_EXPORT_MAX_ROWS", "20000"))
+
+# Master result store (SQLite WAL): parsed rows per output file, appended in O(new rows);
+# the .xlsx at output_path is exported from it
+RESULT_STORE_ENABLED = env_flag("RESULT_STORE_ENABLED", True)
+RESULT_STORE_PATH = Path(os.getenv("RESULT_STORE_PATH", str(DATA_DIR / "results.sqlite3")))
+# When appending, skip files whose name or content is already in the output (checked before any parsing)
+DEDUP_ENABLED = env_flag("DEDUP_ENABLED", True)
+
 # Load prompt from file (in project root)
 PROMPT_PATH = BASE_DIR / "grok_resume_prompt.txt"
 
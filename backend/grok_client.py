@@ -0,0 +1,294 @@
+import os
+import sys
+import time
+import threading
+import requests
+from contextlib import contextmanager
+from requests.adapters import HTTPAdapter
+
+# Optional import for HTTP/2 (requires httpx[http2])
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+    httpx = None
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import GROK_URL, GROK_POOL_SIZE, GROK_HTTP2
+from backend.rate_limiter import get_rate_limiter
+from backend.streaming import StreamingJSONMonitor, MalformedStreamError, handle_sse_line, stream_result, get_stream_stats
+
+
+def raise_for_status(response):
+    """Raise requests.HTTPError for 4xx/5xx responses, whichever HTTP library produced them."""
+    if response.status_code >= 400:
+        raise requests.exceptions.HTTPError(f"HTTP {response.status_code} Error", response=response)
+
+
+@contextmanager
+def httpx_errors():
+    """Re-raise httpx transport errors as the equivalent requests exceptions."""
+    try:
+        yield
+    except httpx.TimeoutException as e:
+        raise requests.exceptions.Timeout(str(e)) from e
+    except httpx.TransportError as e:
+        raise requests.exceptions.ConnectionError(str(e)) from e
+    except httpx.HTTPError as e:
+        raise requests.exceptions.RequestException(str(e)) from e
+
+
+class RequestCancelled(Exception):
+    """Raised when the caller gives up on a request (e.g. the losing side of a hedge). Never retried."""
+
+
+def check_cancelled(cancel):
+    """Raise RequestCancelled once the cancel event (a threading.Event, or None) is set."""
+    if cancel is not None and cancel.is_set():
+        raise RequestCancelled("Request cancelled by the caller")
+
+
+def check_deadline(start, timeout):
+    """Streamed responses reset the read timeout on every chunk; bound the whole request by timeout."""
+    if time.monotonic() - start > timeout:
+        raise requests.exceptions.Timeout(f"Streamed response took longer than {timeout} seconds")
+
+
+def record_stream(start, monitor, error):
+    ttft = monitor.first_token_at - start if monitor.first_token_at is not None else None
+    get_stream_stats().record(ttft, time.monotonic() - start, aborted=isinstance(error, MalformedStreamError))
+
+
+class GrokClient:
+    """
+    Long-lived, thread-safe HTTP client for one Grok API key.
+
+    Holds a keep-alive connection pool (pool_size connections) so consecutive
+    requests on the same key re-use TCP+TLS connections instead of paying a
+    fresh handshake per resume. With http2=True (and httpx[http2] installed)
+    requests are multiplexed over HTTP/2; otherwise requests/urllib3 is used.
+    Transport errors are always raised as requests.exceptions types.
+
+    Every request goes through the key's adaptive rate limiter. Retries are
+    left to the caller (no urllib3 Retry on the adapter), so a throttled key
+    is never retried at two levels.
+    """
+
+    def __init__(self, api_key, url=GROK_URL, pool_size=GROK_POOL_SIZE, http2=GROK_HTTP2):
+        self.api_key = api_key
+        self.url = url
+        self.pool_size = pool_size
+        self.headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}"
+        }
+        self.limiter = get_rate_limiter(api_key)
+        self.http2 = bool(http2 and HTTPX_AVAILABLE)
+        if http2 and not HTTPX_AVAILABLE:
+            print("[WARNING] GROK_HTTP2 is enabled but httpx is not installed. Falling back to HTTP/1.1. Install with: pip install 'httpx[http2]'")
+
+        if self.http2:
+            try:
+                self._client = httpx.Client(
+                    http2=True,
+                    headers=self.headers,
+                    limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+                )
+            except ImportError:
+                print("[WARNING] HTTP/2 support requires the h2 package. Falling back to HTTP/1.1. Install with: pip install 'httpx[http2]'")
+                self.http2 = False
+
+        if not self.http2:
+            self._session = requests.Session()
+            self._session.headers.update(self.headers)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+            self._session.mount("https://", adapter)
+            self._session.mount("http://", adapter)
+
+    def post(self, payload, timeout):
+        """POST a JSON payload to the Grok endpoint (paced by the key's rate limiter) and return the response."""
+        self.limiter.acquire()
+        start = time.monotonic()
+        response = None
+        try:
+            response = self._post(payload, timeout)
+            return response
+        finally:
+            if response is not None:
+                self.limiter.release(response.status_code, response.headers, time.monotonic() - start)
+            else:
+                self.limiter.release()
+
+    def _post(self, payload, timeout):
+        if not self.http2:
+            return self._session.post(self.url, json=payload, timeout=timeout)
+
+        with httpx_errors():
+            return self._client.post(self.url, json=payload, timeout=timeout)
+
+    def post_stream(self, payload, timeout, idle_timeout, cancel=None):
+        """
+        POST a payload with "stream": true and follow the SSE stream through a StreamingJSONMonitor.
+
+        Reading stops as soon as the JSON value is complete. Malformed or runaway
+        output raises MalformedStreamError; a stream idle for idle_timeout seconds
+        or running past timeout raises Timeout. Setting cancel (a threading.Event)
+        closes the stream at the next chunk and raises RequestCancelled.
+        Returns (result_data, response).
+        """
+        self.limiter.acquire()
+        start = time.monotonic()
+        monitor = StreamingJSONMonitor()
+        response = None
+        error = None
+        try:
+            if self.http2:
+                with httpx_errors(), self._client.stream("POST", self.url, json=payload, timeout=httpx.Timeout(timeout, read=idle_timeout)) as response:
+                    if response.status_code >= 400:
+                        # Load the error body before the stream closes; handle_grok_error reads it from the HTTPError
+                        response.read()
+                    raise_for_status(response)
+                    for line in response.iter_lines():
+                        check_cancelled(cancel)
+                        check_deadline(start, timeout)
+                        if handle_sse_line(line, monitor):
+                            break
+            else:
+                response = self._session.post(self.url, json=payload, timeout=(timeout, idle_timeout), stream=True)
+                try:
+                    if response.status_code >= 400:
+                        # stream=True defers the body; load it before close() so handle_grok_error can read it
+                        _ = response.content
+                    raise_for_status(response)
+                    for line in response.iter_lines(decode_unicode=True):
+                        check_cancelled(cancel)
+                        check_deadline(start, timeout)
+                        if handle_sse_line(line, monitor):
+                            break
+                finally:
+                    response.close()
+            return stream_result(monitor), response
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if response is not None:
+                self.limiter.release(response.status_code, response.headers, time.monotonic() - start)
+            else:
+                self.limiter.release()
+            if response is not None and response.status_code < 400:
+                record_stream(start, monitor, error)
+
+    def close(self):
+        if self.http2:
+            self._client.close()
+        else:
+            self._session.close()
+
+
+class AsyncGrokClient:
+    """
+    asyncio counterpart of GrokClient built on httpx.AsyncClient.
+
+    An AsyncClient is bound to the event loop it is used on, so these are
+    created per engine run rather than kept in the process-wide registry.
+    """
+
+    def __init__(self, api_key, url=GROK_URL, pool_size=GROK_POOL_SIZE, http2=GROK_HTTP2):
+        if not HTTPX_AVAILABLE:
+            raise ImportError("The asyncio engine requires httpx. Install with: pip install httpx")
+        self.api_key = api_key
+        self.url = url
+        self.limiter = get_rate_limiter(api_key)
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}"
+        }
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        try:
+            self._client = httpx.AsyncClient(http2=bool(http2), headers=headers, limits=limits)
+        except ImportError:
+            print("[WARNING] HTTP/2 support requires the h2 package. Falling back to HTTP/1.1. Install with: pip install 'httpx[http2]'")
+            self._client = httpx.AsyncClient(headers=headers, limits=limits)
+
+    async def post(self, payload, timeout):
+        """POST a JSON payload to the Grok endpoint (paced by the key's rate limiter) and return the response."""
+        await self.limiter.acquire_async()
+        start = time.monotonic()
+        response = None
+        try:
+            response = await self._post(payload, timeout)
+            return response
+        finally:
+            if response is not None:
+                self.limiter.release(response.status_code, response.headers, time.monotonic() - start)
+            else:
+                self.limiter.release()
+
+    async def _post(self, payload, timeout):
+        with httpx_errors():
+            return await self._client.post(self.url, json=payload, timeout=timeout)
+
+    async def post_stream(self, payload, timeout, idle_timeout):
+        """asyncio version of GrokClient.post_stream(); returns (result_data, response)."""
+        await self.limiter.acquire_async()
+        start = time.monotonic()
+        monitor = StreamingJSONMonitor()
+        response = None
+        error = None
+        try:
+            with httpx_errors():
+                async with self._client.stream("POST", self.url, json=payload, timeout=httpx.Timeout(timeout, read=idle_timeout)) as response:
+                    if response.status_code >= 400:
+                        await response.aread()
+                    raise_for_status(response)
+                    async for line in response.aiter_lines():
+                        check_deadline(start, timeout)
+                        if handle_sse_line(line, monitor):
+                            break
+            return stream_result(monitor), response
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if response is not None:
+                self.limiter.release(response.status_code, response.headers, time.monotonic() - start)
+            else:
+                self.limiter.release()
+            if response is not None and response.status_code < 400:
+                record_stream(start, monitor, error)
+
+    async def close(self):
+        await self._client.aclose()
+
+
+# ---- CLIENT REGISTRY ----
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_grok_client(api_key):
+    """Return the shared GrokClient for api_key, creating it on first use."""
+    client = _clients.get(api_key)
+    if client is not None:
+        return client
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = GrokClient(api_key)
+            _clients[api_key] = client
+        return client
+
+
+def close_grok_clients():
+    """Close all pooled connections (called on application shutdown)."""
+    with _clients_lock:
+        for client in _clients.values():
+            try:
+                client.close()
+            except Exception:
+                pass
+        _clients.clear()
@@ -0,0 +1,99 @@
+import os
+import sys
+import math
+import threading
+from collections import deque
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import (
+    HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES, HEDGE_WINDOW, HEDGE_MAX_EXTRA_RATIO
+)
+
+
+class HedgePolicy:
+    """
+    Decides when a slow Grok request gets a duplicate ("hedge") on another API key.
+
+    Recent successful request latencies are kept in a rolling window; once a
+    request has been in flight longer than the configured percentile of that
+    window, a hedge may be sent. Hedges are budgeted: at most max_extra_ratio
+    extra requests per primary request, so hedging can never add more than
+    that share of load. A losing request that is still running counts as one
+    more hedge until it stops.
+    """
+
+    def __init__(self, percentile=HEDGE_PERCENTILE, min_samples=HEDGE_MIN_SAMPLES, window=HEDGE_WINDOW, max_extra_ratio=HEDGE_MAX_EXTRA_RATIO):
+        self.percentile = min(99.9, max(1.0, percentile))
+        self.min_samples = max(1, min_samples)
+        self.max_extra_ratio = max(0.0, max_extra_ratio)
+        self._latencies = deque(maxlen=max(self.min_samples, window))
+        self._lock = threading.Lock()
+        self.primaries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.losers_running = 0
+
+    def record_latency(self, latency):
+        with self._lock:
+            self._latencies.append(latency)
+
+    def hedge_delay(self):
+        """Seconds to wait before hedging, or None while there are too few samples."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, max(0, math.ceil(self.percentile / 100.0 * len(ordered)) - 1))
+        return ordered[index]
+
+    def note_primary(self):
+        with self._lock:
+            self.primaries += 1
+
+    def try_spend(self):
+        """Reserve budget for one hedge; False if it would exceed the extra-load cap."""
+        with self._lock:
+            if self.hedges + self.losers_running + 1 > self.max_extra_ratio * self.primaries:
+                return False
+            self.hedges += 1
+            return True
+
+    def note_hedge_win(self):
+        with self._lock:
+            self.hedge_wins += 1
+
+    def note_loser(self):
+        """A cancelled losing request is still running (it holds a slot until it stops)."""
+        with self._lock:
+            self.losers_running += 1
+
+    def note_loser_stopped(self):
+        with self._lock:
+            self.losers_running -= 1
+
+    def snapshot(self):
+        delay = self.hedge_delay()
+        with self._lock:
+            return {
+                "hedge_after_seconds": round(delay, 3) if delay is not None else None,
+                "samples": len(self._latencies),
+                "primaries": self.primaries,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "losers_running": self.losers_running,
+            }
+
+
+_policy = None
+_policy_lock = threading.Lock()
+
+
+def get_hedge_policy():
+    """Return the process-wide HedgePolicy."""
+    global _policy
+    with _policy_lock:
+        if _policy is None:
+            _policy = HedgePolicy()
+        return _policy
@@ -0,0 +1,165 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import JOB_JOURNAL_ENABLED, JOB_JOURNAL_PATH
+
+# File states; "pending" and "failed" files are re-queued when a job is resumed
+FILE_PENDING = "pending"
+FILE_SUCCESS = "success"
+FILE_FAILED = "failed"
+
+
+class JobJournal:
+    """
+    Durable SQLite (WAL) journal of processing jobs.
+
+    Each job's parameters and the state of every file (pending / success /
+    failed) are written as they change, together with the parsed row of each
+    successful file, so a job interrupted by a crash or restart can be resumed
+    without re-parsing what was already done.
+    """
+
+    def __init__(self, db_path=JOB_JOURNAL_PATH):
+        self.db_path = str(db_path)
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                input_folder TEXT NOT NULL,
+                output_path TEXT NOT NULL,
+                append INTEGER NOT NULL,
+                priority INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                message TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS job_files (
+                job_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                filename TEXT NOT NULL,
+                state TEXT NOT NULL,
+                data TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (job_id, filename)
+            )
+            """
+        )
+        self._conn.commit()
+
+    # ---- jobs ----
+    def create_job(self, job_id, input_folder, output_path, append, priority, files):
+        """Record a new job and its files (all pending). Re-creating an existing job_id starts it over."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM job_files WHERE job_id = ?", (job_id,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, input_folder, output_path, append, priority, status, message, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, 'processing', NULL, ?, ?)",
+                (job_id, input_folder, output_path, int(bool(append)), int(priority), now, now)
+            )
+            self._conn.executemany(
+                "INSERT INTO job_files (job_id, seq, filename, state, data, updated_at) VALUES (?, ?, ?, ?, NULL, ?)",
+                [(job_id, seq, filename, FILE_PENDING, now) for seq, filename in enumerate(files)]
+            )
+            self._conn.commit()
+
+    def set_status(self, job_id, status, message=None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, message = ?, updated_at = ? WHERE job_id = ?",
+                (status, message, time.time(), job_id)
+            )
+            self._conn.commit()
+
+    def mark_interrupted(self):
+        """Flag jobs left "processing" by a previous process as interrupted (called on startup)."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'interrupted', updated_at = ? WHERE status = 'processing'", (time.time(),)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def get_job(self, job_id):
+        """Return the job's parameters and per-file states, or None if unknown."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id, input_folder, output_path, append, priority, status, message, created_at, updated_at "
+                "FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            files = self._conn.execute(
+                "SELECT filename, state FROM job_files WHERE job_id = ? ORDER BY seq", (job_id,)
+            ).fetchall()
+        job = dict(zip(["job_id", "input_folder", "output_path", "append", "priority", "status", "message", "created_at", "updated_at"], row))
+        job["append"] = bool(job["append"])
+        job["file_status"] = {filename: state for filename, state in files}
+        return job
+
+    # ---- files ----
+    def record_file(self, job_id, filename, result):
+        """Record a finished file: its parsed row on success, or failed when result is None."""
+        state = FILE_SUCCESS if result else FILE_FAILED
+        data = json.dumps(result, ensure_ascii=False, default=str) if result else None
+        with self._lock:
+            self._conn.execute(
+                "UPDATE job_files SET state = ?, data = ?, updated_at = ? WHERE job_id = ? AND filename = ?",
+                (state, data, time.time(), job_id, filename)
+            )
+            self._conn.commit()
+
+    def unfinished_files(self, job_id, include_failed=True):
+        """Files still to do for a resumed job, in their original order."""
+        states = (FILE_PENDING, FILE_FAILED) if include_failed else (FILE_PENDING,)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT filename FROM job_files WHERE job_id = ? AND state IN ({','.join('?' * len(states))}) ORDER BY seq",
+                (job_id, *states)
+            ).fetchall()
+        return [filename for (filename,) in rows]
+
+    def finished_rows(self, job_id):
+        """Parsed rows of the job's successful files, in file order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM job_files WHERE job_id = ? AND state = ? ORDER BY seq", (job_id, FILE_SUCCESS)
+            ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_job_journal():
+    """Return the process-wide JobJournal, or None if journaling is disabled or unavailable."""
+    global _journal
+    if not JOB_JOURNAL_ENABLED:
+        return None
+    with _journal_lock:
+        if _journal is None:
+            try:
+                _journal = JobJournal()
+            except Exception as e:
+                print(f"[WARNING] Job journal unavailable: {str(e)}")
+                return None
+        return _journal
@@ -1,20 +1,29 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, Response
 import os
 import sys
 import asyncio
 import uuid
 import json
+import gzip
 import shutil
 from typing import Dict, List
-from datetime import datetime
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from backend.parser_service import process_folder
-from backend.config import GROK_API_KEYS
+from backend.grok_client import close_grok_clients
+from backend.scheduler import get_key_scheduler
+from backend.hedging import get_hedge_policy
+from backend.streaming import get_stream_stats
+from backend.routing import get_routing_stats
+from backend.journal import get_job_journal, FILE_PENDING
+from backend.result_store import get_result_store
+from backend.output_writer import export_results
+from backend.progress import JobProgress
+from backend.config import GROK_API_KEYS, PROGRESS_PUSH_INTERVAL, PROGRESS_KEEPALIVE_SECONDS, PROGRESS_GZIP_MIN_BYTES
 
 app = FastAPI(title="Resume Parser API", version="1.0.0")
 
@@ -27,10 +36,26 @@ app.add_middleware(
 )
 
 # In-memory progress tracking
-progress_tracker: Dict[str, dict] = {}
+progress_tracker: Dict[str, JobProgress] = {}
+# Background tasks of running jobs (kept referenced so they are not garbage collected)
+running_jobs: Dict[str, asyncio.Task] = {}
+
+@app.on_event("startup")
+def startup_event():
+    """Flag journaled jobs that were still running when the server stopped, so they can be resumed"""
+    journal = get_job_journal()
+    if journal is not None:
+        interrupted = journal.mark_interrupted()
+        if interrupted:
+            print(f"[INFO] {interrupted} interrupted job(s) can be resumed via /api/jobs/{{job_id}}/resume")
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """Release pooled Grok API connections"""
+    close_grok_clients()
 
 @app.post("/api/process")
-async def process_resumes(input_folder: str, output_path: str, append: bool = False, job_id: str = None):
+async def process_resumes(input_folder: str, output_path: str, append: bool = False, job_id: str = None, priority: int = 0):
     """
     Process resumes from input folder and save to output path
     
@@ -39,6 +64,7 @@ async def process_resumes(input_folder: str, output_path: str, append: bool = Fa
         output_path: Path where output Excel file should be saved
         append: If True, append to existing file. If False, create new file.
         job_id: Optional job ID for progress tracking. If not provided, one will be generated.
+        priority: Scheduling priority against other running jobs sharing the API keys (higher first).
     """
     if not os.path.exists(input_folder):
         raise HTTPException(status_code=404, detail=f"Input folder not found: {input_folder}")
@@ -50,93 +76,102 @@ async def process_resumes(input_folder: str, output_path: str, append: bool = Fa
     if not job_id:
         job_id = str(uuid.uuid4())
     
-    # Initialize progress tracking
+    if job_id in running_jobs:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is already running")
+    
     files = [f for f in os.listdir(input_folder) if os.path.isfile(os.path.join(input_folder, f))]
-    progress_tracker[job_id] = {
-        "status": "processing",
-        "total_files": len(files),
-        "processed_files": 0,
-        "failed_files": 0,
-        "file_status": {f: "pending" for f in files},  # pending, processing, success, failed
-        "current_file": None,
-        "message": "",
-        "output_path": output_path,
-        "start_time": datetime.now().isoformat(),
-        "end_time": None
+    start_job(job_id, input_folder, output_path, append, priority, {f: "pending" for f in files})
+    
+    return {
+        "status": "started",
+        "job_id": job_id,
+        "message": f"Processing started for {len(files)} files",
+        "total_files": len(files)
     }
+
+@app.post("/api/jobs/{job_id}/resume")
+async def resume_job(job_id: str):
+    """
+    Resume a journaled job (e.g. after a crash or restart).
+    Only files that are still pending or failed are processed again; rows already parsed are kept.
+    """
+    journal = get_job_journal()
+    job = journal.get_job(job_id) if journal is not None else None
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found in the job journal")
+    if job_id in running_jobs:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is already running")
+    if not os.path.isdir(job["input_folder"]):
+        raise HTTPException(status_code=404, detail=f"Input folder not found: {job['input_folder']}")
+    
+    # Files not finished yet go back to pending
+    file_status = {f: ("success" if state == "success" else "pending") for f, state in job["file_status"].items()}
+    remaining = sum(1 for state in file_status.values() if state == FILE_PENDING)
+    start_job(job_id, job["input_folder"], job["output_path"], job["append"], job["priority"], file_status, resume=True)
+    
+    return {
+        "status": "resumed",
+        "job_id": job_id,
+        "message": f"Resumed job: {remaining} of {len(file_status)} files left to process",
+        "total_files": len(file_status),
+        "remaining_files": remaining
+    }
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get a job's journaled state (parameters, status and per-file state), including past and interrupted jobs"""
+    journal = get_job_journal()
+    job = journal.get_job(job_id) if journal is not None else None
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found in the job journal")
+    job["running"] = job_id in running_jobs
+    return job
+
+@app.get("/api/results")
+async def get_results(output_path: str):
+    """Get the master result store's summary (columns, row count) for an output file"""
+    store = get_result_store()
+    output = store.get_output(output_path) if store is not None else None
+    if output is None:
+        raise HTTPException(status_code=404, detail=f"No stored results for {output_path}")
+    output["in_sync"] = store.in_sync(output_path)
+    return output
+
+@app.post("/api/results/export")
+async def export_result_file(output_path: str, dest_path: str = None):
+    """
+    Export an output's rows from the master result store as an Excel file
+    
+    Args:
+        output_path: Output file whose stored rows are exported
+        dest_path: Where to write the export (default: output_path itself)
+    """
+    store = get_result_store()
+    if store is None:
+        raise HTTPException(status_code=404, detail="Result store is disabled")
+    if dest_path:
+        dest_dir = os.path.dirname(dest_path)
+        if dest_dir:
+            os.makedirs(dest_dir, exist_ok=True)
+    try:
+        rows = await asyncio.to_thread(export_results, store, output_path, dest_path)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to export results: {str(e)}")
+    if rows is None:
+        raise HTTPException(status_code=404, detail=f"No stored results for {output_path}")
+    return {"status": "exported", "output_path": dest_path or output_path, "rows": rows}
+
+def start_job(job_id, input_folder, output_path, append, priority, file_status, resume=False):
+    """Set up progress tracking for a job and run process_folder in a background thread"""
+    # Progress state is driven by typed events from process_folder (O(1) per event, thread-safe)
+    progress = JobProgress(output_path, file_status)
+    progress_tracker[job_id] = progress
     
     # Ensure output directory exists
     output_dir = os.path.dirname(output_path) if os.path.dirname(output_path) else "."
     if output_dir:
         os.makedirs(output_dir, exist_ok=True)
     
-    # Progress callback
-    def progress_callback(current, total):
-        if job_id in progress_tracker:
-            # Update total if needed
-            progress_tracker[job_id]["total_files"] = total
-            # Note: processed_files count is calculated from file_status, not from this callback
-    
-    # Status callback to track individual file status
-    def status_callback(message):
-        if job_id not in progress_tracker:
-            return
-        
-        progress_tracker[job_id]["message"] = message
-        
-        # Update file status based on message patterns
-        # Pattern: "[SUCCESS] Parsed filename.pdf"
-        if "[SUCCESS] Parsed" in message:
-            parts = message.split("Parsed ")
-            if len(parts) > 1:
-                filename = parts[1].strip()
-                if filename in progress_tracker[job_id]["file_status"]:
-                    old_status = progress_tracker[job_id]["file_status"][filename]
-                    progress_tracker[job_id]["file_status"][filename] = "success"
-                    # Recalculate counts from file_status
-                    file_status = progress_tracker[job_id]["file_status"]
-                    progress_tracker[job_id]["processed_files"] = sum(1 for s in file_status.values() if s == "success")
-                    progress_tracker[job_id]["failed_files"] = sum(1 for s in file_status.values() if s == "failed")
-        
-        # Pattern: "[ERROR] Failed to parse filename.pdf" or "[ERROR] Failed to process filename.pdf"
-        elif "[ERROR]" in message:
-            # Try to extract filename from error message
-            for filename in progress_tracker[job_id]["file_status"]:
-                if filename in message:
-                    old_status = progress_tracker[job_id]["file_status"][filename]
-                    if old_status in ["processing", "pending"]:
-                        progress_tracker[job_id]["file_status"][filename] = "failed"
-                        # Recalculate counts from file_status
-                        file_status = progress_tracker[job_id]["file_status"]
-                        progress_tracker[job_id]["processed_files"] = sum(1 for s in file_status.values() if s == "success")
-                        progress_tracker[job_id]["failed_files"] = sum(1 for s in file_status.values() if s == "failed")
-                        break
-        
-        # Pattern: "[WARNING] Skipped filename.pdf"
-        elif "[WARNING] Skipped" in message:
-            parts = message.split("Skipped ")
-            if len(parts) > 1:
-                filename = parts[1].strip()
-                if filename in progress_tracker[job_id]["file_status"]:
-                    old_status = progress_tracker[job_id]["file_status"][filename]
-                    if old_status in ["processing", "pending"]:
-                        progress_tracker[job_id]["file_status"][filename] = "failed"
-                        # Recalculate counts from file_status
-                        file_status = progress_tracker[job_id]["file_status"]
-                        progress_tracker[job_id]["processed_files"] = sum(1 for s in file_status.values() if s == "success")
-                        progress_tracker[job_id]["failed_files"] = sum(1 for s in file_status.values() if s == "failed")
-        
-        # Pattern: "Processing: filename.pdf (1/10)"
-        elif "Processing:" in message:
-            parts = message.split("Processing: ")
-            if len(parts) > 1:
-                filename_part = parts[1].split(" (")[0].strip()
-                if filename_part in progress_tracker[job_id]["file_status"]:
-                    old_status = progress_tracker[job_id]["file_status"][filename_part]
-                    if old_status == "pending":
-                        progress_tracker[job_id]["file_status"][filename_part] = "processing"
-                    progress_tracker[job_id]["current_file"] = filename_part
-    
     # Process files in background thread
     def process():
         try:
@@ -145,37 +180,123 @@ async def process_resumes(input_folder: str, output_path: str, append: bool = Fa
                 output_path,
                 api_key=GROK_API_KEYS[0] if GROK_API_KEYS else None,
                 append=append,
-                progress_callback=progress_callback,
-                status_callback=status_callback
+                status_callback=progress.set_message,
+                stats_callback=progress.add_stat,
+                event_callback=progress.apply,
+                job_id=job_id,
+                priority=priority,
+                resume=resume
             )
         finally:
-            # Mark as completed
-            if job_id in progress_tracker:
-                progress_tracker[job_id]["status"] = "completed"
-                progress_tracker[job_id]["end_time"] = datetime.now().isoformat()
-                progress_tracker[job_id]["current_file"] = None
-                # Final count update
-                file_status = progress_tracker[job_id]["file_status"]
-                progress_tracker[job_id]["processed_files"] = sum(1 for s in file_status.values() if s == "success")
-                progress_tracker[job_id]["failed_files"] = sum(1 for s in file_status.values() if s == "failed")
+            progress.finish()
     
     # Start processing in background
-    asyncio.create_task(asyncio.to_thread(process))
-    
-    return {
-        "status": "started",
-        "job_id": job_id,
-        "message": f"Processing started for {len(files)} files",
-        "total_files": len(files)
-    }
+    task = asyncio.create_task(asyncio.to_thread(process))
+    running_jobs[job_id] = task
+    task.add_done_callback(lambda _: running_jobs.pop(job_id, None))
+
+def json_response(request, data):
+    """JSON response, gzip-compressed when the client accepts it and it is large enough to be worth it"""
+    body = json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+    headers = {"Vary": "Accept-Encoding"}
+    if len(body) >= PROGRESS_GZIP_MIN_BYTES and "gzip" in request.headers.get("accept-encoding", ""):
+        body = gzip.compress(body, compresslevel=5)
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @app.get("/api/progress/{job_id}")
-async def get_progress(job_id: str):
-    """Get progress for a specific job"""
+async def get_progress(request: Request, job_id: str, summary: bool = False, status: str = None,
+                       limit: int = None, offset: int = 0, since: int = None):
+    """
+    Get progress for a specific job
+    
+    Args:
+        summary: If True, counters only (no per-file state)
+        status: Only files in this state (pending, processing, success, failed, skipped), paged by limit/offset
+        limit: Page size (default 100, at most 1000) - with status, or on its own to page all files
+        offset: Files to skip before the page
+        since: Only the files whose state changed after this sequence number ("seq" of an earlier response)
+    
+    Without options the full state is returned, including the whole file_status dict.
+    Paged and delta responses carry their files in "files".
+    """
+    if job_id not in progress_tracker:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    progress = progress_tracker[job_id]
+    
+    if summary:
+        data = progress.summary()
+    elif since is not None:
+        data = progress.delta(since)
+    elif status is not None or limit is not None:
+        try:
+            data = progress.files_page(status, 100 if limit is None else limit, offset)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        data = progress.snapshot()
+    return json_response(request, data)
+
+def sse_message(event, data):
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+@app.get("/api/progress/{job_id}/stream")
+async def stream_progress(job_id: str, since: int = None):
+    """
+    Server-sent events for a job's progress, instead of polling /api/progress.
+    
+    Sends one "snapshot" event (the /api/progress response), then a "delta" event
+    whenever something changes: counters, message, and only the files whose state
+    changed ("files": {filename: state}). Ends with a "done" event once the job completes.
+    
+    Args:
+        since: Start with a "delta" of the files changed after this sequence number
+               instead of the snapshot (e.g. when a client reconnects)
+    """
     if job_id not in progress_tracker:
         raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    progress = progress_tracker[job_id]
+    
+    async def events():
+        if since is None:
+            state = progress.snapshot()
+            yield sse_message("snapshot", state)
+        else:
+            state = progress.delta(since)
+            yield sse_message("delta", state)
+        seq, version = state["seq"], state["version"]
+        idle = 0.0
+        while True:
+            if progress.version != version:
+                state = progress.delta(seq)
+                seq, version = state["seq"], state["version"]
+                yield sse_message("delta", state)
+                idle = 0.0
+            elif state["status"] == "completed":
+                yield sse_message("done", {"seq": seq})
+                return
+            else:
+                await asyncio.sleep(PROGRESS_PUSH_INTERVAL)
+                idle += PROGRESS_PUSH_INTERVAL
+                if idle >= PROGRESS_KEEPALIVE_SECONDS:
+                    yield ": keep-alive\n\n"
+                    idle = 0.0
     
-    return progress_tracker[job_id]
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/scheduler")
+async def get_scheduler_status():
+    """Get the shared API-key scheduler state (in-flight requests per key, waiting requests per job, hedging, streaming latency, model routing)"""
+    status = get_key_scheduler().snapshot()
+    status["hedging"] = get_hedge_policy().snapshot()
+    status["streaming"] = get_stream_stats().snapshot()
+    status["routing"] = get_routing_stats().snapshot()
+    return status
 
 @app.post("/api/upload")
 async def upload_files(files: List[UploadFile] = File(...)):
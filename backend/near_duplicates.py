@@ -0,0 +1,244 @@
+import os
+import re
+import sys
+import time
+import zlib
+import hashlib
+import sqlite3
+import threading
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import NEAR_DUP_MODE, NEAR_DUP_THRESHOLD, NEAR_DUP_INDEX_PATH
+
+# MinHash signature: NUM_PERM 32-bit minima of (a * h + b) mod PRIME over the CRC32 hashes h of word shingles
+NUM_PERM = 128
+SHINGLE_WORDS = 5
+# Documents with fewer shingles than this are too short to compare reliably
+MIN_SHINGLES = 20
+SEED = 1
+# Largest prime below 2^32: with h, a, b all below 2^32, a * h + b < 2^64, so uint64 arithmetic never wraps
+PRIME = np.uint64(4294967291)
+# LSH band layouts are chosen this far below the threshold, so true near-duplicates are almost never missed
+BAND_MARGIN = 0.15
+# Candidates verified per lookup (those sharing the most buckets)
+MAX_CANDIDATES = 200
+
+_rng = np.random.RandomState(SEED)
+PERM_A = _rng.randint(1, int(PRIME), size=NUM_PERM, dtype=np.uint64)
+PERM_B = _rng.randint(0, int(PRIME), size=NUM_PERM, dtype=np.uint64)
+
+WORD_RE = re.compile(r"\w+")
+
+
+def shingle_hashes(text):
+    """CRC32 of every SHINGLE_WORDS-word window of the lowercased text (as a set)."""
+    words = WORD_RE.findall((text or "").lower())
+    if len(words) < SHINGLE_WORDS:
+        return set()
+    return {zlib.crc32(" ".join(words[i:i + SHINGLE_WORDS]).encode("utf-8")) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def minhash(text):
+    """MinHash signature (uint32 array of NUM_PERM) of the text, or None if it is too short."""
+    hashes = shingle_hashes(text)
+    if len(hashes) < MIN_SHINGLES:
+        return None
+    values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+    permuted = (values[:, None] * PERM_A + PERM_B) % PRIME
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return float(np.count_nonzero(signature == other)) / NUM_PERM
+
+
+def band_layout(threshold, num_perm=NUM_PERM):
+    """
+    (bands, rows) for LSH: the layout whose candidate threshold (1/bands)^(1/rows) is the
+    highest one not above threshold - BAND_MARGIN. Candidates are verified afterwards.
+    """
+    target = max(0.0, threshold - BAND_MARGIN)
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if (1.0 / bands) ** (1.0 / rows) <= target:
+            best = (bands, rows)
+    return best
+
+
+def band_keys(signature, bands, rows):
+    """One signed 64-bit bucket key per band (the band number is part of the key)."""
+    keys = []
+    for band in range(bands):
+        chunk = signature[band * rows:(band + 1) * rows].tobytes()
+        digest = hashlib.blake2b(band.to_bytes(2, "little") + chunk, digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+class NearDuplicateIndex:
+    """
+    Persistent MinHash/LSH index of the documents parsed so far (SQLite, WAL).
+
+    Each parsed document's signature is stored with its content hash and file name,
+    and its band keys go into an indexed bucket table. A lookup reads only the
+    documents sharing a bucket with the query (sub-linear in the number stored) and
+    verifies them by estimated Jaccard similarity against the threshold. When the
+    band layout changes (new threshold) the buckets are rebuilt from the signatures.
+    """
+
+    def __init__(self, db_path=NEAR_DUP_INDEX_PATH, threshold=NEAR_DUP_THRESHOLD):
+        self.db_path = str(db_path)
+        self.threshold = threshold
+        self.bands, self.rows = band_layout(threshold)
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_id INTEGER PRIMARY KEY,
+                content_hash TEXT NOT NULL UNIQUE,
+                filename TEXT NOT NULL,
+                signature BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS buckets (bucket INTEGER NOT NULL, doc_id INTEGER NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_buckets_bucket ON buckets(bucket)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._check_layout()
+        self._conn.commit()
+
+    def _check_layout(self):
+        """Drop signatures made with other MinHash settings; rebuild buckets for a new band layout."""
+        meta = dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+        signature_layout = f"{NUM_PERM}:{SHINGLE_WORDS}:{SEED}:{PRIME}"
+        bucket_layout = f"{self.bands}x{self.rows}"
+        if meta.get("signature") != signature_layout:
+            self._conn.execute("DELETE FROM documents")
+            self._conn.execute("DELETE FROM buckets")
+        elif meta.get("buckets") != bucket_layout:
+            self._conn.execute("DELETE FROM buckets")
+            cursor = self._conn.execute("SELECT doc_id, signature FROM documents")
+            while True:
+                batch = cursor.fetchmany(1000)
+                if not batch:
+                    break
+                self._conn.executemany(
+                    "INSERT INTO buckets (bucket, doc_id) VALUES (?, ?)",
+                    [(key, doc_id) for doc_id, blob in batch for key in band_keys(np.frombuffer(blob, dtype=np.uint32), self.bands, self.rows)]
+                )
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('signature', ?)", (signature_layout,))
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('buckets', ?)", (bucket_layout,))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def query(self, signature, exclude_hash=None):
+        """
+        Return the most similar stored document at or above the threshold as
+        {"content_hash", "filename", "similarity"}, or None.
+        """
+        keys = band_keys(signature, self.bands, self.rows)
+        with self._lock:
+            candidates = self._conn.execute(
+                f"SELECT d.content_hash, d.filename, d.signature FROM documents d JOIN ("
+                f"SELECT doc_id, COUNT(*) AS shared FROM buckets WHERE bucket IN ({','.join('?' * len(keys))}) "
+                f"GROUP BY doc_id ORDER BY shared DESC LIMIT ?) c ON c.doc_id = d.doc_id",
+                (*keys, MAX_CANDIDATES)
+            ).fetchall()
+
+        best = None
+        for content_hash, filename, blob in candidates:
+            if content_hash == exclude_hash:
+                continue
+            score = similarity(signature, np.frombuffer(blob, dtype=np.uint32))
+            if score >= self.threshold and (best is None or score > best["similarity"]):
+                best = {"content_hash": content_hash, "filename": filename, "similarity": score}
+        return best
+
+    def add(self, signature, content_hash, filename):
+        """Store a parsed document's signature (once per content hash)."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO documents (content_hash, filename, signature, created_at) VALUES (?, ?, ?, ?)",
+                (content_hash, filename, signature.astype(np.uint32).tobytes(), time.time())
+            )
+            if cursor.rowcount:
+                self._conn.executemany(
+                    "INSERT INTO buckets (bucket, doc_id) VALUES (?, ?)",
+                    [(key, cursor.lastrowid) for key in band_keys(signature, self.bands, self.rows)]
+                )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_near_duplicate_index():
+    """Return the process-wide NearDuplicateIndex, or None if detection is off or unavailable."""
+    global _index
+    if NEAR_DUP_MODE not in ("reuse", "flag"):
+        return None
+    with _index_lock:
+        if _index is None:
+            try:
+                _index = NearDuplicateIndex()
+            except Exception as e:
+                print(f"[WARNING] Near-duplicate index unavailable: {str(e)}")
+                return None
+        return _index
+
+
+# ---- BENCHMARK ----
+def benchmark(stored=100000, queries=1000, directory=None):
+    """
+    Lookup latency against an index of `stored` documents. Stored signatures are random;
+    each query is a stored signature with ~5% of its minima changed (a near-duplicate).
+    """
+    import tempfile
+
+    rng = np.random.RandomState(7)
+    with tempfile.TemporaryDirectory(dir=directory) as temp_dir:
+        index = NearDuplicateIndex(os.path.join(temp_dir, "near_duplicates.sqlite3"))
+        signatures = rng.randint(0, 1 << 32, size=(stored, NUM_PERM), dtype=np.uint64).astype(np.uint32)
+
+        start = time.perf_counter()
+        for i, signature in enumerate(signatures):
+            index.add(signature, f"hash-{i}", f"resume_{i}.pdf")
+        add_seconds = time.perf_counter() - start
+
+        found = 0
+        start = time.perf_counter()
+        for i in rng.randint(0, stored, size=queries):
+            query = signatures[i].copy()
+            changed = rng.choice(NUM_PERM, size=NUM_PERM // 20, replace=False)
+            query[changed] = rng.randint(0, 1 << 32, size=len(changed), dtype=np.uint64).astype(np.uint32)
+            match = index.query(query)
+            found += match is not None and match["content_hash"] == f"hash-{i}"
+        query_seconds = time.perf_counter() - start
+        index.close()
+
+    print(f"{stored} stored, bands {index.bands}x{index.rows}: add {add_seconds / stored * 1000:.3f} ms/doc, "
+          f"query {query_seconds / queries * 1000:.3f} ms/doc, {found}/{queries} near-duplicates found")
+    return {"add_ms": add_seconds / stored * 1000, "query_ms": query_seconds / queries * 1000, "found": found}
+
+
+if __name__ == "__main__":
+    # python backend/near_duplicates.py [stored [queries]]
+    benchmark(*[int(n) for n in sys.argv[1:3]])
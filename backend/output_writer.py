@@ -0,0 +1,380 @@
+import os
+import sys
+import json
+import time
+import threading
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles import Font
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import OUTPUT_FLUSH_SECONDS, OUTPUT_AUTO_EXPORT_MAX_ROWS
+from backend.result_store import ResultStore, get_result_store, FETCH_SIZE
+
+# A flush waits at least this many times its own duration, keeping snapshot overhead near 10%
+FLUSH_SPACING_FACTOR = 10
+
+
+def cell_value(value):
+    """Make a row value writable to a cell (no lists/dicts, no control characters)."""
+    if isinstance(value, (list, dict)):
+        value = json.dumps(value, ensure_ascii=False, default=str)
+    if isinstance(value, str):
+        value = ILLEGAL_CHARACTERS_RE.sub("", value)
+    return value
+
+
+def read_workbook_rows(path):
+    """Yield the rows of a workbook's active sheet as dicts keyed by its header (read-only mode, constant memory)."""
+    workbook = load_workbook(path, read_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [str(name) if name is not None else f"Unnamed: {i}" for i, name in enumerate(header)]
+        for values in rows:
+            if values is None or all(value is None for value in values):
+                continue
+            yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def write_workbook(path, columns, rows):
+    """
+    Stream rows (dicts) through a write-only (constant-memory) workbook into a temp
+    file that atomically replaces path, so path is never a half-written workbook.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Sheet1")
+    header = []
+    for name in columns:
+        cell = WriteOnlyCell(sheet, value=cell_value(name))
+        cell.font = Font(bold=True)
+        header.append(cell)
+    sheet.append(header)
+    for row in rows:
+        sheet.append([cell_value(row.get(name)) for name in columns])
+
+    temp_path = os.path.join(os.path.dirname(path) or ".", f".{os.path.basename(path)}.tmp")
+    workbook.save(temp_path)
+    os.replace(temp_path, path)
+
+
+def export_results(store, output_path, dest_path=None):
+    """
+    Export output_path's row set from the result store as an .xlsx (to dest_path, default
+    output_path). Returns the number of rows written, or None if the store has no such output.
+    """
+    output = store.get_output(output_path)
+    if output is None:
+        return None
+    dest_path = dest_path or output_path
+    write_workbook(dest_path, output["columns"], store.iter_rows(output_path))
+    if os.path.abspath(dest_path) == os.path.abspath(output_path):
+        store.mark_exported(output_path)
+    return output["row_count"]
+
+
+class StreamingExcelWriter:
+    """
+    Writes parsed rows to an .xlsx file as they arrive instead of in one DataFrame dump at the end.
+
+    Rows are appended to the output's row set in the result store (O(new rows), memory
+    stays flat however many rows there are). On flush the row set is exported to
+    output_path through a write-only workbook and an atomic replace, so the file on disk
+    is always a complete, valid workbook. Flushes happen every flush_seconds (spaced
+    further apart when exports get slow) and once more on close().
+
+    An export costs O(total rows), so once the output holds more than
+    auto_export_max_rows rows there are no flushes and close() does not export either:
+    the store is the master and the .xlsx is exported on demand (export_results,
+    POST /api/results/export). exported tells whether close() left output_path current.
+
+    With append=True the store's rows for output_path are kept; the existing file is
+    only read (and imported) when it was changed since the store last exported it, or
+    the store has never seen it. A missing file only keeps the stored rows when their
+    export was skipped for size (ResultStore.mark_export_skipped); otherwise the
+    output starts over, as it would have been deleted on purpose. Columns are the union of all rows' keys in first-seen
+    order, like pd.concat. Without a shared store (RESULT_STORE_ENABLED=0) a private
+    one next to the output (<output>.partial.sqlite3) is used for the job and the file
+    is always exported.
+    """
+
+    def __init__(self, output_path, append=False, status_callback=None, flush_seconds=OUTPUT_FLUSH_SECONDS, store=None, auto_export_max_rows=OUTPUT_AUTO_EXPORT_MAX_ROWS):
+        self.output_path = output_path
+        self.flush_seconds = flush_seconds
+        self.auto_export_max_rows = auto_export_max_rows
+        self.status_callback = status_callback
+        self.existing_rows = 0
+        self.new_rows = 0
+        self.exported = False
+        self._export_skipped = False
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._flush_cost = 0.0
+
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        self._private_path = None
+        if store is None:
+            store = get_result_store()
+        if store is None:
+            self._private_path = f"{output_path}.partial.sqlite3"
+            self._remove_private()
+            store = ResultStore(self._private_path)
+        self.store = store
+
+        stored = store.get_output(output_path) if append and self._private_path is None else None
+        if stored is not None and stored["row_count"] and stored["export_skipped"] and not os.path.isfile(output_path):
+            # A large master whose export was skipped: the store holds its rows
+            if status_callback:
+                status_callback(f"[INFO] Appending to the {stored['row_count']} stored records of {os.path.basename(output_path)}")
+            self.existing_rows = stored["row_count"]
+        elif append and os.path.isfile(output_path) and output_path.lower().endswith(('.xlsx', '.xls')):
+            if status_callback:
+                status_callback(f"[INFO] Appending to existing Excel file: {os.path.basename(output_path)}")
+            try:
+                if store.in_sync(output_path):
+                    self.existing_rows = store.get_output(output_path)["row_count"]
+                else:
+                    self.existing_rows = self._import_existing()
+                if status_callback:
+                    status_callback(f"[INFO] Found {self.existing_rows} existing records in file")
+            except Exception as e:
+                if status_callback:
+                    status_callback(f"[WARNING] Could not read existing file: {str(e)}. Creating new file instead.")
+                store.reset(output_path)
+                self.existing_rows = 0
+        else:
+            if status_callback:
+                if os.path.isfile(output_path):
+                    status_callback(f"[INFO] Creating new Excel file (overwriting existing): {os.path.basename(output_path)}")
+                else:
+                    status_callback(f"[INFO] Creating new Excel file: {os.path.basename(output_path)}")
+            store.reset(output_path)
+
+    @property
+    def appending(self):
+        return self.existing_rows > 0
+
+    @property
+    def auto_export(self):
+        """False once the output is too large to re-export on every flush and on close()."""
+        if self._private_path is not None or not self.auto_export_max_rows:
+            return True
+        return self.existing_rows + self.new_rows <= self.auto_export_max_rows
+
+    def _import_existing(self):
+        """Replace the store's rows for output_path with the rows of the file on disk."""
+        self.store.reset(self.output_path)
+        count = 0
+        batch = []
+        for row in read_workbook_rows(self.output_path):
+            batch.append(row)
+            if len(batch) >= FETCH_SIZE:
+                count = self.store.append_rows(self.output_path, batch)
+                batch = []
+        if batch:
+            count = self.store.append_rows(self.output_path, batch)
+        return count
+
+    def _remove_private(self):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self._private_path + suffix):
+                os.remove(self._private_path + suffix)
+
+    def load_index(self):
+        """ResultIndex of the rows already in the output (see ResultStore.load_index)."""
+        return self.store.load_index(self.output_path)
+
+    def write(self, row, content_hash=None):
+        """Add one parsed row (content_hash: SHA-256 of its source file); may trigger a periodic flush."""
+        with self._lock:
+            self.store.append_rows(self.output_path, [row], [content_hash])
+            self.new_rows += 1
+            if not self.auto_export:
+                self._skip_export()
+            elif self.flush_seconds and self.flush_seconds > 0:
+                elapsed = time.monotonic() - self._last_flush
+                if elapsed >= max(self.flush_seconds, self._flush_cost * FLUSH_SPACING_FACTOR):
+                    self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _skip_export(self):
+        # Recorded as soon as the output outgrows auto-export, so a crashed job's rows survive too
+        if not self._export_skipped:
+            self.store.mark_export_skipped(self.output_path)
+            self._export_skipped = True
+
+    def _flush(self):
+        start = time.monotonic()
+        export_results(self.store, self.output_path)
+        self.exported = True
+        self._export_skipped = False
+        self._last_flush = time.monotonic()
+        self._flush_cost = self._last_flush - start
+
+    def close(self):
+        """Export the final file (if there is anything new to write and auto_export) and release a private store."""
+        with self._lock:
+            try:
+                if self.new_rows and self.auto_export:
+                    self._flush()
+                elif self.new_rows:
+                    self.exported = False
+                    self._skip_export()
+                    if self.status_callback:
+                        self.status_callback(
+                            f"[INFO] {os.path.basename(self.output_path)} holds {self.existing_rows + self.new_rows} records; "
+                            f"the Excel file is exported on demand (POST /api/results/export)"
+                        )
+            finally:
+                if self._private_path is not None:
+                    self.store.close()
+                    self._remove_private()
+        return self.existing_rows + self.new_rows
+
+
+# ---- BENCHMARK ----
+def sample_row(i):
+    """A synthetic parsed row shaped like the prompt's DATA SCHEMA."""
+    return {
+        "Full_Name": f"Candidate {i}",
+        "Email": f"candidate{i}@example.com",
+        "Phone": f"+1 555 {i % 10000:04d}",
+        "Location": "Bengaluru, India",
+        "Total_Experience_Years": round((i % 240) / 12, 2),
+        "Current_Job_Title": "Senior Software Engineer",
+        "Current_Company": f"Company {i % 500}",
+        "Skills": "Python, FastAPI, SQL, Docker, Kubernetes, AWS, Pandas, Machine Learning",
+        "Highest_Education": "B.Tech in Computer Science",
+        "University_College": "National Institute of Technology",
+        "Graduation_Year": str(2000 + i % 25),
+        "Certifications": "AWS Certified Developer, CKA",
+        "Projects": "Resume parser pipeline; Real-time analytics dashboard; Payment gateway integration",
+        "LinkedIn_URL": f"https://www.linkedin.com/in/candidate-{i}",
+        "Resume_File_Name": f"resume_{i}.pdf",
+    }
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _measure_child(fn, queue):
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    fn()
+    queue.put((time.perf_counter() - start, peak_rss_mb() - baseline))
+
+
+def measure(fn):
+    """
+    Return (seconds, peak RSS growth in MB) for fn, run in a forked child so every
+    measurement starts from the same baseline. Unlike tracemalloc, RSS includes
+    C-level allocations such as SQLite's page cache and openpyxl's XML buffers.
+    """
+    import multiprocessing
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    process = context.Process(target=_measure_child, args=(fn, queue))
+    process.start()
+    try:
+        return queue.get()
+    finally:
+        process.join()
+
+
+def benchmark(row_counts=(10000, 100000), flush_seconds=OUTPUT_FLUSH_SECONDS, directory=None):
+    """Compare the end-of-job DataFrame dump with StreamingExcelWriter: write time and peak RSS growth (Linux/macOS)."""
+    import tempfile
+    import pandas as pd
+
+    results = []
+    with tempfile.TemporaryDirectory(dir=directory) as temp_dir:
+        for count in row_counts:
+            def dataframe_dump():
+                rows = [sample_row(i) for i in range(count)]
+                pd.DataFrame(rows).to_excel(os.path.join(temp_dir, f"dataframe_{count}.xlsx"), index=False)
+
+            def streaming():
+                # Opened in the measured process: SQLite connections must not cross a fork
+                store = ResultStore(os.path.join(temp_dir, f"results_{count}.sqlite3"))
+                path = os.path.join(temp_dir, f"streaming_{count}.xlsx")
+                writer = StreamingExcelWriter(path, flush_seconds=flush_seconds, store=store)
+                for i in range(count):
+                    writer.write(sample_row(i))
+                writer.close()
+                if not writer.exported:
+                    export_results(store, path)
+                store.close()
+
+            for name, fn in (("dataframe", dataframe_dump), ("streaming", streaming)):
+                seconds, peak_mb = measure(fn)
+                results.append({"rows": count, "writer": name, "seconds": round(seconds, 2), "peak_mb": round(peak_mb, 1)})
+                print(f"{count:>8} rows  {name:<10} {seconds:8.2f} s  {peak_mb:8.1f} MB peak RSS")
+    return results
+
+
+def benchmark_append(existing_rows=100000, new_rows=1000, directory=None):
+    """
+    Append new_rows to an existing_rows output: read_excel + concat + to_excel against
+    the result store (the appends, close(), and an on-demand .xlsx export).
+    """
+    import tempfile
+    import pandas as pd
+
+    with tempfile.TemporaryDirectory(dir=directory) as temp_dir:
+        store = ResultStore(os.path.join(temp_dir, "results.sqlite3"))
+        path = os.path.join(temp_dir, "master.xlsx")
+        writer = StreamingExcelWriter(path, flush_seconds=0, store=store)
+        for i in range(existing_rows):
+            writer.write(sample_row(i))
+        writer.close()
+        if not writer.exported:
+            export_results(store, path)
+        new = [sample_row(existing_rows + i) for i in range(new_rows)]
+
+        start = time.perf_counter()
+        combined = pd.concat([pd.read_excel(path), pd.DataFrame(new)], ignore_index=True)
+        combined.to_excel(os.path.join(temp_dir, "concat.xlsx"), index=False)
+        timings = {"concat_rewrite": time.perf_counter() - start}
+
+        start = time.perf_counter()
+        writer = StreamingExcelWriter(path, append=True, flush_seconds=0, store=store)
+        for row in new:
+            writer.write(row)
+        timings["store_append"] = time.perf_counter() - start
+        start = time.perf_counter()
+        writer.close()
+        timings["store_close"] = time.perf_counter() - start
+        start = time.perf_counter()
+        export_results(store, path)
+        timings["on_demand_export"] = time.perf_counter() - start
+        store.close()
+
+    for name, seconds in timings.items():
+        print(f"{existing_rows:>8} + {new_rows} rows  {name:<24} {seconds:8.2f} s")
+    return timings
+
+
+if __name__ == "__main__":
+    # python backend/output_writer.py [rows ...]
+    # python backend/output_writer.py append [existing_rows [new_rows]]
+    if sys.argv[1:2] == ["append"]:
+        benchmark_append(*[int(n) for n in sys.argv[2:4]])
+    else:
+        benchmark([int(n) for n in sys.argv[1:]] or (10000, 100000))
@@ -2,25 +2,14 @@ import os
 import fitz
 import docx2txt
 import pytesseract
-import pandas as pd
 import requests
+import re
 import json
 import threading
+import uuid
 from queue import Queue
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import time
-from requests.adapters import HTTPAdapter
-try:
-    from urllib3.util.retry import Retry
-except ImportError:
-    Retry = None
-
-# Optional import for OCR (requires poppler)
-try:
-    from pdf2image import convert_from_path
-    PDF2IMAGE_AVAILABLE = True
-except ImportError:
-    PDF2IMAGE_AVAILABLE = False
-    convert_from_path = None
 
 # Import configuration
 import sys
@@ -31,7 +20,25 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from backend.config import (
     PROMPT, GROK_API_KEY, GROK_API_KEYS, GROK_URL, GROK_MODEL,
-    MAX_RETRIES, REQUEST_TIMEOUT, RETRY_DELAY
+    MAX_RETRIES, REQUEST_TIMEOUT, RETRY_DELAY, PROCESSING_ENGINE, GROK_INFLIGHT_PER_KEY, EXTRACTION_WORKERS,
+    OCR_MAX_CONCURRENCY, OCR_PAGES_PER_DOC, PAGE_OCR_MIN_SCORE, MIN_DOCUMENT_TEXT_CHARS, MAX_WORKERS,
+    HEDGE_ENABLED, COMPACT_ENABLED, GROK_STREAM, STREAM_IDLE_TIMEOUT, LOCAL_EXTRACTION_ENABLED, LIGHT_PROMPT,
+    DEDUP_ENABLED, NEAR_DUP_MODE, GROK_RESPONSE_FORMAT, COMPACT_MAX_TOKENS, COMPACT_DEDUPE_MIN_CHARS
+)
+from backend.grok_client import get_grok_client, raise_for_status, RequestCancelled, check_cancelled
+from backend.scheduler import get_key_scheduler
+from backend.hedging import get_hedge_policy
+from backend.cache import get_parse_cache, get_text_cache, file_sha256, ParseCache, TextCache
+from backend.journal import get_job_journal
+from backend.output_writer import StreamingExcelWriter
+from backend.result_store import row_file_name
+from backend.compaction import compact_text, PAGE_BREAK
+from backend.near_duplicates import get_near_duplicate_index, minhash
+from backend.progress import emit, emit_job_event, FILE_STARTED, FILE_EXTRACTED, FILE_PARSED, FILE_FAILED, FILE_SKIPPED
+from backend.routing import TIERS, EscalationNeeded, choose_tier, check_fast_result, get_routing_stats, routing_signature
+from backend.validation import (
+    InvalidResponseError, repair_json, validate_resume, get_schema, response_format, build_refill_prompt,
+    build_light_prompt
 )
 
 # ---- TESSERACT PATH CONFIGURATION ----
@@ -96,67 +103,136 @@ else:
 
 
 # ---- TEXT EXTRACTION ----
-def extract_pdf_text(path):
-    text = ""
+# Bump whenever extraction/OCR output changes so cached text is not reused across versions
+EXTRACTOR_VERSION = "4"
+
+def score_text_quality(text):
+    """
+    Score how much extracted text looks like a real text layer, from 0.0 (nothing/garbage) to 1.0.
+    Combines word density (20+ real words scores full) with the share of clean characters.
+    """
+    stripped = (text or "").strip()
+    if not stripped:
+        return 0.0
+    chars = [c for c in stripped if not c.isspace()]
+    clean = sum(1 for c in chars if c.isalnum() or c in ".,;:@+-()/&'\"#%|")
+    cleanliness = clean / len(chars) if chars else 0.0
+    words = re.findall(r"[^\W\d_]{2,}", stripped)
+    density = min(1.0, len(words) / 20.0)
+    return round(density * cleanliness, 3)
+
+
+def page_needs_ocr(page, page_text):
+    """A page needs OCR when its text layer scores low and it has images (or no text at all)."""
+    if score_text_quality(page_text) >= PAGE_OCR_MIN_SCORE:
+        return False
+    if not page_text.strip():
+        return True
     try:
-        doc = fitz.open(path)
-        for page in doc:
-            page_text = page.get_text("text")
-            if page_text:
-                text += page_text + "\n"
-            
-            if len(page_text.strip()) < 50:
-                blocks = page.get_text("blocks")
-                for block in blocks:
-                    if len(block) >= 5:
-                        block_text = block[4] if len(block) > 4 else ""
-                        if block_text and len(block_text.strip()) > 0:
-                            text += block_text + " "
-        
-        text = text.strip()
-    except Exception as e:
-        text = ""
-        print(f"[DEBUG] PDF extraction error: {str(e)}")
+        return len(page.get_images(full=False)) > 0
+    except Exception:
+        return False
 
-    if text.strip() == "" or len(text) < 30:
-        try:
-            text = ocr_pdf(path)
-        except Exception as e:
-            print(f"[DEBUG] OCR fallback failed: {str(e)}")
-            pass
 
-    return text
+# ---- OCR CONCURRENCY ----
+# Pages are rasterized in the calling thread (PyMuPDF documents are not thread-safe)
+# and OCR'd on a shared thread pool; Tesseract runs as a subprocess, so threads
+# give real parallelism. The pool size is the global OCR limit for this process,
+# OCR_PAGES_PER_DOC caps how many pages one document may have queued at once so
+# several scanned resumes share the cores fairly.
+_ocr_pool = None
+_ocr_pool_size = max(1, OCR_MAX_CONCURRENCY)
+_ocr_pool_lock = threading.Lock()
 
-def ocr_pdf(path):
-    """OCR PDF without poppler using PyMuPDF built-in rasterizer + tesseract."""
+
+def set_ocr_concurrency(max_concurrency):
+    """Set the global OCR concurrency for this process (must be called before the first OCR)."""
+    global _ocr_pool_size
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            _ocr_pool_size = max(1, int(max_concurrency))
+
+
+def get_ocr_pool():
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            if _ocr_pool_size > 1:
+                # Parallel pages already use the cores; stop each Tesseract process from spawning its own threads
+                os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+            _ocr_pool = ThreadPoolExecutor(max_workers=_ocr_pool_size, thread_name_prefix="OCR")
+        return _ocr_pool
+
+
+def ocr_image(img):
+    return pytesseract.image_to_string(img, lang="eng")
+
+
+def ensure_tesseract():
+    """Make sure pytesseract can find the Tesseract executable."""
+    try:
+        pytesseract.get_tesseract_version()
+    except Exception:
+        tesseract_path = find_tesseract_executable()
+        if tesseract_path:
+            pytesseract.pytesseract.tesseract_cmd = tesseract_path
+        else:
+            raise Exception("Tesseract OCR is not installed or not in PATH. Please install Tesseract from: https://github.com/UB-Mannheim/tesseract/wiki")
+
+
+def ocr_doc_pages(doc, page_numbers=None):
+    """
+    OCR selected pages (0-based; all pages if None) of an open PyMuPDF document,
+    using the built-in rasterizer + tesseract, several pages at a time.
+    Returns {page_number: text}.
+    """
     try:
         from PIL import Image
-        import io
         
-        try:
-            pytesseract.get_tesseract_version()
-        except Exception:
-            tesseract_path = find_tesseract_executable()
-            if tesseract_path:
-                pytesseract.pytesseract.tesseract_cmd = tesseract_path
-            else:
-                raise Exception("Tesseract OCR is not installed or not in PATH. Please install Tesseract from: https://github.com/UB-Mannheim/tesseract/wiki")
+        ensure_tesseract()
         
-        doc = fitz.open(path)
-        text = ""
-        for page in doc:
-            pix = page.get_pixmap(dpi=300)
-            img_bytes = pix.tobytes("png")
-            img = Image.open(io.BytesIO(img_bytes))
-            page_text = pytesseract.image_to_string(img, lang="eng")
-            text += page_text + "\n"
-        return text.strip()
+        pool = get_ocr_pool()
+        doc_slots = threading.BoundedSemaphore(max(1, OCR_PAGES_PER_DOC))
+        futures = {}
+        try:
+            if page_numbers is None:
+                page_numbers = range(doc.page_count)
+            for page_number in page_numbers:
+                doc_slots.acquire()
+                try:
+                    pix = doc[page_number].get_pixmap(dpi=300, alpha=False)
+                    img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+                    future = pool.submit(ocr_image, img)
+                except Exception:
+                    doc_slots.release()
+                    raise
+                future.add_done_callback(lambda _: doc_slots.release())
+                futures[page_number] = future
+            return {page_number: future.result() for page_number, future in futures.items()}
+        finally:
+            for future in futures.values():
+                future.cancel()
     except Exception as e:
         error_msg = str(e)
         if "tesseract" in error_msg.lower() and "not installed" in error_msg.lower():
             raise Exception(f"Tesseract OCR not found. If you have Tesseract installed, please add it to PATH or set pytesseract.pytesseract.tesseract_cmd to the executable path. Error: {error_msg}")
         raise Exception(f"OCR failed (PyMuPDF method): {error_msg}")
 
+
+def ocr_pdf_pages(path, page_numbers=None):
+    """OCR selected pages of a PDF file. Returns {page_number: text}."""
+    with fitz.open(path) as doc:
+        return ocr_doc_pages(doc, page_numbers)
+
+
+def ocr_pdf(path):
+    """OCR every page of a PDF and join the results in page order."""
+    page_texts = ocr_pdf_pages(path)
+    text = ""
+    for page_number in sorted(page_texts):
+        text += page_texts[page_number] + "\n"
+    return text.strip()
+
 def extract_docx_text(path):
     return docx2txt.process(path)
 
@@ -171,136 +247,423 @@ def extract_doc_text(path):
     print(f"[WARNING] .doc file format not supported: {os.path.basename(path)}. Please convert to .docx or .pdf format.")
     return ""
 
-def extract_text(path):
+# ---- EXTRACTION CONTROLLER ----
+def extract_pdf_document(path):
+    """
+    Extract a PDF in a single pass over one open document.
+
+    The PyMuPDF text layer is read and scored page by page; only pages that
+    need it are OCR'd, and if the whole document has almost no text every
+    page is OCR'd once. No page is ever OCR'd twice.
+    """
+    meta = {"text": "", "method": "native", "pages": 0, "pages_ocr": [], "methods_tried": [], "error": None, "ocr_error": None}
+    page_texts = []
+    try:
+        with fitz.open(path) as doc:
+            meta["pages"] = doc.page_count
+            ocr_candidates = []
+            for page in doc:
+                page_text = page.get_text("text") or ""
+                combined = page_text + "\n" if page_text else ""
+                
+                if len(page_text.strip()) < 50:
+                    blocks = page.get_text("blocks")
+                    for block in blocks:
+                        if len(block) >= 5:
+                            block_text = block[4] if len(block) > 4 else ""
+                            if block_text and len(block_text.strip()) > 0:
+                                combined += block_text + " "
+                
+                page_texts.append(combined)
+                if page_needs_ocr(page, combined):
+                    ocr_candidates.append(page.number)
+            meta["methods_tried"].append("native")
+
+            # Almost no text in the whole document: every page is a scan candidate
+            if len("".join(page_texts).strip()) < MIN_DOCUMENT_TEXT_CHARS:
+                ocr_candidates = list(range(doc.page_count))
+
+            if ocr_candidates:
+                meta["methods_tried"].append("ocr")
+                try:
+                    ocr_texts = ocr_doc_pages(doc, ocr_candidates)
+                    meta["pages_ocr"] = list(ocr_candidates)
+                    for page_number, ocr_text in ocr_texts.items():
+                        native = page_texts[page_number]
+                        if (score_text_quality(ocr_text), len(ocr_text.strip())) > (score_text_quality(native), len(native.strip())):
+                            page_texts[page_number] = ocr_text + "\n"
+                            meta.setdefault("pages_replaced", []).append(page_number)
+                except Exception as e:
+                    meta["ocr_error"] = str(e)
+                    print(f"[DEBUG] OCR failed for pages {ocr_candidates}: {str(e)}")
+    except Exception as e:
+        meta["error"] = str(e)
+        print(f"[DEBUG] PDF extraction error: {str(e)}")
+
+    replaced = len(meta.pop("pages_replaced", []))
+    if replaced and replaced == meta["pages"]:
+        meta["method"] = "ocr"
+    elif replaced:
+        meta["method"] = "mixed"
+    meta["text"] = PAGE_BREAK.join(page_texts).strip()
+    return meta
+
+
+def extract_document(path):
+    """
+    Extract text from any supported resume file.
+
+    Returns a dict with the text plus metadata: "method" (native/ocr/mixed for
+    PDFs, docx, doc, unsupported), "quality" score, "pages", "pages_ocr",
+    "methods_tried", "seconds", and "error"/"ocr_error" when something failed.
+    """
+    start = time.perf_counter()
     ext = path.lower().split(".")[-1]
     if ext == "pdf":
-        return extract_pdf_text(path)
-    elif ext == "docx":
-        return extract_docx_text(path)
-    elif ext == "doc":
-        return extract_doc_text(path)
+        meta = extract_pdf_document(path)
     else:
-        return ""
+        meta = {"text": "", "method": ext if ext in ("docx", "doc") else "unsupported", "pages": 0,
+                "pages_ocr": [], "methods_tried": [], "error": None, "ocr_error": None}
+        try:
+            if ext == "docx":
+                meta["text"] = extract_docx_text(path) or ""
+                meta["methods_tried"].append("docx")
+            elif ext == "doc":
+                meta["text"] = extract_doc_text(path)
+                meta["methods_tried"].append("doc")
+        except Exception as e:
+            meta["error"] = str(e)
+    meta["quality"] = score_text_quality(meta["text"])
+    meta["seconds"] = round(time.perf_counter() - start, 3)
+    return meta
+
+
+def extract_pdf_text(path):
+    return extract_pdf_document(path)["text"]
+
+
+def extract_text(path):
+    return extract_document(path)["text"]
 
 
 # ---- GROK API CALL ----
-def parse_with_grok(text, filename, api_key=None, prompt=None, retry_count=0):
-    """Parse resume text using Grok API with retry logic."""
-    if api_key is None:
-        api_key = GROK_API_KEY
-    
-    if prompt is None:
-        prompt = PROMPT
-    
+# The request logic - retries, repair/validation and field re-requests, local fields and
+# model tier routing - is written once, as generator "flows" that yield the I/O they need:
+# (SLEEP, seconds), (POST, payload) or (DISPATCH, tier). run_steps drives a flow with
+# blocking calls and async_engine.run_steps_async with awaitables; results are sent back
+# into the flow and errors thrown into it, so every engine shares the same orchestration.
+SLEEP = "sleep"
+POST = "post"
+DISPATCH = "dispatch"
+
+
+def run_steps(steps, handlers):
+    """Drive a request flow with blocking handlers ({op: function(arg)}) and return its result."""
+    result, error = None, None
+    while True:
+        try:
+            op, arg = steps.throw(error) if error is not None else steps.send(result)
+        except StopIteration as stop:
+            return stop.value
+        result, error = None, None
+        try:
+            result = handlers[op](arg)
+        except Exception as e:
+            error = e
+
+
+def build_grok_payload(text, prompt, model=None):
+    """Build the chat-completion request body for one resume (GROK_MODEL unless model is given)."""
     payload = {
-        "model": GROK_MODEL,
+        "model": model or GROK_MODEL,
         "messages": [
             {"role": "system", "content": prompt},
             {"role": "user", "content": text}
         ],
-        "stream": False,
+        "stream": GROK_STREAM,
         "temperature": 0
     }
+    structured = response_format(prompt)
+    if structured is not None:
+        payload["response_format"] = structured
+    return payload
 
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}"
-    }
 
-    session = requests.Session()
-    if Retry is not None:
-        retry_strategy = Retry(
-            total=MAX_RETRIES,
-            backoff_factor=RETRY_DELAY,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["POST"]
-        )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        session.mount("https://", adapter)
-        session.mount("http://", adapter)
+def parse_grok_response(result_data, filename, prompt=None):
+    """
+    Turn a chat-completion response body into a resume row.
 
-    last_exception = None
+    Malformed JSON is repaired locally and the row is checked against the prompt's
+    schema. Returns (row, failed_fields); raises InvalidResponseError if the reply
+    cannot be used at all.
+    """
+    if "choices" not in result_data or len(result_data["choices"]) == 0:
+        raise Exception(f"Unexpected API response format: {result_data}")
     
-    for attempt in range(MAX_RETRIES + 1):
-        try:
-            if attempt > 0:
-                wait_time = RETRY_DELAY * (2 ** (attempt - 1))
-                time.sleep(wait_time)
-            
-            response = session.post(
-                GROK_URL, 
-                headers=headers, 
-                json=payload, 
-                timeout=REQUEST_TIMEOUT
-            )
-            response.raise_for_status()
-            
-            result_data = response.json()
-            if "choices" not in result_data or len(result_data["choices"]) == 0:
-                raise Exception(f"Unexpected API response format: {result_data}")
-            
-            result = result_data["choices"][0]["message"]["content"]
+    result = result_data["choices"][0]["message"]["content"]
+
+    data, cut_key = repair_json(result)
+    data, failed = validate_resume(data, get_schema(prompt if prompt is not None else PROMPT), cut_key)
 
+    data = convert_experience_to_decimal(data)
+    data["Resume_File_Name"] = filename
+    return data, failed
+
+
+def merge_refill(data, failed, patch, patch_failed):
+    """Copy the re-requested fields that came back valid into data."""
+    for field in failed:
+        if field in patch and field not in patch_failed:
+            data[field] = patch[field]
+    return data
+
+
+def handle_grok_error(e, response, attempt):
+    """
+    Decide what to do with a failed Grok request.
+    Returns normally if the request should be retried, raises the final error otherwise.
+    """
+    if isinstance(e, requests.exceptions.Timeout):
+        if attempt < MAX_RETRIES:
+            return
+        raise Exception(f"Request timeout after {MAX_RETRIES + 1} attempts. The API may be slow or the resume is too large. Error: {str(e)}")
+    
+    if isinstance(e, requests.exceptions.ConnectionError):
+        if attempt < MAX_RETRIES:
+            return
+        raise Exception(f"Connection error after {MAX_RETRIES + 1} attempts. Please check your internet connection. Error: {str(e)}")
+    
+    if isinstance(e, requests.exceptions.HTTPError) and response is not None:
+        error_msg = f"HTTP {response.status_code} Error"
+        if response.status_code == 404:
+            error_msg += ": API endpoint not found. Please verify the Grok API URL is correct."
+        elif response.status_code == 401:
+            error_msg += ": Invalid API key. Please check your Grok API key."
+        elif response.status_code == 403:
             try:
-                data = json.loads(result)
+                error_data = response.json()
+                error_msg += f": API key lacks permissions. Error: {error_data}"
             except:
-                start = result.find("{")
-                end = result.rfind("}") + 1
-                data = json.loads(result[start:end])
-
-            data = convert_experience_to_decimal(data)
-            data["Resume_File_Name"] = filename
-            return data
-            
-        except requests.exceptions.Timeout as e:
-            last_exception = e
+                error_msg += ": Access forbidden. Please check your API key permissions at console.x.ai"
+        elif response.status_code == 429:
             if attempt < MAX_RETRIES:
-                continue
-            else:
-                raise Exception(f"Request timeout after {MAX_RETRIES + 1} attempts. The API may be slow or the resume is too large. Error: {str(e)}")
-        
-        except requests.exceptions.ConnectionError as e:
-            last_exception = e
-            if attempt < MAX_RETRIES:
-                continue
-            else:
-                raise Exception(f"Connection error after {MAX_RETRIES + 1} attempts. Please check your internet connection. Error: {str(e)}")
-        
-        except requests.exceptions.HTTPError as e:
-            error_msg = f"HTTP {response.status_code} Error"
-            if response.status_code == 404:
-                error_msg += ": API endpoint not found. Please verify the Grok API URL is correct."
-            elif response.status_code == 401:
-                error_msg += ": Invalid API key. Please check your Grok API key."
-            elif response.status_code == 403:
-                try:
-                    error_data = response.json()
-                    error_msg += f": API key lacks permissions. Error: {error_data}"
-                except:
-                    error_msg += ": Access forbidden. Please check your API key permissions at console.x.ai"
-            elif response.status_code == 429:
-                if attempt < MAX_RETRIES:
-                    continue
-                else:
-                    error_msg += ": Rate limit exceeded. Please wait and try again later."
-            else:
-                try:
-                    error_detail = response.json()
-                    error_msg += f": {error_detail}"
-                except:
-                    error_msg += f": {response.text}"
-            raise Exception(error_msg) from e
+                return
+            error_msg += ": Rate limit exceeded. Please wait and try again later."
+        else:
+            try:
+                error_detail = response.json()
+                error_msg += f": {error_detail}"
+            except:
+                error_msg += f": {response.text}"
+        raise Exception(error_msg) from e
+    
+    if attempt < MAX_RETRIES:
+        return
+    raise Exception(f"Request failed after {MAX_RETRIES + 1} attempts: {str(e)}")
+
+
+def decode_response(response):
+    """Raise for an error status, then return the decoded JSON body (a requests exception if it is not JSON)."""
+    raise_for_status(response)
+    try:
+        return response.json()
+    except ValueError as e:
+        # httpx raises a plain JSONDecodeError; requests raises a RequestException
+        raise requests.exceptions.InvalidJSONError(str(e), response=response) from e
+
+
+def post_payload(client, payload, cancel=None):
+    """One blocking request attempt on a GrokClient; returns the decoded response body."""
+    if payload.get("stream"):
+        result_data, _ = client.post_stream(payload, timeout=REQUEST_TIMEOUT, idle_timeout=STREAM_IDLE_TIMEOUT, cancel=cancel)
+        return result_data
+    return decode_response(client.post(payload, timeout=REQUEST_TIMEOUT))
+
+
+def blocking_io(client, cancel=None):
+    """
+    Handlers that run a flow's waits and requests on client, blocking the calling thread.
+
+    Setting cancel (a threading.Event) stops the flow with RequestCancelled at its next
+    wait or request, or mid-stream. A non-streamed request already on the wire cannot
+    be interrupted and runs to completion first.
+    """
+    def sleep(seconds):
+        if cancel is None:
+            time.sleep(seconds)
+        elif cancel.wait(seconds):
+            check_cancelled(cancel)
+
+    def post(payload):
+        check_cancelled(cancel)
+        return post_payload(client, payload, cancel)
+
+    return {SLEEP: sleep, POST: post}
+
+
+def call_steps(payload):
+    """Flow: one Grok call with retry logic; returns the decoded response body."""
+    last_exception = None
+    throttled = False
+    
+    for attempt in range(MAX_RETRIES + 1):
+        if attempt > 0 and not throttled:
+            # 429s are paced by the key's rate limiter (Retry-After / rate-limit headers), not by a blind sleep
+            yield SLEEP, RETRY_DELAY * (2 ** (attempt - 1))
         
+        try:
+            return (yield POST, payload)
         except requests.exceptions.RequestException as e:
             last_exception = e
-            if attempt < MAX_RETRIES:
-                continue
-            else:
-                raise Exception(f"Request failed after {MAX_RETRIES + 1} attempts: {str(e)}")
+            response = e.response
+            throttled = response is not None and response.status_code == 429
+            handle_grok_error(e, response, attempt)
     
     raise Exception(f"Failed after {MAX_RETRIES + 1} attempts. Last error: {str(last_exception)}")
 
 
+def call_grok(payload, api_key=None, client=None):
+    """POST a chat-completion payload with retry logic and return the decoded response body."""
+    if client is None:
+        client = get_grok_client(api_key if api_key is not None else GROK_API_KEY)
+    return run_steps(call_steps(payload), blocking_io(client))
+
+
+def parse_steps(text, filename, prompt=None, tier=None, source_text=None):
+    """
+    Flow: parse resume text with Grok.
+
+    Fields missing or invalid in the reply are re-requested on their own; the
+    whole resume is only sent again if the reply cannot be repaired at all.
+    Email/Phone/LinkedIn_URL are then filled from source_text, the uncompacted
+    document text (default: text; see apply_local_fields).
+    With a strict routing tier, any validation problem raises EscalationNeeded instead.
+    Fields apply_local_fields overwrites are neither re-requested nor escalated for.
+    """
+    if prompt is None:
+        prompt = PROMPT
+    request_prompt = model_prompt(prompt)
+    model = tier["model"] if tier else None
+    strict = bool(tier and tier["strict"])
+    
+    payload = build_grok_payload(text, request_prompt, model)
+    try:
+        data, failed = parse_grok_response((yield from call_steps(payload)), filename, request_prompt)
+    except InvalidResponseError as e:
+        if strict:
+            raise EscalationNeeded(str(e)) from e
+        print(f"[WARNING] Unusable response for {filename}, parsing again: {str(e)}")
+        data, failed = parse_grok_response((yield from call_steps(payload)), filename, request_prompt)
+
+    failed = model_failures(failed)
+    if strict:
+        check_fast_result(data, failed)
+    elif failed:
+        print(f"[INFO] Re-requesting {', '.join(failed)} for {filename}")
+        refill_prompt = build_refill_prompt(request_prompt, failed)
+        try:
+            result_data = yield from call_steps(build_grok_payload(text, refill_prompt, model))
+            patch, patch_failed = parse_grok_response(result_data, filename, refill_prompt)
+            data = merge_refill(data, failed, patch, patch_failed)
+        except RequestCancelled:
+            raise
+        except Exception as e:
+            print(f"[WARNING] Field re-request failed for {filename}, keeping first answer: {str(e)}")
+    return apply_local_fields(data, source_text if source_text is not None else text, filename, prompt)
+
+
+def parse_with_grok(text, filename, api_key=None, prompt=None, retry_count=0, client=None, tier=None, cancel=None, source_text=None):
+    """Parse resume text using Grok API with retry logic (see parse_steps), blocking the calling thread."""
+    if client is None:
+        client = get_grok_client(api_key if api_key is not None else GROK_API_KEY)
+    return run_steps(parse_steps(text, filename, prompt, tier, source_text), blocking_io(client, cancel))
+
+
+# ---- LOCAL FIELD EXTRACTION ----
+# Fields read from the text with regexes instead of trusting the model
+LOCAL_FIELDS = ("Email", "Phone", "LinkedIn_URL")
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}")
+PHONE_RE = re.compile(r"(?<![\w+])\+?(?:\(?\d{1,4}\)?[\s.-]?){2,6}\d{2,4}(?!\w)")
+LINKEDIN_RE = re.compile(r"(?:https?://)?(?:[a-z]{2,3}\.)?linkedin\.com/(?:in|pub|profile)/[A-Za-z0-9_%-]+/?", re.IGNORECASE)
+YEAR_RE = re.compile(r"(19|20)\d{2}")
+
+
+def find_phone(text):
+    """First phone-like number with 10-15 digits that is not a run of years (e.g. "2015 - 2019 2020")."""
+    for match in PHONE_RE.finditer(text):
+        candidate = match.group(0).strip()
+        digits = re.sub(r"\D", "", candidate)
+        if not 10 <= len(digits) <= 15:
+            continue
+        groups = re.findall(r"\d+", candidate)
+        if all(len(group) == 4 and YEAR_RE.fullmatch(group) for group in groups):
+            continue
+        return candidate
+    return ""
+
+
+def extract_local_fields(text):
+    """Pull Email, Phone and LinkedIn_URL out of resume text ("" when not found)."""
+    text = text or ""
+    email = EMAIL_RE.search(text)
+    linkedin = LINKEDIN_RE.search(text)
+    return {
+        "Email": email.group(0) if email else "",
+        "Phone": find_phone(text),
+        "LinkedIn_URL": linkedin.group(0).rstrip("/") if linkedin else "",
+    }
+
+
+def normalise_local_field(field, value):
+    value = str(value or "").strip().lower()
+    if field == "Phone":
+        return re.sub(r"\D", "", value)[-10:]
+    if field == "LinkedIn_URL":
+        return re.sub(r"^(?:https?://)?(?:www\.)?", "", value).rstrip("/")
+    return value
+
+
+def model_prompt(prompt):
+    """The prompt actually sent to the model: the light variant drops the locally extracted fields."""
+    if LOCAL_EXTRACTION_ENABLED and LIGHT_PROMPT:
+        return build_light_prompt(prompt, LOCAL_FIELDS)
+    return prompt
+
+
+def model_failures(failed):
+    """The failed fields worth another model call: locally extracted fields are overwritten anyway."""
+    if not LOCAL_EXTRACTION_ENABLED:
+        return failed
+    return [field for field in failed if field not in LOCAL_FIELDS]
+
+
+def apply_local_fields(data, text, filename, prompt=None):
+    """
+    Fill Email/Phone/LinkedIn_URL from the text and cross-check them with the model's values.
+
+    A value found in the text wins; the model's value is kept when the text has none.
+    Fields where both are present but disagree are listed in "Field_Mismatches".
+    Columns are kept in schema order.
+    """
+    if not LOCAL_EXTRACTION_ENABLED:
+        return data
+    local = extract_local_fields(text)
+    mismatches = []
+    for field in LOCAL_FIELDS:
+        model_value = data.get(field) or ""
+        if local[field] and model_value and normalise_local_field(field, local[field]) != normalise_local_field(field, model_value):
+            mismatches.append(field)
+            print(f"[WARNING] {filename}: {field} differs (model: {model_value!r}, text: {local[field]!r})")
+        data[field] = local[field] or model_value
+
+    schema = get_schema(prompt if prompt is not None else PROMPT)
+    row = {field: data.pop(field, default) for field, default in schema.items()}
+    row.update(data)
+    if mismatches:
+        row["Field_Mismatches"] = ", ".join(mismatches)
+    return row
+
+
 def convert_experience_to_decimal(data):
     """Convert Total_Experience_Years to a decimal number, handling date ranges."""
     import re
@@ -398,64 +761,391 @@ def convert_experience_to_decimal(data):
     return data
 
 
+# ---- EXTRACTION FOR PARSING ----
+def extract_for_parsing(path, filename, status_callback=None):
+    """
+    Run the extraction controller for one file and report what it did.
+    Returns the extraction metadata dict; "text" is None if nothing usable was extracted.
+    """
+    meta = extract_document(path)
+
+    if meta["error"] and status_callback:
+        status_callback(f"[WARNING] Text extraction error for {filename}: {meta['error']}")
+    if meta["ocr_error"] and status_callback:
+        error_msg = meta["ocr_error"]
+        if "TesseractNotFoundError" in error_msg or "tesseract" in error_msg.lower():
+            status_callback(f"[WARNING] OCR unavailable for {filename}: Tesseract OCR not found. Please install Tesseract OCR.")
+        else:
+            status_callback(f"[WARNING] OCR attempt failed for {filename}: {error_msg}")
+    if meta["pages_ocr"] and status_callback:
+        status_callback(f"[INFO] OCR'd {len(meta['pages_ocr'])}/{meta['pages']} page(s) of {filename} ({meta['method']} text, quality {meta['quality']}, {meta['seconds']}s)")
+
+    if not meta["text"].strip():
+        if status_callback:
+            status_callback(f"[WARNING] No text could be extracted from {filename}. The file may be corrupted, unreadable or an unsupported format.")
+        meta["text"] = None
+    return meta
+
+
 # ---- PARALLEL PROCESSING ----
-def process_single_file(filename, folder, api_key, prompt, status_callback):
-    """Process a single resume file and return the result."""
+# Bump whenever local field extraction or compaction change the row a parse produces under the same settings
+PARSE_VERSION = "1"
+
+
+def parse_cache_key(content_hash, prompt=None):
+    """
+    Parse-cache key of a document under the current settings: the prompt actually sent
+    (model_prompt), GROK_MODEL and, with routing, the fast model and its thresholds, plus
+    the response format, extraction, local-field and compaction settings.
+    """
+    request_prompt = model_prompt(prompt if prompt is not None else PROMPT)
+    models = f"{GROK_MODEL}|{routing_signature()}"
+    settings = (
+        f"v{PARSE_VERSION}:extractor={EXTRACTOR_VERSION}:format={GROK_RESPONSE_FORMAT}:local={LOCAL_EXTRACTION_ENABLED}:"
+        f"compact={COMPACT_ENABLED},{COMPACT_MAX_TOKENS},{COMPACT_DEDUPE_MIN_CHARS}"
+    )
+    return ParseCache.make_key(content_hash, request_prompt, models, settings)
+
+
+def prepare_single_file(filename, folder, prompt, status_callback, stats_callback=None):
+    """
+    Run everything that happens before the Grok call for one file: cache lookups and text extraction.
+
+    Returns a dict with "filename", "cache_key", "result" (the cached row on a parse-cache hit or
+    a re-used near-duplicate), "text" (the text to send to Grok, compacted with COMPACT_ENABLED;
+    None when nothing usable could be extracted), "source_text" (the text as extracted), "extraction"
+    (extract_document metadata), "content_hash", "signature" (MinHash of the text, or None) and
+    "near_duplicate" (the earlier document this one nearly duplicates, or None).
+    """
     path = os.path.join(folder, filename)
-    text = extract_text(path)
+    prepared = {
+        "filename": filename, "cache_key": None, "result": None, "text": None, "source_text": None, "extraction": None,
+        "content_hash": None, "signature": None, "near_duplicate": None
+    }
 
-    if len(text.strip()) == 0:
-        if status_callback:
-            status_callback(f"[INFO] No text extracted from {filename}. Attempting OCR (this may take a moment)...")
-        
-        if not PDF2IMAGE_AVAILABLE:
-            if status_callback:
-                status_callback(f"[ERROR] OCR not available for {filename}: pdf2image library not installed. Install with: pip install pdf2image")
-            return None
-        
+    cache = get_parse_cache()
+    text_cache = get_text_cache()
+    near_dup_index = get_near_duplicate_index()
+    content_hash = None
+    if cache is not None or text_cache is not None or near_dup_index is not None:
         try:
+            content_hash = file_sha256(path)
+        except Exception as e:
             if status_callback:
-                status_callback(f"[INFO] Converting PDF to images for OCR...")
-            ocr_text = ocr_pdf(path)
-            
-            if ocr_text and len(ocr_text.strip()) > 10:
-                text = ocr_text
-                if status_callback:
-                    status_callback(f"[SUCCESS] OCR extracted {len(ocr_text.strip())} characters from {filename}")
-            else:
-                if status_callback:
-                    status_callback(f"[WARNING] OCR did not extract sufficient text from {filename} (got {len(ocr_text.strip()) if ocr_text else 0} chars). This PDF may be corrupted or unreadable.")
-                return None
+                status_callback(f"[WARNING] Could not hash {filename} for caching: {str(e)}")
+    prepared["content_hash"] = content_hash
+
+    if cache is not None and content_hash is not None:
+        try:
+            prepared["cache_key"] = parse_cache_key(content_hash, prompt)
+            cached = cache.get(prepared["cache_key"])
         except Exception as e:
-            error_msg = str(e)
+            cached = None
             if status_callback:
-                if "poppler" in error_msg.lower() or "Unable to get page count" in error_msg:
-                    status_callback(f"[ERROR] OCR failed for {filename}: Poppler not properly configured. Error: {error_msg}")
-                    status_callback(f"[INFO] Install Poppler from: https://github.com/oschwartz10612/poppler-windows/releases/")
-                elif "TesseractNotFoundError" in error_msg or "tesseract" in error_msg.lower():
-                    status_callback(f"[ERROR] OCR failed for {filename}: Tesseract OCR not found. Please install Tesseract OCR.")
-                else:
-                    status_callback(f"[ERROR] OCR failed for {filename}: {error_msg}")
-            return None
-    
-    elif len(text.strip()) < 50:
+                status_callback(f"[WARNING] Parse cache lookup failed for {filename}: {str(e)}")
+        if cached is not None:
+            cached["Resume_File_Name"] = filename
+            prepared["result"] = cached
+            if stats_callback:
+                stats_callback("cache_hits")
+            if status_callback:
+                status_callback(f"[INFO] Cache hit for {filename}, skipping extraction and API call")
+            return prepared
+        if stats_callback:
+            stats_callback("cache_misses")
+
+    text = None
+    text_key = None
+    if text_cache is not None and content_hash is not None:
+        text_key = TextCache.make_key(content_hash, EXTRACTOR_VERSION)
+        text = text_cache.get(text_key)
+        if text is not None:
+            if stats_callback:
+                stats_callback("text_cache_hits")
+        elif stats_callback:
+            stats_callback("text_cache_misses")
+
+    if text is None:
+        meta = extract_for_parsing(path, filename, status_callback)
+        text = meta.pop("text")
+        prepared["extraction"] = meta
+        if stats_callback:
+            stats_callback(f"extraction_{meta['method']}")
+            stats_callback("extraction_seconds", meta["seconds"])
+            if meta["pages_ocr"]:
+                stats_callback("ocr_pages", len(meta["pages_ocr"]))
+        # Don't pin a degraded extraction (failed OCR or extractor) in the cache; retry it next time
+        if text is not None and text_key is not None and not (meta.get("error") or meta.get("ocr_error")):
+            text_cache.put(text_key, text)
+    else:
+        prepared["extraction"] = {"method": "cache", "quality": score_text_quality(text), "pages_ocr": [], "seconds": 0.0}
+
+    # Local fields are read from the text as extracted; compaction (and its token cap) only shapes the Grok payload
+    prepared["source_text"] = text
+    if text is not None and COMPACT_ENABLED:
+        text, compaction = compact_text(text)
+        prepared["extraction"].update(compaction)
+        if stats_callback:
+            stats_callback("tokens_in", compaction["tokens_after"])
+            stats_callback("tokens_saved", compaction["tokens_saved"])
+        if status_callback and compaction["tokens_saved"]:
+            status_callback(f"[INFO] Compacted {filename}: {compaction['tokens_before']} -> {compaction['tokens_after']} tokens ({compaction['tokens_saved']} saved)")
+
+    prepared["text"] = text
+    if text is not None and near_dup_index is not None and content_hash is not None:
+        check_near_duplicate(prepared, near_dup_index, prompt, status_callback, stats_callback)
+    return prepared
+
+
+def check_near_duplicate(prepared, index, prompt, status_callback, stats_callback=None):
+    """
+    Look the document's text up in the near-duplicate index. In "reuse" mode a match whose
+    parse result is still cached becomes prepared["result"] (no Grok call); otherwise the
+    match is kept in prepared["near_duplicate"] and flagged on the parsed row.
+    """
+    filename = prepared["filename"]
+    try:
+        prepared["signature"] = minhash(prepared["text"])
+        match = index.query(prepared["signature"], exclude_hash=prepared["content_hash"]) if prepared["signature"] is not None else None
+    except Exception as e:
         if status_callback:
-            status_callback(f"[INFO] Text extraction returned very little text ({len(text.strip())} chars) for {filename}. Attempting OCR...")
+            status_callback(f"[WARNING] Near-duplicate lookup failed for {filename}: {str(e)}")
+        return
+    if match is None:
+        return
+
+    prepared["near_duplicate"] = match
+    if stats_callback:
+        stats_callback("near_duplicates")
+    similar = f"{match['similarity']:.0%} similar"
+
+    cache = get_parse_cache()
+    if NEAR_DUP_MODE == "reuse" and cache is not None:
         try:
-            ocr_text = ocr_pdf(path)
-            if ocr_text and len(ocr_text.strip()) > len(text.strip()):
-                text = ocr_text
-                if status_callback:
-                    status_callback(f"[SUCCESS] OCR extracted better text from {filename}")
-            else:
-                if status_callback:
-                    status_callback(f"[WARNING] OCR did not improve text extraction for {filename}")
+            cached = cache.get(parse_cache_key(match["content_hash"], prompt))
+        except Exception:
+            cached = None
+        if cached is not None:
+            cached.pop("Field_Mismatches", None)
+            cached["Resume_File_Name"] = filename
+            row = apply_local_fields(cached, prepared["source_text"], filename, prompt)
+            row["Near_Duplicate_Of"] = match["filename"]
+            prepared["result"] = row
+            if stats_callback:
+                stats_callback("near_duplicate_reuses")
+            if status_callback:
+                status_callback(f"[INFO] {filename} is a near-duplicate of {match['filename']} ({similar}), re-using its parse result")
+            return
+
+    if status_callback:
+        status_callback(f"[INFO] {filename} is a near-duplicate of {match['filename']} ({similar})")
+
+
+def store_parse_result(prepared, result, status_callback):
+    """
+    Save a freshly parsed row in the parse-result cache and its text signature in the
+    near-duplicate index; a flagged near-duplicate gets its Near_Duplicate_Of column here.
+    """
+    cache = get_parse_cache()
+    if cache is not None and prepared["cache_key"] is not None:
+        try:
+            cache.put(prepared["cache_key"], result)
+        except Exception as e:
+            if status_callback:
+                status_callback(f"[WARNING] Could not cache result for {prepared['filename']}: {str(e)}")
+
+    if prepared.get("near_duplicate"):
+        result["Near_Duplicate_Of"] = prepared["near_duplicate"]["filename"]
+    index = get_near_duplicate_index()
+    if index is not None and prepared.get("signature") is not None and prepared.get("content_hash"):
+        try:
+            index.add(prepared["signature"], prepared["content_hash"], prepared["filename"])
         except Exception as e:
             if status_callback:
-                status_callback(f"[WARNING] OCR attempt failed for {filename}: {str(e)}. Using extracted text.")
+                status_callback(f"[WARNING] Could not index {prepared['filename']} for near-duplicate detection: {str(e)}")
+
+
+def record_result(job, filename, result):
+    """
+    Write a finished file's outcome to the job journal and its parsed row to the job's output
+    writer, and send the file_parsed / file_failed progress event.
+    """
+    if not job:
+        return
+    emit_job_event(job, FILE_PARSED if result else FILE_FAILED, filename)
+    journal = job.get("journal")
+    if journal is not None:
+        try:
+            journal.record_file(job["id"], filename, result)
+        except Exception as e:
+            print(f"[WARNING] Could not write {filename} to the job journal: {str(e)}")
+    writer = job.get("writer")
+    if writer is not None and result:
+        try:
+            writer.write(result, job.get("content_hashes", {}).get(filename))
+        except Exception as e:
+            print(f"[WARNING] Could not write {filename} to the output file: {str(e)}")
+
+
+def scheduled_attempt(text, filename, prompt, job, api_keys, started=None, tier=None, cancel=None, source_text=None):
+    """One Grok call on a scheduler-chosen key from api_keys. Sets started once a key is granted."""
+    with get_key_scheduler().slot(job["id"], api_keys, job["priority"]) as scheduled_key:
+        if started is not None:
+            started["api_key"] = scheduled_key
+            started["event"].set()
+        start = time.monotonic()
+        result = parse_with_grok(text, filename, api_key=scheduled_key, prompt=prompt, tier=tier, cancel=cancel, source_text=source_text)
+        get_hedge_policy().record_latency(time.monotonic() - start)
+        return result
+
+
+_hedge_pool = None
+_hedge_pool_lock = threading.Lock()
+
+
+def get_hedge_pool():
+    global _hedge_pool
+    with _hedge_pool_lock:
+        if _hedge_pool is None:
+            _hedge_pool = ThreadPoolExecutor(max_workers=2 * MAX_WORKERS, thread_name_prefix="Hedge")
+        return _hedge_pool
+
+
+def parse_hedged(text, filename, prompt, job, tier=None, source_text=None):
+    """
+    Run a Grok call with request hedging.
+
+    If the primary request is still running after the HEDGE_PERCENTILE latency of
+    recent calls, a duplicate goes out on a different API key (within the
+    HEDGE_MAX_EXTRA_RATIO budget) and the first successful response wins.
+
+    The losing request is cancelled: it stops at its next retry wait or request,
+    or mid-stream with GROK_STREAM. A non-streamed request already on the wire
+    cannot be interrupted, so until the loser has actually stopped it keeps its
+    scheduler slot and counts against the hedge budget (see HedgePolicy.try_spend).
+    """
+    policy = get_hedge_policy()
+    pool = get_hedge_pool()
+    policy.note_primary()
+
+    started = {"event": threading.Event(), "api_key": None}
+    cancels = {}
+    primary_cancel = threading.Event()
+    primary = pool.submit(scheduled_attempt, text, filename, prompt, job, job["api_keys"], started, tier, primary_cancel, source_text)
+    cancels[primary] = primary_cancel
+
+    # The hedge clock starts when the primary actually gets a key, not while it queues for a slot
+    while not started["event"].wait(0.05):
+        if primary.done():
+            return primary.result()
+
+    delay = policy.hedge_delay()
+    if delay is None:
+        return primary.result()
+    done, _ = wait([primary], timeout=delay)
+    if done:
+        return primary.result()
+
+    other_keys = [k for k in job["api_keys"] if k != started["api_key"]]
+    if not other_keys or not policy.try_spend():
+        return primary.result()
+
+    hedge_cancel = threading.Event()
+    hedge = pool.submit(scheduled_attempt, text, filename, prompt, job, other_keys, None, tier, hedge_cancel, source_text)
+    cancels[hedge] = hedge_cancel
+    pending = {primary, hedge}
+    last_error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                for other in pending:
+                    cancels[other].set()
+                    if not other.cancel():
+                        policy.note_loser()
+                        other.add_done_callback(lambda _: policy.note_loser_stopped())
+                if future is hedge:
+                    policy.note_hedge_win()
+                return future.result()
+            last_error = future.exception()
+    raise last_error
+
+
+def dispatch_parse(text, filename, prompt, job=None, api_key=None, client=None, tier=None, source_text=None):
+    """
+    Call parse_with_grok, through the global key scheduler when a job context is given.
+    job is {"id", "priority", "api_keys"}; the scheduler picks which of its keys to use.
+    With HEDGE_ENABLED and more than one key, slow calls are hedged (see parse_hedged).
+    """
+    if job is None:
+        return parse_with_grok(text, filename, api_key=api_key, prompt=prompt, client=client, tier=tier, source_text=source_text)
+    if HEDGE_ENABLED and len(job["api_keys"]) > 1:
+        return parse_hedged(text, filename, prompt, job, tier, source_text)
+    return scheduled_attempt(text, filename, prompt, job, job["api_keys"], tier=tier, source_text=source_text)
+
+
+def routed_steps(text, filename, extraction=None):
+    """
+    Flow: route one document to a model tier. Yields (DISPATCH, tier) for each parse
+    attempt (tier None when routing is off) and returns the parsed row.
+
+    With GROK_FAST_MODEL set, documents that choose_tier rates as easy go to the
+    fast model first and are escalated to GROK_MODEL only if that answer fails
+    validation. Per-tier latency and escalations go to the routing stats.
+    """
+    tier = choose_tier(text, extraction)
+    if tier is None:
+        return (yield DISPATCH, None)
+
+    stats = get_routing_stats()
+    if tier["name"] == "fast":
+        start = time.monotonic()
+        try:
+            result = yield DISPATCH, tier
+            stats.record("fast", time.monotonic() - start)
+            return result
+        except EscalationNeeded as e:
+            stats.record("fast", time.monotonic() - start, escalated=True)
+            print(f"[INFO] Escalating {filename} to {TIERS['strong']['model']}: {str(e)}")
+        tier = TIERS["strong"]
+
+    start = time.monotonic()
+    result = yield DISPATCH, tier
+    stats.record("strong", time.monotonic() - start)
+    return result
+
+
+def parse_scheduled(text, filename, prompt, job=None, api_key=None, client=None, extraction=None, source_text=None):
+    """Parse one document via dispatch_parse, routed to a model tier (see routed_steps)."""
+    dispatch = lambda tier: dispatch_parse(text, filename, prompt, job, api_key, client, tier, source_text)
+    return run_steps(routed_steps(text, filename, extraction), {DISPATCH: dispatch})
+
+
+def extraction_event_data(prepared):
+    """Fields of the file_extracted progress event for a prepare_single_file result."""
+    extraction = prepared["extraction"] or {}
+    near_duplicate = prepared.get("near_duplicate")
+    return {
+        "method": extraction.get("method", "parse_cache" if prepared["result"] is not None else None),
+        "seconds": extraction.get("seconds", 0.0),
+        "has_text": prepared["text"] is not None,
+        "reused_result": prepared["result"] is not None,
+        "near_duplicate_of": near_duplicate["filename"] if near_duplicate else None
+    }
+
+
+def process_single_file(filename, folder, api_key, prompt, status_callback, stats_callback=None, client=None, job=None):
+    """Process a single resume file and return the result."""
+    prepared = prepare_single_file(filename, folder, prompt, status_callback, stats_callback)
+    emit_job_event(job, FILE_EXTRACTED, filename, **extraction_event_data(prepared))
+    if prepared["result"] is not None:
+        return prepared["result"]
+    if prepared["text"] is None:
+        return None
 
     try:
-        result = parse_with_grok(text, filename, api_key=api_key, prompt=prompt)
+        result = parse_scheduled(prepared["text"], filename, prompt, job=job, api_key=api_key, client=client, extraction=prepared["extraction"], source_text=prepared["source_text"])
+        store_parse_result(prepared, result, status_callback)
         return result
     except Exception as e:
         if status_callback:
@@ -463,8 +1153,9 @@ def process_single_file(filename, folder, api_key, prompt, status_callback):
         return None
 
 
-def worker_thread(file_queue, result_list, folder, api_key, prompt, progress_callback, status_callback, total_files, lock):
-    """Worker thread that processes files from the queue."""
+def worker_thread(file_queue, result_list, folder, api_key, prompt, progress_callback, status_callback, total_files, lock, stats_callback=None, job=None, started=()):
+    """Worker thread that processes files from the queue (files in started already sent their file_started event)."""
+    client = get_grok_client(api_key)
     while True:
         item = file_queue.get()
         if item is None:
@@ -474,9 +1165,12 @@ def worker_thread(file_queue, result_list, folder, api_key, prompt, progress_cal
         
         if status_callback:
             status_callback(f"Processing: {filename} ({idx}/{total_files}) [Worker {threading.current_thread().name}]")
+        if filename not in started:
+            emit_job_event(job, FILE_STARTED, filename, index=idx, total=total_files)
         
+        result = None
         try:
-            result = process_single_file(filename, folder, api_key, prompt, status_callback)
+            result = process_single_file(filename, folder, api_key, prompt, status_callback, stats_callback, client=client, job=job)
             
             if result:
                 with lock:
@@ -490,14 +1184,18 @@ def worker_thread(file_queue, result_list, folder, api_key, prompt, progress_cal
             if status_callback:
                 status_callback(f"[ERROR] Failed to process {filename}: {str(e)}")
         
+        record_result(job, filename, result)
         if progress_callback:
             progress_callback(idx, total_files)
         
         file_queue.task_done()
 
 
-def process_parallel(files, folder, api_keys, prompt, progress_callback, status_callback, total_files):
-    """Process files in parallel using multiple API keys."""
+def process_parallel(files, folder, api_keys, prompt, progress_callback, status_callback, total_files, stats_callback=None, job=None, started=()):
+    """
+    Process files in parallel using multiple API keys.
+    started: files whose file_started event was already sent (e.g. by a pipeline that fell back to threads).
+    """
     file_queue = Queue()
     result_list = []
     lock = threading.Lock()
@@ -509,7 +1207,7 @@ def process_parallel(files, folder, api_keys, prompt, progress_callback, status_
     for i, api_key in enumerate(api_keys):
         thread = threading.Thread(
             target=worker_thread,
-            args=(file_queue, result_list, folder, api_key, prompt, progress_callback, status_callback, total_files, lock),
+            args=(file_queue, result_list, folder, api_key, prompt, progress_callback, status_callback, total_files, lock, stats_callback, job, started),
             name=f"Worker-{i+1}",
             daemon=True
         )
@@ -528,7 +1226,59 @@ def process_parallel(files, folder, api_keys, prompt, progress_callback, status_
 
 
 # ---- PROCESS FOLDER ----
-def process_folder(folder, output_path=None, progress_callback=None, status_callback=None, api_key=None, prompt=None, append=False):
+def hash_files(folder, filenames):
+    """SHA-256 of each file's bytes as {filename: hash}; files that cannot be read are left out."""
+    def hash_one(filename):
+        try:
+            return filename, file_sha256(os.path.join(folder, filename))
+        except OSError:
+            return filename, None
+
+    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as pool:
+        return {filename: content_hash for filename, content_hash in pool.map(hash_one, filenames) if content_hash is not None}
+
+
+def rows_not_in_output(index, rows, content_hashes):
+    """The rows whose file is not in the output's ResultIndex yet."""
+    return [row for row in rows if not index.contains(row_file_name(row), content_hashes.get(row_file_name(row)))]
+
+
+def skip_already_parsed(writer, files, previous_rows, content_hashes, status_callback=None, stats_callback=None, event_callback=None):
+    """
+    Pre-flight dedup when appending: drop files (and journaled rows of a resumed job) whose
+    name or content is already in the output, using the result store's index instead of
+    reading the workbook. Returns (files, previous_rows, skipped).
+    """
+    index = writer.load_index()
+    remaining = []
+    for f in files:
+        if index.contains(f, content_hashes.get(f)):
+            if status_callback:
+                status_callback(f"[INFO] Already parsed {f}")
+            emit(event_callback, FILE_SKIPPED, f)
+        else:
+            remaining.append(f)
+    previous_rows = rows_not_in_output(index, previous_rows, content_hashes)
+
+    skipped = len(files) - len(remaining)
+    if skipped:
+        if stats_callback:
+            stats_callback("dedup_skipped", skipped)
+        if status_callback:
+            status_callback(f"[INFO] Skipping {skipped} of {len(files)} files already in {os.path.basename(writer.output_path)}")
+    return remaining, previous_rows, skipped
+
+
+def finish_journal(journal, job_id, success, msg):
+    if journal is None:
+        return
+    try:
+        journal.set_status(job_id, "completed" if success else "failed", msg)
+    except Exception as e:
+        print(f"[WARNING] Could not update job journal: {str(e)}")
+
+
+def process_folder(folder, output_path=None, progress_callback=None, status_callback=None, api_key=None, prompt=None, append=False, stats_callback=None, job_id=None, priority=0, resume=False, event_callback=None):
     """
     Process all resumes in a folder and save to output path.
     
@@ -540,6 +1290,14 @@ def process_folder(folder, output_path=None, progress_callback=None, status_call
         api_key: Grok API key (if None, uses global GROK_API_KEY)
         prompt: Custom prompt (if None, uses global PROMPT)
         append: If True, append to existing file. If False, create new file.
+            Rows are written to the output file as files finish (see StreamingExcelWriter).
+        stats_callback: Optional function called as stats_callback(name, value=1) to count job metrics
+        job_id: Job identifier used by the global API-key scheduler and the job journal (generated if not provided)
+        priority: Scheduling priority relative to other running jobs (higher is served first)
+        resume: If True, continue journaled job job_id: only its pending/failed files are processed
+            and the rows it already parsed are written together with the new ones.
+        event_callback: Optional function called with each progress event dict (see backend/progress.py):
+            file_started, file_extracted, file_parsed, file_failed and file_skipped, with timings.
     """
     if output_path is None:
         output_path = "Parsed_Resumes.xlsx"
@@ -565,70 +1323,131 @@ def process_folder(folder, output_path=None, progress_callback=None, status_call
             status_callback(msg)
         return False, msg
     
+    job_id = job_id or str(uuid.uuid4())
+    journal = get_job_journal()
+    previous_rows = []
+    resuming = resume and journal is not None and journal.get_job(job_id) is not None
+    if resuming:
+        previous_rows = journal.finished_rows(job_id)
+        files = [f for f in journal.unfinished_files(job_id) if os.path.isfile(os.path.join(folder, f))]
+        journal.set_status(job_id, "processing")
+        if status_callback:
+            status_callback(f"[INFO] Resuming job {job_id}: {len(previous_rows)} files already parsed, {len(files)} to process")
+    
+    # Parsed rows stream into the output file as they arrive; the file on disk is always a valid workbook
+    try:
+        writer = StreamingExcelWriter(output_path, append=append, status_callback=status_callback)
+    except Exception as e:
+        msg = f"[ERROR] Failed to save output file: {str(e)}"
+        if status_callback:
+            status_callback(msg)
+        finish_journal(journal, job_id, False, msg)
+        return False, msg
+    
+    # Content hashes go into the result store with each row, so later appends can skip these files
+    content_hashes = hash_files(folder, files + [row_file_name(row) for row in previous_rows if row_file_name(row)])
+    # Journaled rows count towards this job, but the ones the interrupted run already wrote
+    # to the output it appends to are not written twice (with or without DEDUP_ENABLED)
+    unwritten_rows = previous_rows
+    skipped = 0
+    if DEDUP_ENABLED and writer.appending:
+        files, unwritten_rows, skipped = skip_already_parsed(writer, files, previous_rows, content_hashes, status_callback, stats_callback, event_callback)
+    elif previous_rows and writer.appending:
+        unwritten_rows = rows_not_in_output(writer.load_index(), previous_rows, content_hashes)
+    if journal is not None and not resuming:
+        journal.create_job(job_id, folder, output_path, append, priority, files)
+    
     total_files = len(files)
     
     api_keys_to_use = GROK_API_KEYS if GROK_API_KEYS else ([api_key] if api_key else [GROK_API_KEY])
     num_workers = min(len(api_keys_to_use), total_files)
     
-    if num_workers > 1:
-        if status_callback:
-            status_callback(f"[INFO] Using {num_workers} parallel workers for faster processing...")
-        rows = process_parallel(files, folder, api_keys_to_use, prompt, progress_callback, status_callback, total_files)
-    else:
-        for idx, f in enumerate(files, 1):
-            if progress_callback:
-                progress_callback(idx, total_files)
-            
-            if status_callback:
-                status_callback(f"Processing: {f} ({idx}/{total_files})")
-            
-            result = process_single_file(f, folder, api_keys_to_use[0] if api_keys_to_use else api_key, prompt, status_callback)
-            if result:
-                rows.append(result)
-
-    if len(rows) == 0:
-        msg = "[ERROR] No resumes were successfully parsed."
+    try:
+        for row in unwritten_rows:
+            writer.write(row, content_hashes.get(row_file_name(row)))
+    except Exception as e:
+        msg = f"[ERROR] Failed to save output file: {str(e)}"
         if status_callback:
             status_callback(msg)
+        finish_journal(journal, job_id, False, msg)
         return False, msg
     
+    # Every job's API calls go through the process-wide key scheduler (global in-flight cap, fair share)
+    job = {
+        "id": job_id, "priority": priority, "api_keys": api_keys_to_use, "journal": journal,
+        "writer": writer, "content_hashes": content_hashes, "event_callback": event_callback
+    }
+    
+    # The scheduler's global cap applies on top of each engine's own worker count
+    max_inflight = min(len(api_keys_to_use) * GROK_INFLIGHT_PER_KEY, get_key_scheduler().max_inflight)
+    
     try:
-        # If append is True and file exists, append to it
-        if append and os.path.isfile(output_path) and output_path.lower().endswith(('.xlsx', '.xls')):
+        if total_files == 0:
+            # Nothing left to parse (resumed job, or every file already in the output): only the journaled rows are written
+            pass
+        elif PROCESSING_ENGINE == "pipeline":
+            from backend.pipeline import process_pipeline
             if status_callback:
-                status_callback(f"[INFO] Appending to existing Excel file: {os.path.basename(output_path)}")
-            
-            try:
-                existing_df = pd.read_excel(output_path)
-                if status_callback:
-                    status_callback(f"[INFO] Found {len(existing_df)} existing records in file")
+                status_callback(f"[INFO] Using pipelined processing: {min(EXTRACTION_WORKERS, total_files)} extraction processes, {len(api_keys_to_use) * GROK_INFLIGHT_PER_KEY} API workers, up to {max_inflight} concurrent requests...")
+            rows = process_pipeline(files, folder, api_keys_to_use, prompt, progress_callback, status_callback, total_files, stats_callback, job)
+        elif PROCESSING_ENGINE == "async":
+            from backend.async_engine import process_async
+            if status_callback:
+                status_callback(f"[INFO] Using asyncio engine with up to {max_inflight} concurrent requests...")
+            rows = process_async(files, folder, api_keys_to_use, prompt, progress_callback, status_callback, total_files, stats_callback, job)
+        elif num_workers > 1:
+            if status_callback:
+                status_callback(f"[INFO] Using {num_workers} parallel workers for faster processing...")
+            rows = process_parallel(files, folder, api_keys_to_use, prompt, progress_callback, status_callback, total_files, stats_callback, job)
+        else:
+            for idx, f in enumerate(files, 1):
+                if progress_callback:
+                    progress_callback(idx, total_files)
                 
-                new_df = pd.DataFrame(rows)
-                combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-                combined_df.to_excel(output_path, index=False)
-                msg = f"[SUCCESS] Parsing Complete! Appended {len(rows)} new resumes to existing file. Total records: {len(combined_df)}"
-            except Exception as e:
                 if status_callback:
-                    status_callback(f"[WARNING] Could not read existing file: {str(e)}. Creating new file instead.")
-                df = pd.DataFrame(rows)
-                df.to_excel(output_path, index=False)
-                msg = f"[SUCCESS] Parsing Complete! Saved {len(rows)} resumes to {output_path}"
-        else:
-            # Create new file (either append=False or file doesn't exist)
-            if status_callback:
-                if os.path.isfile(output_path):
-                    status_callback(f"[INFO] Creating new Excel file (overwriting existing): {os.path.basename(output_path)}")
-                else:
-                    status_callback(f"[INFO] Creating new Excel file: {os.path.basename(output_path)}")
-            df = pd.DataFrame(rows)
-            df.to_excel(output_path, index=False)
-            msg = f"[SUCCESS] Parsing Complete! Saved {len(rows)} resumes to {output_path}"
-        
-        if status_callback:
-            status_callback(msg)
-        return True, msg
+                    status_callback(f"Processing: {f} ({idx}/{total_files})")
+                emit_job_event(job, FILE_STARTED, f, index=idx, total=total_files)
+                
+                result = process_single_file(f, folder, api_keys_to_use[0] if api_keys_to_use else api_key, prompt, status_callback, stats_callback, job=job)
+                record_result(job, f, result)
+                if result:
+                    rows.append(result)
+    except Exception as e:
+        # Keep what was parsed so far in the output file; the journal keeps the job resumable
+        finish_journal(journal, job_id, False, f"[ERROR] Processing failed: {str(e)}")
+        writer.close()
+        raise
+    finally:
+        get_key_scheduler().forget_job(job["id"])
+
+    rows = previous_rows + rows
+    try:
+        total_records = writer.close()
     except Exception as e:
         msg = f"[ERROR] Failed to save output file: {str(e)}"
         if status_callback:
             status_callback(msg)
+        finish_journal(journal, job_id, False, msg)
         return False, msg
+
+    if len(rows) == 0 and skipped == 0:
+        msg = "[ERROR] No resumes were successfully parsed."
+        if status_callback:
+            status_callback(msg)
+        finish_journal(journal, job_id, False, msg)
+        return False, msg
+    
+    if len(rows) == 0:
+        msg = f"[SUCCESS] Nothing new to parse: all {skipped} files are already in {os.path.basename(output_path)}. Total records: {total_records}"
+    elif writer.appending:
+        msg = f"[SUCCESS] Parsing Complete! Appended {len(rows)} new resumes to existing file. Total records: {total_records}"
+        if skipped:
+            msg += f" ({skipped} files already parsed were skipped)"
+    else:
+        msg = f"[SUCCESS] Parsing Complete! Saved {len(rows)} resumes to {output_path}"
+    if rows and not writer.exported:
+        msg += " (kept in the result store; export the Excel file with POST /api/results/export)"
+    if status_callback:
+        status_callback(msg)
+    finish_journal(journal, job_id, True, msg)
+    return True, msg
@@ -0,0 +1,293 @@
+import os
+import sys
+import threading
+import multiprocessing
+from queue import Queue, Empty
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import EXTRACTION_WORKERS, PIPELINE_QUEUE_SIZE, GROK_INFLIGHT_PER_KEY, OCR_MAX_CONCURRENCY, BATCH_ENABLED
+from backend.grok_client import get_grok_client
+from backend.parser_service import (
+    prepare_single_file, parse_scheduled, store_parse_result, record_result, set_ocr_concurrency, extraction_event_data,
+    process_parallel
+)
+from backend.progress import emit_job_event, FILE_STARTED, FILE_EXTRACTED
+from backend.batching import is_batchable, batch_fits, parse_batch_with_grok
+
+
+# ---- STAGE 1: EXTRACTION (process pool) ----
+def init_extraction_worker(ocr_concurrency):
+    """Split the OCR concurrency budget across extraction processes."""
+    set_ocr_concurrency(ocr_concurrency)
+
+
+def extract_in_subprocess(filename, folder, prompt):
+    """
+    Run prepare_single_file in an extraction worker process.
+
+    Callbacks cannot cross the process boundary, so status messages and stats
+    are collected here and replayed by the parent.
+    """
+    messages = []
+    stats = []
+    prepared = prepare_single_file(
+        filename, folder, prompt,
+        status_callback=messages.append,
+        stats_callback=lambda name, value=1: stats.append((name, value))
+    )
+    return prepared, messages, stats
+
+
+def extraction_stage(files, folder, prompt, llm_queue, status_callback, stats_callback, total_files, num_workers, job=None):
+    """
+    Feed extraction results into llm_queue.
+
+    At most num_workers * 2 documents are being extracted at once and llm_queue
+    is bounded, so when the LLM stage falls behind, put() blocks and no new
+    extraction is submitted (backpressure keeps memory flat on huge folders).
+
+    Returns (unextracted, started): the files that were never handed to llm_queue
+    because the process pool broke (e.g. a spawned worker could not import the
+    caller's unguarded main module), and the set of those already reported as started.
+    """
+    window = num_workers * 2
+    file_iter = iter(enumerate(files, 1))
+    pending = {}
+    context = multiprocessing.get_context("spawn")
+
+    ocr_concurrency = max(1, OCR_MAX_CONCURRENCY // num_workers)
+
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=context,
+                             initializer=init_extraction_worker, initargs=(ocr_concurrency,)) as pool:
+        try:
+            while True:
+                while len(pending) < window:
+                    item = next(file_iter, None)
+                    if item is None:
+                        break
+                    idx, filename = item
+                    if status_callback:
+                        status_callback(f"Processing: {filename} ({idx}/{total_files}) [Extraction]")
+                    emit_job_event(job, FILE_STARTED, filename, index=idx, total=total_files)
+                    pending[pool.submit(extract_in_subprocess, filename, folder, prompt)] = item
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    idx, filename = pending.pop(future)
+                    try:
+                        prepared, messages, stats = future.result()
+                    except BrokenProcessPool:
+                        pending[future] = (idx, filename)
+                        raise
+                    except Exception as e:
+                        llm_queue.put((idx, filename, None, f"Extraction worker failed: {str(e)}"))
+                        continue
+
+                    if status_callback:
+                        for message in messages:
+                            status_callback(message)
+                    if stats_callback:
+                        for name, value in stats:
+                            stats_callback(name, value)
+                    emit_job_event(job, FILE_EXTRACTED, filename, **extraction_event_data(prepared))
+                    llm_queue.put((idx, filename, prepared, None))
+        except BrokenProcessPool as e:
+            started = {filename for _, filename in pending.values()}
+            unextracted = [filename for _, filename in sorted(pending.values())] + [filename for _, filename in file_iter]
+            if status_callback:
+                status_callback(
+                    f"[WARNING] Extraction process pool failed ({str(e)}); processing the remaining {len(unextracted)} files with threads. "
+                    f"Scripts using PROCESSING_ENGINE=pipeline must call process_folder under if __name__ == \"__main__\":"
+                )
+            return unextracted, started
+    return [], set()
+
+# ---- STAGE 2: LLM REQUESTS (threads) ----
+def needs_llm(item):
+    """True if a queue item still has to be sent to Grok."""
+    _, _, prepared, error = item
+    return error is None and prepared["result"] is None and prepared["text"] is not None
+
+
+def parse_item(item, api_key, client, prompt, status_callback, job):
+    """Parse one queue item on its own; returns the row or None."""
+    idx, filename, prepared, error = item
+    if error is not None:
+        if status_callback:
+            status_callback(f"[ERROR] Failed to process {filename}: {error}")
+        return None
+
+    result = prepared["result"]
+    if result is None and prepared["text"] is not None:
+        try:
+            result = parse_scheduled(prepared["text"], filename, prompt, job=job, api_key=api_key, client=client, extraction=prepared["extraction"], source_text=prepared["source_text"])
+            store_parse_result(prepared, result, status_callback)
+        except Exception as e:
+            result = None
+            if status_callback:
+                status_callback(f"[ERROR] Failed to parse {filename}: {str(e)}")
+    return result
+
+
+def report_item(idx, filename, result, result_list, progress_callback, status_callback, total_files, lock, job=None):
+    if result:
+        with lock:
+            result_list.append(result)
+        if status_callback:
+            status_callback(f"[SUCCESS] Parsed {filename}")
+    else:
+        if status_callback:
+            status_callback(f"[WARNING] Skipped {filename} (extraction or parsing failed)")
+
+    record_result(job, filename, result)
+    if progress_callback:
+        progress_callback(idx, total_files)
+
+
+def gather_batch(first, llm_queue):
+    """
+    Collect short documents already waiting in llm_queue to go out with first.
+
+    Never blocks: a batch only forms when the LLM stage is behind, which is
+    exactly when saving requests helps. Returns (batch, leftover, stop) where
+    leftover is an item that did not fit (or None) and stop is True if the
+    shutdown sentinel was taken from the queue.
+    """
+    batch = [first]
+    texts = [first[2]["text"]]
+    while True:
+        try:
+            item = llm_queue.get_nowait()
+        except Empty:
+            return batch, None, False
+        llm_queue.task_done()
+        if item is None:
+            return batch, None, True
+        if needs_llm(item) and is_batchable(item[2]["text"]) and batch_fits(texts, item[2]["text"]):
+            batch.append(item)
+            texts.append(item[2]["text"])
+        else:
+            return batch, item, False
+
+
+def process_batch(batch, api_key, client, prompt, status_callback, stats_callback, job):
+    """
+    Parse a batch of short documents in one request.
+    Files the model left out of the reply (or a failed batch call) fall back to single requests.
+    Returns [(item, result)] in batch order.
+    """
+    items = [(filename, prepared["text"]) for _, filename, prepared, _ in batch]
+    source_texts = {filename: prepared["source_text"] for _, filename, prepared, _ in batch}
+    try:
+        rows = parse_batch_with_grok(items, prompt, job=job, api_key=api_key, client=client, source_texts=source_texts)
+    except Exception as e:
+        rows = {}
+        if status_callback:
+            status_callback(f"[WARNING] Batch request for {len(batch)} files failed, parsing them one by one: {str(e)}")
+
+    if stats_callback:
+        stats_callback("batch_requests")
+        stats_callback("batched_files", len(rows))
+
+    results = []
+    for item in batch:
+        _, filename, prepared, _ = item
+        row = rows.get(filename)
+        if row is not None:
+            store_parse_result(prepared, row, status_callback)
+        else:
+            if stats_callback:
+                stats_callback("batch_fallbacks")
+            row = parse_item(item, api_key, client, prompt, status_callback, job)
+        results.append((item, row))
+    return results
+
+
+def llm_worker(llm_queue, result_list, api_key, prompt, progress_callback, status_callback, total_files, lock, job=None, stats_callback=None):
+    """
+    Consume extracted documents from llm_queue and send them to Grok.
+    With BATCH_ENABLED, short documents waiting in the queue are packed into one request.
+    """
+    client = get_grok_client(api_key)
+    leftover = None
+    stop = False
+    while leftover is not None or not stop:
+        if leftover is not None:
+            item, leftover = leftover, None
+        else:
+            item = llm_queue.get()
+            llm_queue.task_done()
+            if item is None:
+                break
+
+        try:
+            if BATCH_ENABLED and needs_llm(item) and is_batchable(item[2]["text"]):
+                batch, leftover, stop = gather_batch(item, llm_queue)
+                if len(batch) > 1:
+                    for (idx, filename, _, _), result in process_batch(batch, api_key, client, prompt, status_callback, stats_callback, job):
+                        report_item(idx, filename, result, result_list, progress_callback, status_callback, total_files, lock, job)
+                    continue
+
+            idx, filename, _, _ = item
+            result = parse_item(item, api_key, client, prompt, status_callback, job)
+            report_item(idx, filename, result, result_list, progress_callback, status_callback, total_files, lock, job)
+        except Exception as e:
+            if status_callback:
+                status_callback(f"[ERROR] Failed to process {item[1]}: {str(e)}")
+            record_result(job, item[1], None)
+            if progress_callback:
+                progress_callback(item[0], total_files)
+
+
+def process_pipeline(files, folder, api_keys, prompt, progress_callback, status_callback, total_files, stats_callback=None, job=None):
+    """
+    Process files as a two-stage pipeline.
+
+    A process pool (EXTRACTION_WORKERS, default: CPU count) runs text extraction
+    and OCR outside the GIL, and feeds a bounded queue (PIPELINE_QUEUE_SIZE)
+    consumed by GROK_INFLIGHT_PER_KEY threads per API key. Extraction and API
+    calls overlap instead of alternating. With a job context, API calls go
+    through the global key scheduler. With BATCH_ENABLED, short resumes that
+    queue up are sent several per request (without model routing or hedging;
+    see parse_batch_with_grok). Same contract as process_parallel.
+
+    Extraction processes are spawned, so the calling script needs an
+    `if __name__ == "__main__":` guard. If the process pool breaks, the files it
+    did not extract are processed with process_parallel instead.
+    """
+    num_extractors = max(1, min(EXTRACTION_WORKERS, total_files))
+    llm_queue = Queue(maxsize=max(1, PIPELINE_QUEUE_SIZE))
+    result_list = []
+    lock = threading.Lock()
+
+    threads = []
+    for i, api_key in enumerate(api_keys):
+        for slot in range(max(1, GROK_INFLIGHT_PER_KEY)):
+            thread = threading.Thread(
+                target=llm_worker,
+                args=(llm_queue, result_list, api_key, prompt, progress_callback, status_callback, total_files, lock, job, stats_callback),
+                name=f"LLM-{i+1}.{slot+1}",
+                daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+
+    unextracted, started = [], set()
+    try:
+        unextracted, started = extraction_stage(files, folder, prompt, llm_queue, status_callback, stats_callback, total_files, num_extractors, job)
+    finally:
+        for _ in threads:
+            llm_queue.put(None)
+        for thread in threads:
+            thread.join()
+
+    if unextracted:
+        result_list.extend(process_parallel(unextracted, folder, api_keys, prompt, progress_callback, status_callback, total_files, stats_callback, job, started))
+    return result_list
@@ -0,0 +1,209 @@
+import time
+import threading
+from itertools import islice
+from datetime import datetime
+
+# Progress event types sent by process_folder to its event_callback
+FILE_STARTED = "file_started"
+FILE_EXTRACTED = "file_extracted"
+FILE_PARSED = "file_parsed"
+FILE_FAILED = "file_failed"
+FILE_SKIPPED = "file_skipped"
+EVENT_TYPES = (FILE_STARTED, FILE_EXTRACTED, FILE_PARSED, FILE_FAILED, FILE_SKIPPED)
+
+# File states tracked per job
+PENDING = "pending"
+PROCESSING = "processing"
+SUCCESS = "success"
+FAILED = "failed"
+SKIPPED = "skipped"
+FILE_STATES = (PENDING, PROCESSING, SUCCESS, FAILED, SKIPPED)
+
+# Largest page of files returned by JobProgress.files_page
+MAX_PAGE_SIZE = 1000
+
+
+def make_event(event_type, filename, **data):
+    """A progress event: {"type", "filename", "time", **data}."""
+    if event_type not in EVENT_TYPES:
+        raise ValueError(f"Unknown progress event type: {event_type}")
+    event = {"type": event_type, "filename": filename, "time": time.time()}
+    event.update(data)
+    return event
+
+
+def emit(event_callback, event_type, filename, **data):
+    """Send a progress event to event_callback (if any); callback errors never reach the workers."""
+    if event_callback is None:
+        return
+    try:
+        event_callback(make_event(event_type, filename, **data))
+    except Exception as e:
+        print(f"[WARNING] Progress event callback failed for {filename}: {str(e)}")
+
+
+def emit_job_event(job, event_type, filename, **data):
+    """emit() to the event_callback of a job context (the dict process_folder passes to the engines)."""
+    emit(job.get("event_callback") if job else None, event_type, filename, **data)
+
+
+class JobProgress:
+    """
+    Thread-safe progress state of one job, driven by progress events.
+
+    Each event moves one file between states and adjusts the per-state counters
+    in O(1); extraction and per-file processing times are summed as they arrive. Readers get a
+    consistent copy from snapshot(), taken under the same lock the workers update
+    through, so the state is never serialized while it is being mutated.
+
+    Every file state change gets the next sequence number ("seq"); the change log keeps
+    only the latest change per file (so it never outgrows the file list), and delta(seq)
+    returns only the files changed after it, in O(files changed). "version"
+    goes up on any change (files, message, stats, status), so pushers know when to send.
+    Files are also kept per state (in the order they entered it) for files_page().
+    """
+
+    def __init__(self, output_path, file_status):
+        self._lock = threading.Lock()
+        self.status = "processing"
+        self.output_path = output_path
+        self.file_status = dict(file_status)
+        self.counts = {state: 0 for state in FILE_STATES}
+        self._by_state = {state: {} for state in FILE_STATES}
+        for filename, state in self.file_status.items():
+            self.counts[state] = self.counts.get(state, 0) + 1
+            self._by_state.setdefault(state, {})[filename] = None
+        self.current_file = None
+        self.message = ""
+        self.stats = {"cache_hits": 0, "cache_misses": 0, "text_cache_hits": 0, "text_cache_misses": 0}
+        self.timings = {"extraction_seconds": 0.0, "processing_seconds": 0.0, "finished_files": 0}
+        self.start_time = datetime.now().isoformat()
+        self.end_time = None
+        self.version = 0
+        self._started_at = {}
+        self.seq = 0
+        # filename -> seq of its latest change, oldest first
+        self._changes = {}
+
+    def _move(self, filename, state):
+        old_state = self.file_status.get(filename)
+        if old_state == state:
+            return
+        if old_state is not None:
+            self.counts[old_state] -= 1
+            self._by_state[old_state].pop(filename, None)
+        self.file_status[filename] = state
+        self.counts[state] = self.counts.get(state, 0) + 1
+        self._by_state.setdefault(state, {})[filename] = None
+        self.seq += 1
+        self._changes.pop(filename, None)
+        self._changes[filename] = self.seq
+
+    def apply(self, event):
+        """Update the state from one progress event."""
+        event_type = event["type"]
+        filename = event["filename"]
+        with self._lock:
+            self.version += 1
+            state = self.file_status.get(filename)
+            if event_type == FILE_STARTED:
+                if state in (None, PENDING):
+                    self._move(filename, PROCESSING)
+                self.current_file = filename
+                self._started_at[filename] = event["time"]
+            elif event_type == FILE_EXTRACTED:
+                self.timings["extraction_seconds"] += event.get("seconds") or 0.0
+            elif event_type in (FILE_PARSED, FILE_FAILED):
+                if event_type == FILE_PARSED:
+                    self._move(filename, SUCCESS)
+                elif state in (None, PENDING, PROCESSING):
+                    self._move(filename, FAILED)
+                started = self._started_at.pop(filename, None)
+                if started is not None:
+                    self.timings["processing_seconds"] += event["time"] - started
+                    self.timings["finished_files"] += 1
+            elif event_type == FILE_SKIPPED:
+                if state in (None, PENDING):
+                    self._move(filename, SKIPPED)
+
+    def set_message(self, message):
+        with self._lock:
+            self.version += 1
+            self.message = message
+
+    def add_stat(self, name, value=1):
+        with self._lock:
+            self.version += 1
+            self.stats[name] = self.stats.get(name, 0) + value
+
+    def finish(self):
+        with self._lock:
+            self.version += 1
+            self.status = "completed"
+            self.end_time = datetime.now().isoformat()
+            self.current_file = None
+
+    def _summary(self):
+        return {
+            "status": self.status,
+            "seq": self.seq,
+            "version": self.version,
+            "total_files": len(self.file_status),
+            "processed_files": self.counts[SUCCESS],
+            "failed_files": self.counts[FAILED],
+            "skipped_files": self.counts[SKIPPED],
+            "counts": dict(self.counts),
+            "current_file": self.current_file,
+            "message": self.message,
+            "output_path": self.output_path,
+            "stats": dict(self.stats),
+            "timings": dict(self.timings),
+            "start_time": self.start_time,
+            "end_time": self.end_time
+        }
+
+    def summary(self):
+        """Counters, message and timings without the per-file state (O(1) in the number of files)."""
+        with self._lock:
+            return self._summary()
+
+    def snapshot(self):
+        """A consistent copy of the state, in the /api/progress response format."""
+        with self._lock:
+            state = self._summary()
+            state["file_status"] = dict(self.file_status)
+            return state
+
+    def delta(self, since):
+        """Counters plus the current state of the files changed after change number since (O(files changed))."""
+        with self._lock:
+            state = self._summary()
+            changed = []
+            for filename, seq in reversed(self._changes.items()):
+                if seq <= since:
+                    break
+                changed.append(filename)
+            state["files"] = {filename: self.file_status[filename] for filename in reversed(changed)}
+            return state
+
+    def files_page(self, status=None, limit=100, offset=0):
+        """
+        Counters plus one page of files ("files": {filename: state}), optionally only those in
+        one state; "matched" is the number of files the page is taken from. O(offset + limit).
+        """
+        if status is not None and status not in FILE_STATES:
+            raise ValueError(f"Unknown file state: {status}")
+        limit = max(0, min(limit, MAX_PAGE_SIZE))
+        offset = max(0, offset)
+        with self._lock:
+            state = self._summary()
+            if status is None:
+                names = self.file_status
+                state["matched"] = len(self.file_status)
+            else:
+                names = self._by_state[status]
+                state["matched"] = self.counts[status]
+            state["files"] = {filename: self.file_status[filename] for filename in islice(names, offset, offset + limit)}
+            state["offset"] = offset
+            state["limit"] = limit
+            return state
@@ -0,0 +1,203 @@
+import os
+import sys
+import re
+import time
+import asyncio
+import threading
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import (
+    RETRY_DELAY, GROK_RATE_LIMIT_RPS, GROK_INFLIGHT_PER_KEY, RATE_LIMIT_MIN_CONCURRENCY
+)
+
+# Poll interval while waiting for a free concurrency slot
+SLOT_WAIT_SECONDS = 0.05
+# Healthy responses it takes the request rate to climb from zero back to its ceiling
+RATE_RECOVERY_RESPONSES = 20
+
+
+def parse_duration(value):
+    """
+    Parse a rate-limit reset/Retry-After value into seconds.
+    Accepts plain seconds ("2", "0.5") and Go-style durations ("1s", "6m0s", "20ms").
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    total = 0.0
+    matched = False
+    for amount, unit in re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value):
+        matched = True
+        amount = float(amount)
+        total += {"ms": amount / 1000.0, "s": amount, "m": amount * 60.0, "h": amount * 3600.0}[unit]
+    return total if matched else None
+
+
+class KeyRateLimiter:
+    """
+    Adaptive limiter for one API key: token bucket + AIMD concurrency window.
+
+    - The token bucket paces request starts. Its rate comes from GROK_RATE_LIMIT_RPS
+      (0 = unknown/unlimited) and is re-derived from x-ratelimit-limit/reset-requests
+      response headers when the API sends them.
+    - x-ratelimit-remaining-requests == 0 and Retry-After / 429 responses block the
+      key until the advertised reset instead of retrying blindly.
+    - The concurrency window halves on throttling and grows by ~1 request per
+      window of successful, healthy-latency responses (AIMD), between
+      RATE_LIMIT_MIN_CONCURRENCY and max_concurrency.
+    - The request rate halves on throttling too and climbs back additively on
+      healthy responses, up to max_rate (the configured or header-derived rate).
+    """
+
+    def __init__(self, rate=GROK_RATE_LIMIT_RPS, max_concurrency=GROK_INFLIGHT_PER_KEY, min_concurrency=RATE_LIMIT_MIN_CONCURRENCY):
+        self._lock = threading.Lock()
+        self.rate = float(rate) if rate and rate > 0 else None
+        self.max_rate = self.rate
+        self.burst = max(1.0, self.rate) if self.rate else 1.0
+        self.tokens = self.burst
+        self.last_refill = time.monotonic()
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.concurrency = float(self.max_concurrency)
+        self.inflight = 0
+        self.blocked_until = 0.0
+        self.consecutive_throttles = 0
+        self.latency_ewma = None
+        self.latency_floor = None
+        self.throttled_count = 0
+
+    # ---- acquiring a request slot ----
+    def _refill(self, now):
+        if self.rate is None:
+            return
+        self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def reserve(self):
+        """Take a request slot if one is free now; otherwise return how many seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                return self.blocked_until - now
+            if self.inflight >= max(1, int(self.concurrency)):
+                return SLOT_WAIT_SECONDS
+            self._refill(now)
+            if self.rate is not None and self.tokens < 1.0:
+                return (1.0 - self.tokens) / self.rate
+            if self.rate is not None:
+                self.tokens -= 1.0
+            self.inflight += 1
+            return 0.0
+
+    def acquire(self):
+        """Block the calling thread until a request may be sent on this key."""
+        while True:
+            wait = self.reserve()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """asyncio version of acquire()."""
+        while True:
+            wait = self.reserve()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    # ---- feedback from the response ----
+    def release(self, status_code=None, headers=None, latency=None):
+        """
+        Return the slot taken by reserve() and adapt to the response.
+        status_code is None when the request failed before a response arrived.
+        """
+        with self._lock:
+            self.inflight = max(0, self.inflight - 1)
+            now = time.monotonic()
+            if headers is not None:
+                self._apply_headers(headers, now)
+
+            if status_code == 429:
+                self._on_throttle(headers, now)
+            elif status_code is not None and status_code < 400:
+                self.consecutive_throttles = 0
+                self._on_success(latency)
+
+    def _apply_headers(self, headers, now):
+        limit = headers.get("x-ratelimit-limit-requests")
+        reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+        remaining = headers.get("x-ratelimit-remaining-requests")
+        try:
+            if limit is not None and reset:
+                # The window resets in `reset` seconds; pace to the advertised limit over that window
+                window_rate = float(limit) / max(reset, 1.0)
+                self.max_rate = window_rate
+                self.rate = window_rate if self.rate is None else min(max(self.rate, window_rate * 0.5), window_rate)
+                self.burst = max(1.0, min(float(limit), self.rate))
+            if remaining is not None and float(remaining) <= 0 and reset:
+                self.blocked_until = max(self.blocked_until, now + reset)
+        except (TypeError, ValueError):
+            pass
+
+    def _on_throttle(self, headers, now):
+        self.throttled_count += 1
+        self.consecutive_throttles += 1
+        retry_after = parse_duration(headers.get("retry-after")) if headers is not None else None
+        if retry_after is None:
+            retry_after = RETRY_DELAY * (2 ** (self.consecutive_throttles - 1))
+        self.blocked_until = max(self.blocked_until, now + retry_after)
+        # Multiplicative decrease
+        self.concurrency = max(float(self.min_concurrency), self.concurrency / 2.0)
+        if self.rate is not None:
+            self.rate = max(0.05, self.rate / 2.0)
+            self.tokens = min(self.tokens, 0.0)
+
+    def _on_success(self, latency):
+        if latency is not None:
+            self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+            self.latency_floor = latency if self.latency_floor is None else min(self.latency_floor, latency)
+            if self.latency_ewma > 2.0 * self.latency_floor:
+                # Latency is degrading: hold the window where it is
+                return
+        # Additive increase: about +1 per window's worth of successful responses
+        self.concurrency = min(float(self.max_concurrency), self.concurrency + 1.0 / max(1.0, self.concurrency))
+        if self.rate is not None and self.max_rate is not None and self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / RATE_RECOVERY_RESPONSES)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "max_rate": self.max_rate,
+                "concurrency": round(self.concurrency, 2),
+                "inflight": self.inflight,
+                "throttled": self.throttled_count,
+                "blocked_for": round(max(0.0, self.blocked_until - time.monotonic()), 2),
+                "latency_ewma": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            }
+
+
+# ---- LIMITER REGISTRY ----
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(api_key):
+    """Return the process-wide KeyRateLimiter for api_key."""
+    limiter = _limiters.get(api_key)
+    if limiter is not None:
+        return limiter
+    with _limiters_lock:
+        limiter = _limiters.get(api_key)
+        if limiter is None:
+            limiter = KeyRateLimiter()
+            _limiters[api_key] = limiter
+        return limiter
@@ -0,0 +1,287 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import RESULT_STORE_ENABLED, RESULT_STORE_PATH
+
+# Rows fetched per round trip when streaming an output's rows
+FETCH_SIZE = 1000
+
+
+def output_key(output_path):
+    """Key of an output file in the store (normalised absolute path)."""
+    return os.path.normcase(os.path.abspath(output_path))
+
+
+def file_stamp(path):
+    """(mtime_ns, size) of a file, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def row_file_name(row):
+    """The source file name of a parsed row, or None."""
+    name = row.get("Resume_File_Name")
+    if name is None:
+        return None
+    name = str(name).strip()
+    return name or None
+
+
+class ResultIndex:
+    """
+    File names and content hashes of an output's stored rows, for O(1) already-parsed checks.
+
+    A file counts as parsed if its content is stored under any name, or its name is stored
+    with the same content. Rows imported from a workbook have no hash, so a matching name is
+    enough for them. A stored name whose content changed is not parsed.
+    """
+
+    def __init__(self):
+        self.names = {}
+        self.hashes = set()
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, file_name, content_hash):
+        if file_name:
+            # The latest row for a name decides whether it is up to date
+            self.names[file_name] = content_hash
+        if content_hash:
+            self.hashes.add(content_hash)
+
+    def contains(self, file_name, content_hash):
+        if content_hash and content_hash in self.hashes:
+            return True
+        if file_name not in self.names:
+            return False
+        stored_hash = self.names[file_name]
+        return stored_hash is None or content_hash is None or stored_hash == content_hash
+
+
+class ResultStore:
+    """
+    Append-only SQLite (WAL) master store of parsed rows, one row set per output file.
+
+    Appending costs O(new rows): rows are inserted, never re-read. The .xlsx at
+    output_path is an export view of its row set (see output_writer.export_results);
+    the stamp of the last export tells whether the file on disk still matches the
+    store or was changed by hand and has to be imported again. export_skipped records
+    that the export was left out on purpose (the output grew past
+    OUTPUT_AUTO_EXPORT_MAX_ROWS), so a missing file then means "not exported yet"
+    rather than "deleted".
+    """
+
+    def __init__(self, db_path=RESULT_STORE_PATH):
+        self.db_path = str(db_path)
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS outputs (
+                output_key TEXT PRIMARY KEY,
+                output_path TEXT NOT NULL,
+                columns TEXT NOT NULL,
+                row_count INTEGER NOT NULL,
+                exported_mtime_ns INTEGER,
+                exported_size INTEGER,
+                updated_at REAL NOT NULL,
+                export_skipped INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS result_rows (
+                output_key TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                file_name TEXT,
+                content_hash TEXT,
+                PRIMARY KEY (output_key, seq)
+            )
+            """
+        )
+        # Stores created before rows carried their file name and content hash
+        row_columns = {row[1] for row in self._conn.execute("PRAGMA table_info(result_rows)")}
+        for column in ("file_name", "content_hash"):
+            if column not in row_columns:
+                self._conn.execute(f"ALTER TABLE result_rows ADD COLUMN {column} TEXT")
+        # ... and before outputs recorded a skipped export
+        output_columns = {row[1] for row in self._conn.execute("PRAGMA table_info(outputs)")}
+        if "export_skipped" not in output_columns:
+            self._conn.execute("ALTER TABLE outputs ADD COLUMN export_skipped INTEGER NOT NULL DEFAULT 0")
+        self._conn.commit()
+        # Column lists are small and read on every append; keep them in memory
+        self._columns = {}
+
+    def _load_columns(self, key):
+        if key not in self._columns:
+            row = self._conn.execute("SELECT columns FROM outputs WHERE output_key = ?", (key,)).fetchone()
+            self._columns[key] = json.loads(row[0]) if row else None
+        return self._columns[key]
+
+    # ---- outputs ----
+    def reset(self, output_path):
+        """Start output_path over with no rows."""
+        key = output_key(output_path)
+        with self._lock:
+            self._conn.execute("DELETE FROM result_rows WHERE output_key = ?", (key,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO outputs (output_key, output_path, columns, row_count, exported_mtime_ns, exported_size, updated_at, export_skipped) "
+                "VALUES (?, ?, '[]', 0, NULL, NULL, ?, 0)",
+                (key, output_path, time.time())
+            )
+            self._conn.commit()
+            self._columns[key] = []
+
+    def get_output(self, output_path):
+        """Return an output's path, columns, row count and export_skipped flag, or None if the store has no rows for it."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT output_path, columns, row_count, updated_at, export_skipped FROM outputs WHERE output_key = ?",
+                (output_key(output_path),)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "output_path": row[0], "columns": json.loads(row[1]), "row_count": row[2], "updated_at": row[3],
+            "export_skipped": bool(row[4])
+        }
+
+    def in_sync(self, output_path):
+        """True if the file at output_path is unchanged since the store last exported it."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT exported_mtime_ns, exported_size FROM outputs WHERE output_key = ?", (output_key(output_path),)
+            ).fetchone()
+        return row is not None and row[0] is not None and file_stamp(output_path) == (row[0], row[1])
+
+    def mark_exported(self, output_path):
+        """Remember the stamp of the file just exported to output_path (clears export_skipped)."""
+        stamp = file_stamp(output_path)
+        if stamp is None:
+            return
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outputs SET exported_mtime_ns = ?, exported_size = ?, export_skipped = 0 WHERE output_key = ?",
+                (stamp[0], stamp[1], output_key(output_path))
+            )
+            self._conn.commit()
+
+    def mark_export_skipped(self, output_path):
+        """Record that output_path's rows were deliberately not exported (too many to re-export)."""
+        with self._lock:
+            self._conn.execute("UPDATE outputs SET export_skipped = 1 WHERE output_key = ?", (output_key(output_path),))
+            self._conn.commit()
+
+    # ---- rows ----
+    def append_rows(self, output_path, rows, content_hashes=None):
+        """
+        Append rows to output_path's row set. content_hashes (one per row, or None) are the
+        SHA-256 of each row's source file, used by load_index. Returns the new row count.
+        """
+        key = output_key(output_path)
+        if content_hashes is None:
+            content_hashes = [None] * len(rows)
+        with self._lock:
+            columns = self._load_columns(key)
+            if columns is None:
+                raise KeyError(f"Output not in result store (reset it first): {output_path}")
+            known = set(columns)
+            added = False
+            for row in rows:
+                for name in row:
+                    if name not in known:
+                        known.add(name)
+                        columns.append(name)
+                        added = True
+
+            (count,) = self._conn.execute("SELECT row_count FROM outputs WHERE output_key = ?", (key,)).fetchone()
+            self._conn.executemany(
+                "INSERT INTO result_rows (output_key, seq, data, file_name, content_hash) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (key, count + i, json.dumps(row, ensure_ascii=False, default=str), row_file_name(row), content_hash)
+                    for i, (row, content_hash) in enumerate(zip(rows, content_hashes))
+                ]
+            )
+            count += len(rows)
+            if added:
+                self._conn.execute(
+                    "UPDATE outputs SET row_count = ?, columns = ?, updated_at = ? WHERE output_key = ?",
+                    (count, json.dumps(columns, ensure_ascii=False), time.time(), key)
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE outputs SET row_count = ?, updated_at = ? WHERE output_key = ?", (count, time.time(), key)
+                )
+            self._conn.commit()
+            return count
+
+    def load_index(self, output_path):
+        """Build the ResultIndex of output_path's rows in one pass (row data is not read)."""
+        index = ResultIndex()
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT file_name, content_hash FROM result_rows WHERE output_key = ? ORDER BY seq", (output_key(output_path),)
+            )
+            while True:
+                batch = cursor.fetchmany(FETCH_SIZE)
+                if not batch:
+                    break
+                for file_name, content_hash in batch:
+                    index.add(file_name, content_hash)
+        return index
+
+    def iter_rows(self, output_path):
+        """Yield output_path's rows in insertion order, FETCH_SIZE at a time."""
+        key = output_key(output_path)
+        last_seq = -1
+        while True:
+            with self._lock:
+                batch = self._conn.execute(
+                    "SELECT seq, data FROM result_rows WHERE output_key = ? AND seq > ? ORDER BY seq LIMIT ?",
+                    (key, last_seq, FETCH_SIZE)
+                ).fetchall()
+            if not batch:
+                return
+            for seq, data in batch:
+                yield json.loads(data)
+            last_seq = batch[-1][0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_result_store():
+    """Return the process-wide ResultStore, or None if the store is disabled or unavailable."""
+    global _store
+    if not RESULT_STORE_ENABLED:
+        return None
+    with _store_lock:
+        if _store is None:
+            try:
+                _store = ResultStore()
+            except Exception as e:
+                print(f"[WARNING] Result store unavailable: {str(e)}")
+                return None
+        return _store
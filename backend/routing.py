@@ -0,0 +1,105 @@
+import os
+import sys
+import math
+import threading
+from collections import deque
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import (
+    GROK_MODEL, GROK_FAST_MODEL, ROUTING_FAST_MAX_TOKENS, ROUTING_MIN_QUALITY, ROUTING_FAST_OCR,
+    ROUTING_REQUIRED_FIELDS
+)
+from backend.compaction import estimate_tokens
+
+# "strict" tiers do not re-request failed fields: any validation problem escalates instead
+TIERS = {
+    "fast": {"name": "fast", "model": GROK_FAST_MODEL, "strict": True},
+    "strong": {"name": "strong", "model": GROK_MODEL, "strict": False},
+}
+ROUTING_ENABLED = bool(GROK_FAST_MODEL) and GROK_FAST_MODEL != GROK_MODEL
+
+
+def routing_signature():
+    """The routing settings that decide which model answers a document ("" when routing is off)."""
+    if not ROUTING_ENABLED:
+        return ""
+    return f"{GROK_FAST_MODEL}:{ROUTING_FAST_MAX_TOKENS}:{ROUTING_MIN_QUALITY}:{ROUTING_FAST_OCR}:{','.join(ROUTING_REQUIRED_FIELDS)}"
+
+
+class EscalationNeeded(Exception):
+    """The fast model's answer did not pass validation; the document goes to the strong model."""
+
+
+def choose_tier(text, extraction=None):
+    """
+    Pick the model tier for a document: "fast" for short, clean, text-layer documents,
+    "strong" for long ones, OCR'd ones (unless ROUTING_FAST_OCR) and low-quality text.
+    Returns None when routing is disabled (GROK_FAST_MODEL not set).
+    """
+    if not ROUTING_ENABLED:
+        return None
+    if estimate_tokens(text) > ROUTING_FAST_MAX_TOKENS:
+        return TIERS["strong"]
+    if extraction:
+        if extraction.get("pages_ocr") and not ROUTING_FAST_OCR:
+            return TIERS["strong"]
+        quality = extraction.get("quality")
+        if quality is not None and quality < ROUTING_MIN_QUALITY:
+            return TIERS["strong"]
+    return TIERS["fast"]
+
+
+def check_fast_result(data, failed):
+    """Raise EscalationNeeded if validation failed or a required field came back empty."""
+    if failed:
+        raise EscalationNeeded(f"invalid fields: {', '.join(failed)}")
+    empty = [field for field in ROUTING_REQUIRED_FIELDS if data.get(field) in (None, "")]
+    if empty:
+        raise EscalationNeeded(f"empty required fields: {', '.join(empty)}")
+
+
+class RoutingStats:
+    """Per-tier request counts, latency window and escalation rate."""
+
+    def __init__(self, window=500):
+        self._lock = threading.Lock()
+        self._window = window
+        self.tiers = {}
+
+    def record(self, tier, latency, escalated=False):
+        with self._lock:
+            stats = self.tiers.setdefault(tier, {"requests": 0, "escalated": 0, "latencies": deque(maxlen=self._window)})
+            stats["requests"] += 1
+            if escalated:
+                stats["escalated"] += 1
+            stats["latencies"].append(latency)
+
+    def snapshot(self):
+        with self._lock:
+            snapshot = {"enabled": ROUTING_ENABLED, "fast_model": GROK_FAST_MODEL or None, "strong_model": GROK_MODEL}
+            for tier, stats in self.tiers.items():
+                ordered = sorted(stats["latencies"])
+                p95 = ordered[min(len(ordered) - 1, max(0, math.ceil(0.95 * len(ordered)) - 1))] if ordered else None
+                snapshot[tier] = {
+                    "requests": stats["requests"],
+                    "escalated": stats["escalated"],
+                    "escalation_rate": round(stats["escalated"] / stats["requests"], 3) if stats["requests"] else 0.0,
+                    "latency_avg": round(sum(ordered) / len(ordered), 3) if ordered else None,
+                    "latency_p95": round(p95, 3) if p95 is not None else None,
+                }
+            return snapshot
+
+
+_stats = None
+_stats_lock = threading.Lock()
+
+
+def get_routing_stats():
+    """Return the process-wide RoutingStats."""
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = RoutingStats()
+        return _stats
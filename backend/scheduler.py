@@ -0,0 +1,180 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import MAX_WORKERS
+from backend.rate_limiter import get_rate_limiter
+
+
+class _Waiter:
+    """A request waiting for a slot. Granted either to a thread (Event) or to an asyncio future."""
+
+    def __init__(self, api_keys, loop=None):
+        self.api_keys = list(api_keys)
+        self.api_key = None
+        self._loop = loop
+        if loop is None:
+            self._event = threading.Event()
+        else:
+            self._future = loop.create_future()
+
+    def grant(self, api_key):
+        self.api_key = api_key
+        if self._loop is None:
+            self._event.set()
+        else:
+            self._loop.call_soon_threadsafe(self._set_future, api_key)
+
+    def _set_future(self, api_key):
+        if not self._future.done():
+            self._future.set_result(api_key)
+
+
+class KeyScheduler:
+    """
+    Process-wide scheduler for Grok requests across all running jobs.
+
+    - At most max_inflight requests are in flight in the whole process (MAX_WORKERS),
+      however many jobs are running.
+    - Free slots go to the highest-priority job with waiting requests; jobs of equal
+      priority take turns (round-robin fair share), so a big job cannot starve a small one.
+    - Each granted request gets the least-loaded API key, ties broken by EWMA latency;
+      keys currently blocked by their rate limiter are only used if every key is blocked.
+    """
+
+    def __init__(self, max_inflight=MAX_WORKERS):
+        self.max_inflight = max(1, max_inflight)
+        self._lock = threading.Lock()
+        self.inflight = 0
+        self.key_inflight = {}
+        self.key_latency = {}
+        self.waiting = {}
+        self.job_priority = {}
+        self.last_served = {}
+        self._tick = 0
+
+    # ---- granting slots ----
+    def _pick_key(self, api_keys):
+        now = time.monotonic()
+
+        def load(api_key):
+            blocked = get_rate_limiter(api_key).blocked_until > now
+            return (blocked, self.key_inflight.get(api_key, 0), self.key_latency.get(api_key, 0.0))
+
+        return min(api_keys, key=load)
+
+    def _dispatch(self):
+        """Grant free slots to waiting requests. Caller holds the lock."""
+        while self.inflight < self.max_inflight:
+            jobs = [job_id for job_id, queue in self.waiting.items() if queue]
+            if not jobs:
+                return
+            job_id = min(jobs, key=lambda j: (-self.job_priority.get(j, 0), self.last_served.get(j, -1)))
+            waiter = self.waiting[job_id].popleft()
+            api_key = self._pick_key(waiter.api_keys)
+            self.inflight += 1
+            self.key_inflight[api_key] = self.key_inflight.get(api_key, 0) + 1
+            self._tick += 1
+            self.last_served[job_id] = self._tick
+            waiter.grant(api_key)
+
+    def _enqueue(self, job_id, priority, waiter):
+        with self._lock:
+            self.job_priority[job_id] = priority
+            self.waiting.setdefault(job_id, deque()).append(waiter)
+            self._dispatch()
+
+    def acquire(self, job_id, api_keys, priority=0):
+        """Block until this job may send a request; returns the API key to use."""
+        waiter = _Waiter(api_keys)
+        self._enqueue(job_id, priority, waiter)
+        waiter._event.wait()
+        return waiter.api_key
+
+    async def acquire_async(self, job_id, api_keys, priority=0):
+        """asyncio version of acquire()."""
+        waiter = _Waiter(api_keys, loop=asyncio.get_running_loop())
+        self._enqueue(job_id, priority, waiter)
+        try:
+            return await waiter._future
+        except asyncio.CancelledError:
+            with self._lock:
+                queue = self.waiting.get(job_id)
+                if queue is not None and waiter in queue:
+                    queue.remove(waiter)
+                    raise
+            # The slot was granted just before cancellation: hand it back
+            if waiter.api_key is not None:
+                self.release(waiter.api_key)
+            raise
+
+    def release(self, api_key, latency=None):
+        """Return a slot and record the request's latency for key selection."""
+        with self._lock:
+            self.inflight = max(0, self.inflight - 1)
+            self.key_inflight[api_key] = max(0, self.key_inflight.get(api_key, 0) - 1)
+            if latency is not None:
+                previous = self.key_latency.get(api_key)
+                self.key_latency[api_key] = latency if previous is None else 0.8 * previous + 0.2 * latency
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, job_id, api_keys, priority=0):
+        api_key = self.acquire(job_id, api_keys, priority)
+        start = time.monotonic()
+        try:
+            yield api_key
+        finally:
+            self.release(api_key, time.monotonic() - start)
+
+    @asynccontextmanager
+    async def async_slot(self, job_id, api_keys, priority=0):
+        api_key = await self.acquire_async(job_id, api_keys, priority)
+        start = time.monotonic()
+        try:
+            yield api_key
+        finally:
+            self.release(api_key, time.monotonic() - start)
+
+    def forget_job(self, job_id):
+        """Drop bookkeeping for a finished job."""
+        with self._lock:
+            if not self.waiting.get(job_id):
+                self.waiting.pop(job_id, None)
+                self.job_priority.pop(job_id, None)
+                self.last_served.pop(job_id, None)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "max_inflight": self.max_inflight,
+                "inflight": self.inflight,
+                "keys": {
+                    f"key-{i+1}": {
+                        "inflight": self.key_inflight.get(api_key, 0),
+                        "latency_ewma": round(self.key_latency[api_key], 3) if api_key in self.key_latency else None,
+                    }
+                    for i, api_key in enumerate(self.key_inflight)
+                },
+                "waiting": {job_id: len(queue) for job_id, queue in self.waiting.items() if queue},
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_key_scheduler():
+    """Return the process-wide KeyScheduler shared by all jobs."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = KeyScheduler()
+        return _scheduler
@@ -0,0 +1,169 @@
+import os
+import sys
+import json
+import math
+import time
+import threading
+from collections import deque
+import requests
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import STREAM_MAX_PREAMBLE_CHARS, STREAM_MAX_OUTPUT_CHARS, STREAM_STATS_WINDOW
+
+CLOSERS = {"{": "}", "[": "]"}
+
+
+class MalformedStreamError(requests.exceptions.RequestException):
+    """
+    The streamed completion is clearly not going to be valid JSON. The stream is closed and the
+    request is retried by the normal retry loop, on the same API key and scheduler slot.
+    """
+
+
+class StreamingJSONMonitor:
+    """
+    Follows a streamed completion and checks its JSON structure as tokens arrive.
+
+    Text before the first "{" / "[" (e.g. a ```json fence) is tolerated up to
+    max_preamble characters. Brackets are matched outside of strings; a
+    mismatched closer, too long a preamble or an output longer than max_output
+    raises MalformedStreamError. Once the top-level value closes, complete is
+    set and the caller can stop reading the stream.
+    """
+
+    def __init__(self, max_preamble=STREAM_MAX_PREAMBLE_CHARS, max_output=STREAM_MAX_OUTPUT_CHARS):
+        self.max_preamble = max_preamble
+        self.max_output = max_output
+        self.parts = []
+        self.length = 0
+        self.stack = []
+        self.started = False
+        self.complete = False
+        self.in_string = False
+        self.escaped = False
+        self.first_token_at = None
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+    def feed(self, delta):
+        if not delta or self.complete:
+            return
+        if self.first_token_at is None:
+            self.first_token_at = time.monotonic()
+        self.parts.append(delta)
+        self.length += len(delta)
+        if self.length > self.max_output:
+            raise MalformedStreamError(f"Streamed output exceeded {self.max_output} characters without completing")
+
+        for char in delta:
+            if not self.started:
+                if char in CLOSERS:
+                    self.started = True
+                    self.stack.append(CLOSERS[char])
+                elif self.length > self.max_preamble:
+                    raise MalformedStreamError(f"No JSON object in the first {self.max_preamble} characters of output")
+                continue
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in CLOSERS:
+                self.stack.append(CLOSERS[char])
+            elif char in "}]":
+                if char != self.stack.pop():
+                    raise MalformedStreamError(f"Mismatched '{char}' in streamed JSON output")
+                if not self.stack:
+                    self.complete = True
+                    return
+
+
+def handle_sse_line(line, monitor):
+    """
+    Feed one server-sent-events line of a chat-completion stream to monitor.
+    Returns True when the stream is finished ([DONE] or the JSON value is complete).
+    """
+    if isinstance(line, bytes):
+        line = line.decode("utf-8", errors="replace")
+    if not line or not line.startswith("data:"):
+        return False
+    data = line[5:].strip()
+    if data == "[DONE]":
+        return True
+    try:
+        chunk = json.loads(data)
+    except ValueError:
+        return False
+    for choice in chunk.get("choices") or []:
+        delta = choice.get("delta") or {}
+        monitor.feed(delta.get("content"))
+    return monitor.complete
+
+
+def stream_result(monitor):
+    """Wrap streamed content as a regular chat-completion body for parse_grok_response."""
+    if not monitor.started:
+        raise MalformedStreamError("Stream ended without any JSON output")
+    return {"choices": [{"message": {"content": monitor.text}}]}
+
+
+class StreamStats:
+    """Rolling time-to-first-token / total latency window for streamed requests, plus abort counts."""
+
+    def __init__(self, window=STREAM_STATS_WINDOW):
+        self._lock = threading.Lock()
+        self._ttft = deque(maxlen=max(1, window))
+        self._total = deque(maxlen=max(1, window))
+        self.requests = 0
+        self.aborted = 0
+
+    def record(self, ttft, total, aborted=False):
+        with self._lock:
+            self.requests += 1
+            if aborted:
+                self.aborted += 1
+            if ttft is not None:
+                self._ttft.append(ttft)
+            if total is not None and not aborted:
+                self._total.append(total)
+
+    @staticmethod
+    def _percentile(values, percentile):
+        if not values:
+            return None
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, max(0, math.ceil(percentile / 100.0 * len(ordered)) - 1))
+        return round(ordered[index], 3)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "aborted": self.aborted,
+                "ttft_p50": self._percentile(self._ttft, 50),
+                "ttft_p95": self._percentile(self._ttft, 95),
+                "total_p50": self._percentile(self._total, 50),
+                "total_p95": self._percentile(self._total, 95),
+            }
+
+
+_stats = None
+_stats_lock = threading.Lock()
+
+
+def get_stream_stats():
+    """Return the process-wide StreamStats."""
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = StreamStats()
+        return _stats
@@ -0,0 +1,293 @@
+import os
+import sys
+import re
+import json
+from functools import lru_cache
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import GROK_RESPONSE_FORMAT
+
+# Used when the prompt has no parseable "DATA SCHEMA:" block (same fields as grok_resume_prompt.txt)
+DEFAULT_SCHEMA = {
+    "Full_Name": "", "Email": "", "Phone": "", "Location": "", "Total_Experience_Years": 0.0,
+    "Current_Job_Title": "", "Current_Company": "", "Skills": "", "Highest_Education": "",
+    "University_College": "", "Graduation_Year": "", "Certifications": "", "Projects": "",
+    "LinkedIn_URL": "", "Resume_File_Name": ""
+}
+# Filled in locally, never validated or re-requested
+UNCHECKED_FIELDS = {"Resume_File_Name"}
+
+# Non-empty values that fail these checks are re-requested
+FIELD_CHECKS = {
+    "Email": lambda value: re.search(r"[^@\s]+@[^@\s]+\.[^@\s]+", value) is not None,
+    "Phone": lambda value: len(re.sub(r"\D", "", value)) >= 7,
+    "LinkedIn_URL": lambda value: "linkedin" in value.lower(),
+    "Graduation_Year": lambda value: re.search(r"(19|20)\d{2}", value) is not None,
+}
+
+OPEN_QUOTES = {'"': '"”', "“": '"”', "'": "'", "‘": "’'"}
+BARE_WORDS = {"True": "true", "False": "false", "None": "null"}
+JSON_ESCAPES = set('"\\/bfnrtu')
+# What may follow a quote that really ends a key / a value; any other quote is part of the string.
+# A value followed by a key without a comma still ends (the reply is then rejected, not merged).
+STRING_ENDS = {
+    True: re.compile(r"\s*(?::|$)"),
+    False: re.compile(r"""\s*(?:$|[}\]]|,\s*(?:$|["'“‘{\[}\]\d-]|(?:true|false|null|True|False|None)\b)|"[^"]*"\s*:)"""),
+}
+CLOSERS = {"{": "}", "[": "]"}
+
+
+class InvalidResponseError(ValueError):
+    """The model's reply could not be turned into a JSON object, even after local repair."""
+
+
+# ---- SCHEMA ----
+@lru_cache(maxsize=32)
+def get_schema(prompt):
+    """Return {field: default} from the last "DATA SCHEMA:" block of prompt."""
+    index = (prompt or "").rfind("DATA SCHEMA:")
+    start = prompt.find("{", index) if index >= 0 else -1
+    if start >= 0:
+        try:
+            schema, _ = json.JSONDecoder().raw_decode(prompt[start:])
+            if isinstance(schema, dict) and schema:
+                return schema
+        except ValueError:
+            pass
+    return dict(DEFAULT_SCHEMA)
+
+
+def is_number_field(default):
+    return isinstance(default, (int, float)) and not isinstance(default, bool)
+
+
+def response_format(prompt, mode=GROK_RESPONSE_FORMAT):
+    """The response_format request field for mode ("json_object", "json_schema"), or None."""
+    if mode == "json_object":
+        return {"type": "json_object"}
+    if mode == "json_schema":
+        schema = get_schema(prompt)
+        properties = {field: {"type": "number" if is_number_field(default) else "string"} for field, default in schema.items()}
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "resume",
+                "strict": True,
+                "schema": {"type": "object", "properties": properties, "required": list(schema), "additionalProperties": False}
+            }
+        }
+    return None
+
+
+def build_refill_prompt(prompt, fields):
+    """Prompt asking only for fields (missing or invalid in the first reply), with their own schema block."""
+    schema = get_schema(prompt)
+    subset = {field: schema.get(field, "") for field in fields}
+    return (
+        prompt
+        + "\n\nFIELD RETRY:\nOnly the fields below were missing or invalid in a previous answer. "
+        + "Extract ONLY these fields and return a JSON object with exactly these keys.\n\nDATA SCHEMA:\n"
+        + json.dumps(subset, indent=2)
+    )
+
+
+@lru_cache(maxsize=32)
+def build_light_prompt(prompt, skip_fields):
+    """prompt with skip_fields removed from its DATA SCHEMA block (they are filled in locally)."""
+    index = prompt.rfind("DATA SCHEMA:")
+    start = prompt.find("{", index) if index >= 0 else -1
+    if start < 0:
+        return prompt
+    try:
+        schema, end = json.JSONDecoder().raw_decode(prompt[start:])
+    except ValueError:
+        return prompt
+    subset = {field: default for field, default in schema.items() if field not in skip_fields}
+    return (
+        prompt[:start] + json.dumps(subset, indent=2) + prompt[start + end:]
+        + f"\n\nDo not return {', '.join(skip_fields)}; they are extracted separately.\n"
+    )
+
+
+# ---- JSON REPAIR ----
+def close_truncated(out, stack, key_pending):
+    """Drop a dangling key/comma at the end of a cut-off reply and close its open brackets."""
+    text = "".join(out).rstrip()
+    if text.endswith(":"):
+        text = re.sub(r'"(?:[^"\\]|\\.)*"\s*:$', "", text).rstrip()
+    elif key_pending:
+        text = re.sub(r'"(?:[^"\\]|\\.)*"$', "", text).rstrip()
+    text = text.rstrip(",").rstrip()
+    return text + "".join(reversed(stack))
+
+
+def normalise_json(text):
+    """
+    Rewrite almost-JSON into JSON in one pass: smart/single quotes become double quotes,
+    trailing commas are dropped, True/False/None become JSON literals and a reply cut off
+    mid-way is closed. A quote inside a string that is not followed by what can follow the
+    end of a key or value (as in "He said "hi" there") is kept as part of the string, and
+    escapes JSON does not have lose their backslash (\\' as in 'O\\'Brien') or keep it as
+    a literal one. Returns (json_text, cut_key) where cut_key is the field whose string
+    value was cut off (or None).
+    """
+    out = []
+    stack = []
+    closing = None
+    escaped = False
+    chars = []
+    string_is_key = False
+    expect_key = False
+    key_pending = False
+    last_key = None
+    word = []
+
+    def flush_word():
+        if word:
+            token = "".join(word)
+            out.append(BARE_WORDS.get(token, token))
+            word.clear()
+
+    for i, char in enumerate(text):
+        if closing is not None:
+            if escaped:
+                escaped = False
+                if char not in JSON_ESCAPES:
+                    # \' only makes sense in a single-quoted string; any other stray backslash is kept literally
+                    out[-1] = "" if char in "'‘’" else "\\\\"
+                out.append("\\n" if char == "\n" else char)
+                chars.append(char)
+            elif char == "\\":
+                escaped = True
+                out.append(char)
+            elif char in closing and STRING_ENDS[string_is_key].match(text, i + 1):
+                closing = None
+                out.append('"')
+                if string_is_key:
+                    last_key = "".join(chars)
+                    key_pending = True
+            elif char == '"':
+                out.append('\\"')
+                chars.append(char)
+            elif char == "\n":
+                out.append("\\n")
+                chars.append(char)
+            else:
+                out.append(char)
+                chars.append(char)
+            continue
+
+        if char.isalnum() or char in "._+-":
+            word.append(char)
+            continue
+        flush_word()
+
+        if char in OPEN_QUOTES:
+            closing = OPEN_QUOTES[char]
+            chars = []
+            string_is_key = bool(stack) and stack[-1] == "}" and expect_key
+            expect_key = False
+            out.append('"')
+        elif char in CLOSERS:
+            stack.append(CLOSERS[char])
+            expect_key = char == "{"
+            out.append(char)
+        elif char in "}]":
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            if not stack:
+                break
+            out.append(stack.pop())
+            expect_key = False
+            if not stack:
+                return "".join(out), None
+        elif char == ",":
+            expect_key = bool(stack) and stack[-1] == "}"
+            key_pending = False
+            out.append(char)
+        elif char == ":":
+            key_pending = False
+            out.append(char)
+        else:
+            out.append(char)
+    flush_word()
+
+    cut_key = None
+    if closing is not None:
+        if escaped:
+            out.pop()
+        out.append('"')
+        if string_is_key:
+            key_pending = True
+        else:
+            cut_key = last_key
+    return close_truncated(out, stack, key_pending), cut_key
+
+
+def repair_json(content):
+    """
+    Decode the JSON value in a model reply, repairing it locally if needed.
+    Returns (value, cut_key); raises InvalidResponseError if nothing usable is left.
+    """
+    if not content or not content.strip():
+        raise InvalidResponseError("Empty response")
+    text = content.strip()
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise InvalidResponseError(f"No JSON object in response: {text[:200]}")
+    text = text[min(starts):]
+
+    try:
+        value, _ = json.JSONDecoder().raw_decode(text)
+        return value, None
+    except ValueError:
+        pass
+
+    fixed, cut_key = normalise_json(text)
+    try:
+        value, _ = json.JSONDecoder().raw_decode(fixed)
+    except ValueError as e:
+        raise InvalidResponseError(f"Could not repair JSON response ({str(e)}): {text[:200]}") from e
+    return value, cut_key
+
+
+# ---- VALIDATION ----
+def coerce_value(value, default):
+    """Coerce a field value to the schema's type (number, or comma-separated string)."""
+    if is_number_field(default):
+        if value is None or isinstance(value, bool):
+            return default
+        return value
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return ", ".join(str(item).strip() for item in value if item not in (None, ""))
+    if isinstance(value, dict):
+        return ", ".join(f"{k}: {v}" for k, v in value.items() if v not in (None, ""))
+    return str(value).strip()
+
+
+def validate_resume(data, schema, cut_key=None):
+    """
+    Coerce data to schema in place. Returns (data, failed_fields): fields that are
+    missing (filled with their default), fail a format check, or were cut off.
+    """
+    if not isinstance(data, dict):
+        raise InvalidResponseError(f"Expected a JSON object, got {type(data).__name__}")
+    failed = []
+    for field, default in schema.items():
+        if field in UNCHECKED_FIELDS:
+            continue
+        if field not in data:
+            data[field] = default
+            failed.append(field)
+            continue
+        data[field] = coerce_value(data[field], default)
+        check = FIELD_CHECKS.get(field)
+        if field == cut_key or (check and isinstance(data[field], str) and data[field] and not check(data[field])):
+            failed.append(field)
+    return data, failed
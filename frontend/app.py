@@ -2,6 +2,7 @@ import streamlit as st
 import requests
 import os
 import time
+import json
 import html
 
 BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
@@ -65,6 +66,156 @@ def browse_save_file(title="Save File As", filetypes=[("Excel files", "*.xlsx"),
         st.error(f"Error opening save file dialog: {str(e)}")
         return None
 
+# Changed files listed under the progress bar while a job runs, and page size of the full file list
+RECENT_FILES = 20
+FILE_PAGE_SIZE = 100
+# Seconds between re-renders of the progress view while deltas stream in
+RENDER_INTERVAL = 1.0
+STATE_ICONS = {"pending": "⏳", "processing": "🔄", "success": "✅", "failed": "❌", "skipped": "⏭️"}
+FILE_PAGE_FILTERS = {"All": None, "Pending": "pending", "Processing": "processing", "Processed": "success", "Failed": "failed", "Already parsed": "skipped"}
+
+def files_html(file_status):
+    """Scrollable HTML list of files with a state icon each"""
+    items = "\n".join(
+        f'<div style="padding: 4px 0; color: #000000 !important; font-family: sans-serif; font-size: 14px;">• {STATE_ICONS.get(s, "")} {html.escape(f)}</div>'
+        for f, s in file_status.items()
+    )
+    return f"""
+        <div style="
+            max-height: 400px;
+            overflow-y: auto;
+            overflow-x: hidden;
+            padding: 12px;
+            border: 1px solid #e0e0e0;
+            border-radius: 5px;
+            background-color: #ffffff !important;
+            margin-top: 5px;
+        ">
+            {items}
+        </div>
+        """
+
+def merge_progress(progress_data, payload):
+    """
+    Fold a progress response (delta, summary or snapshot) into the state kept for the job:
+    counters and "seq" are replaced, changed files go to the front of "recent_files"
+    """
+    payload = dict(payload)
+    changed_files = payload.pop("files", None) or payload.pop("file_status", None) or {}
+    progress_data = dict(progress_data or {}, **payload)
+    recent = dict(progress_data.get("recent_files", {}))
+    for filename, state in changed_files.items():
+        recent.pop(filename, None)
+        recent[filename] = state
+    progress_data["recent_files"] = dict(list(recent.items())[-RECENT_FILES:])
+    return progress_data
+
+def render_progress(progress_data):
+    """Render a job's progress bar, counters and most recently changed files"""
+    total_files = progress_data.get("total_files", 0)
+    processed_files = progress_data.get("processed_files", 0)
+    failed_files = progress_data.get("failed_files", 0)
+    skipped_files = progress_data.get("skipped_files", 0)
+    counts = progress_data.get("counts", {})
+    current_file = progress_data.get("current_file", "")
+    message = progress_data.get("message", "")
+    
+    # Update progress bar
+    if total_files > 0:
+        progress_percent = min(100, (processed_files + failed_files + skipped_files) / total_files * 100)
+    else:
+        progress_percent = 0
+    
+    st.progress(progress_percent / 100)
+    st.caption(f"Progress: {processed_files + failed_files + skipped_files} / {total_files} files processed ({processed_files} successful, {failed_files} failed, {skipped_files} already parsed)")
+    st.caption(f"🔄 Processing: {counts.get('processing', 0)} · ⏳ Pending: {counts.get('pending', 0)}")
+    if current_file:
+        st.info(f"🔄 Currently processing: {current_file}")
+    if message:
+        st.caption(f"Status: {message}")
+    
+    # Latest changes first; the full list is paged on demand (see render_file_pages)
+    recent_files = progress_data.get("recent_files", {})
+    st.markdown(f"**📋 Recently updated ({len(recent_files)}):**")
+    if recent_files:
+        st.markdown(files_html(dict(reversed(list(recent_files.items())))), unsafe_allow_html=True)
+    else:
+        st.caption("No files processed yet")
+
+def render_file_pages(job_id):
+    """All of a job's files, one page at a time, fetched only while the list is shown"""
+    if not st.checkbox("📋 Show all files", key="show_file_pages"):
+        return
+    col1, col2 = st.columns(2)
+    with col1:
+        label = st.selectbox("Files", list(FILE_PAGE_FILTERS), key="file_page_filter")
+    with col2:
+        page = st.number_input("Page", min_value=1, value=1, step=1, key="file_page_number")
+    try:
+        page_response = requests.get(
+            f"{BACKEND_URL}/api/progress/{job_id}",
+            params={"status": FILE_PAGE_FILTERS[label], "limit": FILE_PAGE_SIZE, "offset": (page - 1) * FILE_PAGE_SIZE},
+            timeout=5
+        )
+    except requests.exceptions.RequestException as e:
+        st.warning(f"Could not fetch the file list: {str(e)}")
+        return
+    if page_response.status_code != 200:
+        st.warning(f"Could not fetch the file list: {page_response.status_code}")
+        return
+    page_data = page_response.json()
+    files = page_data.get("files", {})
+    matched = page_data.get("matched", 0)
+    if files:
+        st.caption(f"Files {page_data['offset'] + 1}-{page_data['offset'] + len(files)} of {matched}")
+        st.markdown(files_html(files), unsafe_allow_html=True)
+    else:
+        st.caption(f"No files on this page ({matched} in total)")
+
+def follow_progress(job_id, placeholder):
+    """
+    Follow a job over the backend's server-sent progress stream from the last seen "seq",
+    re-rendering placeholder at most every RENDER_INTERVAL seconds. Only counters and changed
+    files are sent; the state is kept in st.session_state.job_progress, so a rerun or the
+    polling fallback continues from it. Returns (status_code, final progress) once the job is done.
+    """
+    progress_data = st.session_state.get("job_progress")
+    params = {"since": progress_data["seq"] if progress_data else 0}
+    last_render, stale = 0.0, False
+    
+    def render(force=False):
+        nonlocal last_render, stale
+        if progress_data is not None and (force or (stale and time.monotonic() - last_render >= RENDER_INTERVAL)):
+            with placeholder.container():
+                render_progress(progress_data)
+            last_render, stale = time.monotonic(), False
+    
+    with requests.get(f"{BACKEND_URL}/api/progress/{job_id}/stream", params=params, stream=True, timeout=(5, 60)) as response:
+        if response.status_code != 200:
+            return response.status_code, None
+        event, data = None, []
+        for line in response.iter_lines():
+            line = line.decode("utf-8")
+            if line.startswith(":"):
+                render()  # keep-alive: show a throttled update that is still pending
+                continue
+            if line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:"):
+                data.append(line[5:].strip())
+            elif not line and event:
+                payload = json.loads("\n".join(data)) if data else {}
+                if event in ("snapshot", "delta"):
+                    progress_data = merge_progress(progress_data, payload)
+                    st.session_state.job_progress = progress_data
+                    stale = True
+                    render()
+                elif event == "done" and progress_data is not None:
+                    render(force=True)
+                    return 200, progress_data
+                event, data = None, []
+    raise requests.exceptions.ConnectionError("Progress stream closed before the job finished")
+
 st.set_page_config(page_title="Resume Parser", layout="wide")
 
 # Center the title
@@ -416,162 +567,99 @@ if "current_job_id" in st.session_state and st.session_state.current_job_id:
     job_id = st.session_state.current_job_id
     output_path = st.session_state.get("job_output_path", "")
     
+    progress_placeholder = st.empty()
+    render_file_pages(job_id)
+    status_code, progress_data = None, None
     try:
-        progress_response = requests.get(
-            f"{BACKEND_URL}/api/progress/{job_id}",
-            timeout=5
-        )
+        # Pushed updates over server-sent events; returns once the job is done
+        status_code, progress_data = follow_progress(job_id, progress_placeholder)
+    except (requests.exceptions.RequestException, ValueError):
+        # No event stream (e.g. a proxy that buffers responses): fall back to polling,
+        # fetching only the files changed since the last poll
+        try:
+            previous = st.session_state.get("job_progress")
+            progress_response = requests.get(
+                f"{BACKEND_URL}/api/progress/{job_id}",
+                params={"since": previous["seq"] if previous else 0},
+                timeout=5
+            )
+            status_code = progress_response.status_code
+            if status_code == 200:
+                progress_data = merge_progress(previous, progress_response.json())
+                st.session_state.job_progress = progress_data
+                with progress_placeholder.container():
+                    render_progress(progress_data)
+        except requests.exceptions.RequestException as e:
+            st.warning(f"Could not fetch progress update: {str(e)}")
+    
+    if status_code is None or (status_code == 200 and progress_data.get("status") != "completed"):
+        # Continue polling - wait 2 seconds then rerun
+        time.sleep(2)
+        st.rerun()
+    elif status_code != 200:
+        st.error(f"Failed to get progress: {status_code}")
+        # Clear job on error
+        if "current_job_id" in st.session_state:
+            del st.session_state.current_job_id
+    else:
+        # Processing is complete - clear job from session state
+        del st.session_state.current_job_id
+        if "job_output_path" in st.session_state:
+            del st.session_state.job_output_path
         
-        if progress_response.status_code == 200:
-            progress_data = progress_response.json()
-            status = progress_data.get("status", "processing")
-            total_files = progress_data.get("total_files", 0)
-            processed_files = progress_data.get("processed_files", 0)
-            failed_files = progress_data.get("failed_files", 0)
-            file_status = progress_data.get("file_status", {})
-            current_file = progress_data.get("current_file", "")
-            message = progress_data.get("message", "")
+        processed_files = progress_data.get("processed_files", 0)
+        failed_files = progress_data.get("failed_files", 0)
+        if processed_files > 0:
+            st.success(f"✅ Processing Complete! {processed_files} files processed successfully.")
+            if failed_files > 0:
+                st.warning(f"⚠️ {failed_files} files failed to process.")
+            st.info(f"Output saved to: {output_path}")
             
-            # Update progress bar
-            if total_files > 0:
-                progress_percent = min(100, (processed_files + failed_files) / total_files * 100)
-            else:
-                progress_percent = 0
-            
-            st.progress(progress_percent / 100)
-            st.caption(f"Progress: {processed_files + failed_files} / {total_files} files processed ({processed_files} successful, {failed_files} failed)")
-            if current_file:
-                st.info(f"🔄 Currently processing: {current_file}")
-            if message:
-                st.caption(f"Status: {message}")
-            
-            # Show file status list
-            st.subheader("📋 File Processing Status")
-            
-            # Group files by status
-            pending_files = [f for f, s in file_status.items() if s == "pending"]
-            processing_files = [f for f, s in file_status.items() if s == "processing"]
-            success_files = [f for f, s in file_status.items() if s == "success"]
-            failed_files_list = [f for f, s in file_status.items() if s == "failed"]
-            
-            # Create two columns with scrollable containers
-            col1, col2 = st.columns(2)
-            
-            # Left column: Processed files (scrollable)
-            with col1:
-                st.markdown(f"**✅ Processed ({len(success_files)}):**")
-                # Create scrollable container using HTML/CSS
-                if success_files:
-                    # Build HTML content with all files - use explicit dark text color
-                    files_list = "\n".join([f'<div style="padding: 4px 0; color: #000000 !important; font-family: sans-serif; font-size: 14px;">• ✅ {html.escape(f)}</div>' for f in success_files])
-                    
-                    st.markdown(
-                        f"""
-                        <div style="
-                            max-height: 400px;
-                            overflow-y: auto;
-                            overflow-x: hidden;
-                            padding: 12px;
-                            border: 1px solid #e0e0e0;
-                            border-radius: 5px;
-                            background-color: #ffffff !important;
-                            margin-top: 5px;
-                        ">
-                            {files_list}
-                        </div>
-                        """,
-                        unsafe_allow_html=True
-                    )
-                else:
-                    st.caption("No files processed yet")
-            
-            # Right column: Pending, Processing, and Failed files (scrollable)
-            with col2:
-                # Check if there are any files to show
-                has_content = processing_files or failed_files_list or pending_files
-                
-                if has_content:
-                    # Build HTML content
-                    content_html = []
-                    
-                    if processing_files:
-                        content_html.append(f'<div style="padding: 8px 0; font-weight: bold; color: #000000 !important; font-family: sans-serif; font-size: 14px;">🔄 Processing ({len(processing_files)}):</div>')
-                        for f in processing_files:
-                            content_html.append(f'<div style="padding: 4px 0; color: #000000 !important; font-family: sans-serif; font-size: 14px;">• 🔄 {html.escape(f)}</div>')
-                        content_html.append('<div style="padding: 8px 0;"></div>')
-                    
-                    if failed_files_list:
-                        content_html.append(f'<div style="padding: 8px 0; font-weight: bold; color: #000000 !important; font-family: sans-serif; font-size: 14px;">❌ Failed ({len(failed_files_list)}):</div>')
-                        for f in failed_files_list:
-                            content_html.append(f'<div style="padding: 4px 0; color: #000000 !important; font-family: sans-serif; font-size: 14px;">• ❌ {html.escape(f)}</div>')
-                        content_html.append('<div style="padding: 8px 0;"></div>')
-                    
-                    if pending_files:
-                        content_html.append(f'<div style="padding: 8px 0; font-weight: bold; color: #000000 !important; font-family: sans-serif; font-size: 14px;">⏳ Pending ({len(pending_files)}):</div>')
-                        for f in pending_files:
-                            content_html.append(f'<div style="padding: 4px 0; color: #000000 !important; font-family: sans-serif; font-size: 14px;">• ⏳ {html.escape(f)}</div>')
-                    
-                    files_html = "\n".join(content_html)
-                    
-                    st.markdown(
-                        f"""
-                        <div style="
-                            max-height: 400px;
-                            overflow-y: auto;
-                            overflow-x: hidden;
-                            padding: 12px;
-                            border: 1px solid #e0e0e0;
-                            border-radius: 5px;
-                            background-color: #ffffff !important;
-                            margin-top: 5px;
-                        ">
-                            {files_html}
-                        </div>
-                        """,
-                        unsafe_allow_html=True
+            # Large outputs stay in the backend's result store until they are exported
+            try:
+                results_response = requests.get(f"{BACKEND_URL}/api/results", params={"output_path": output_path}, timeout=10)
+                in_sync = results_response.status_code != 200 or results_response.json().get("in_sync", True)
+            except requests.exceptions.RequestException:
+                in_sync = True
+            if not in_sync:
+                st.session_state.export_output_path = output_path
+            # Download button
+            elif os.path.exists(output_path):
+                with open(output_path, "rb") as f:
+                    st.download_button(
+                        "Download Excel File",
+                        data=f.read(),
+                        file_name=os.path.basename(output_path),
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
                     )
-                else:
-                    st.caption("All files processed!")
-            
-            # Check if processing is complete
-            if status == "completed":
-                # Clear job from session state
-                del st.session_state.current_job_id
-                if "job_output_path" in st.session_state:
-                    del st.session_state.job_output_path
-                
-                if processed_files > 0:
-                    st.success(f"✅ Processing Complete! {processed_files} files processed successfully.")
-                    if failed_files > 0:
-                        st.warning(f"⚠️ {failed_files} files failed to process.")
-                    st.info(f"Output saved to: {output_path}")
-                    
-                    # Download button
-                    if os.path.exists(output_path):
-                        with open(output_path, "rb") as f:
-                            st.download_button(
-                                "Download Excel File",
-                                data=f.read(),
-                                file_name=os.path.basename(output_path),
-                                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                            )
-                else:
-                    st.error("No files were successfully processed.")
-            else:
-                # Continue polling - wait 2 seconds then rerun
-                # This prevents excessive API calls while still providing real-time updates
-                time.sleep(2)
-                st.rerun()
         else:
-            st.error(f"Failed to get progress: {progress_response.status_code}")
-            # Clear job on error
-            if "current_job_id" in st.session_state:
-                del st.session_state.current_job_id
-    except requests.exceptions.RequestException as e:
-        st.warning(f"Could not fetch progress update: {str(e)}")
-        # Retry after delay
-        time.sleep(2)
-        st.rerun()
+            st.error("No files were successfully processed.")
+
+# On-demand export of a large output kept in the result store
+if st.session_state.get("export_output_path"):
+    export_path = st.session_state.export_output_path
+    st.info(f"{os.path.basename(export_path)} is large, so its Excel file is only rewritten when you export it.")
+    if st.button("📤 Export Excel File", use_container_width=True):
+        export_response = None
+        with st.spinner("Exporting results..."):
+            try:
+                export_response = requests.post(f"{BACKEND_URL}/api/results/export", params={"output_path": export_path}, timeout=600)
+            except requests.exceptions.RequestException as e:
+                st.error(f"❌ Export failed: {str(e)}")
+        if export_response is not None and export_response.status_code == 200:
+            del st.session_state.export_output_path
+            st.success(f"✅ Exported {export_response.json().get('rows', 0)} records to {export_path}")
+            if os.path.exists(export_path):
+                with open(export_path, "rb") as f:
+                    st.download_button(
+                        "Download Excel File",
+                        data=f.read(),
+                        file_name=os.path.basename(export_path),
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                    )
+        elif export_response is not None:
+            error_detail = export_response.json().get("detail", "Unknown error")
+            st.error(f"❌ Export failed: {error_detail}")
 
 if st.button("🚀 Process Resumes", type="primary", use_container_width=True):
     # Clear any existing job state when starting a new process
@@ -579,6 +667,8 @@ if st.button("🚀 Process Resumes", type="primary", use_container_width=True):
         del st.session_state.current_job_id
     if "job_output_path" in st.session_state:
         del st.session_state.job_output_path
+    if "export_output_path" in st.session_state:
+        del st.session_state.export_output_path
     
     if not input_folder:
         if input_method == "Upload Files":
@@ -685,6 +775,7 @@ if st.button("🚀 Process Resumes", type="primary", use_container_width=True):
                 if job_id:
                     # Store job_id in session state for polling
                     st.session_state.current_job_id = job_id
+                    st.session_state.job_progress = None
                     st.session_state.job_output_path = output_path
                     st.rerun()
                 else:
@@ -0,0 +1,113 @@
+import time
+
+import backend.parser_service as parser_service
+from backend.cache import ParseCache, TextCache
+
+
+def fake_extraction(text, **errors):
+    def extract(path, filename, status_callback=None):
+        meta = {"text": text, "method": "native", "pages": 1, "pages_ocr": [], "methods_tried": ["native"],
+                "error": None, "ocr_error": None, "quality": 1.0, "seconds": 0.0}
+        meta.update(errors)
+        calls.append(filename)
+        return meta
+    calls = []
+    extract.calls = calls
+    return extract
+
+
+def prepare_with_text_cache(monkeypatch, tmp_path, extract):
+    text_cache = TextCache(tmp_path / "text")
+    monkeypatch.setattr(parser_service, "get_parse_cache", lambda: None)
+    monkeypatch.setattr(parser_service, "get_near_duplicate_index", lambda: None)
+    monkeypatch.setattr(parser_service, "get_text_cache", lambda: text_cache)
+    monkeypatch.setattr(parser_service, "extract_for_parsing", extract)
+    (tmp_path / "cv.pdf").write_bytes(b"%PDF resume bytes")
+    return text_cache, parser_service.prepare_single_file("cv.pdf", str(tmp_path), None, None)
+
+
+def test_text_cache_round_trip(tmp_path):
+    cache = TextCache(tmp_path)
+    key = TextCache.make_key("abc123", "2")
+    assert cache.get(key) is None
+    cache.put(key, "Jane Doe\nPython developer")
+    assert cache.get(key) == "Jane Doe\nPython developer"
+    assert TextCache.make_key("abc123", "3") != key
+
+
+def test_unreadable_text_cache_entry_is_discarded(tmp_path):
+    cache = TextCache(tmp_path)
+    key = TextCache.make_key("abc123", "2")
+    cache.put(key, "text")
+    with open(cache._path(key), "wb") as f:
+        f.write(b"not gzip")
+    assert cache.get(key) is None
+    assert cache.get(key) is None
+
+
+def test_clean_extraction_is_cached_and_reused(monkeypatch, tmp_path):
+    extract = fake_extraction("Jane Doe, Python developer")
+    text_cache, prepared = prepare_with_text_cache(monkeypatch, tmp_path, extract)
+    assert prepared["source_text"] == "Jane Doe, Python developer"
+    key = TextCache.make_key(prepared["content_hash"], parser_service.EXTRACTOR_VERSION)
+    assert text_cache.get(key) == "Jane Doe, Python developer"
+
+    prepared = parser_service.prepare_single_file("cv.pdf", str(tmp_path), None, None)
+    assert prepared["extraction"]["method"] == "cache"
+    assert extract.calls == ["cv.pdf"]
+
+
+def test_degraded_extraction_is_not_cached(monkeypatch, tmp_path):
+    for errors in ({"ocr_error": "TesseractNotFoundError"}, {"error": "broken xref table"}):
+        extract = fake_extraction("partial text", **errors)
+        text_cache, prepared = prepare_with_text_cache(monkeypatch, tmp_path, extract)
+        assert prepared["source_text"] == "partial text"
+        key = TextCache.make_key(prepared["content_hash"], parser_service.EXTRACTOR_VERSION)
+        assert text_cache.get(key) is None
+
+
+def test_parse_cache_round_trip_and_lru_eviction(tmp_path):
+    cache = ParseCache(tmp_path / "parse.db", max_entries=2, ttl_days=0)
+    cache.put("a", {"Name": "A"})
+    cache.put("b", {"Name": "B"})
+    time.sleep(0.01)
+    assert cache.get("a") == {"Name": "A"}
+    cache.put("c", {"Name": "C"})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"Name": "A"}
+    assert cache.get("c") == {"Name": "C"}
+
+
+def test_expired_parse_cache_entry_is_a_miss(tmp_path):
+    cache = ParseCache(tmp_path / "parse.db", max_entries=0, ttl_days=1)
+    cache.put("a", {"Name": "A"})
+    cache.ttl_seconds = -1
+    assert cache.get("a") is None
+
+
+def test_parse_cache_key_follows_the_request_sent(monkeypatch):
+    key = parser_service.parse_cache_key("hash", "prompt")
+    assert parser_service.parse_cache_key("hash", "prompt") == key
+    assert parser_service.parse_cache_key("other", "prompt") != key
+    assert parser_service.parse_cache_key("hash", "another prompt") != key
+    monkeypatch.setattr(parser_service, "GROK_RESPONSE_FORMAT", parser_service.GROK_RESPONSE_FORMAT + "-changed")
+    assert parser_service.parse_cache_key("hash", "prompt") != key
+    monkeypatch.undo()
+    monkeypatch.setattr(parser_service, "COMPACT_MAX_TOKENS", parser_service.COMPACT_MAX_TOKENS + 1)
+    assert parser_service.parse_cache_key("hash", "prompt") != key
+
+
+def test_parse_cache_hit_skips_extraction(monkeypatch, tmp_path):
+    cache = ParseCache(tmp_path / "parse.db")
+    monkeypatch.setattr(parser_service, "get_parse_cache", lambda: cache)
+    monkeypatch.setattr(parser_service, "get_text_cache", lambda: None)
+    monkeypatch.setattr(parser_service, "get_near_duplicate_index", lambda: None)
+    extract = fake_extraction("unused")
+    monkeypatch.setattr(parser_service, "extract_for_parsing", extract)
+    (tmp_path / "cv.pdf").write_bytes(b"%PDF resume bytes")
+    content_hash = parser_service.file_sha256(str(tmp_path / "cv.pdf"))
+    cache.put(parser_service.parse_cache_key(content_hash, None), {"Name": "Jane Doe", "Resume_File_Name": "old.pdf"})
+
+    prepared = parser_service.prepare_single_file("cv.pdf", str(tmp_path), None, None)
+    assert prepared["result"] == {"Name": "Jane Doe", "Resume_File_Name": "cv.pdf"}
+    assert extract.calls == []
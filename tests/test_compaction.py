@@ -0,0 +1,67 @@
+import backend.parser_service as parser_service
+from backend.compaction import PAGE_BREAK, compact_text, estimate_tokens
+
+LONG_LINE = "Built a resume parsing pipeline on FastAPI, SQLite and Grok"
+
+
+def test_collapses_whitespace_and_drops_noise():
+    text = "Jane   Doe\t\tEngineer\n\n\n-----\n  3  \nPython,  Go\nPython,  Go\n"
+    compacted, stats = compact_text(text, max_tokens=0)
+    assert compacted == "Jane Doe Engineer\n\nPython, Go"
+    assert stats["tokens_before"] == estimate_tokens(text)
+    assert stats["tokens_after"] == estimate_tokens(compacted)
+    assert stats["tokens_saved"] == stats["tokens_before"] - stats["tokens_after"]
+
+
+def test_page_headers_and_long_repeats_are_kept_once():
+    pages = [
+        f"Jane Doe | jane@example.com\nPage {n} of 3\n{LONG_LINE}\n{section}"
+        for n, section in enumerate(("Experience", "Education", "Projects"), 1)
+    ]
+    compacted, _ = compact_text(PAGE_BREAK.join(pages), max_tokens=0)
+    lines = compacted.splitlines()
+    assert lines.count("Jane Doe | jane@example.com") == 1
+    assert lines.count(LONG_LINE) == 1
+    assert not [line for line in lines if line.startswith("Page")]
+    assert {"Experience", "Education", "Projects"} <= set(lines)
+
+
+def test_short_repeats_on_a_single_page_are_kept():
+    compacted, _ = compact_text("Acme Corp\nEngineer\nAcme Corp\nManager", max_tokens=0)
+    assert compacted == "Acme Corp\nEngineer\nAcme Corp\nManager"
+
+
+def test_caps_at_a_line_boundary():
+    text = "\n".join(f"Line {i} with some words in it" for i in range(200))
+    compacted, stats = compact_text(text, max_tokens=50)
+    assert len(compacted) <= 200
+    assert compacted.endswith("with some words in it")
+    assert stats["tokens_after"] <= 51
+
+
+def test_empty_text():
+    assert compact_text("") == ("", {"tokens_before": 0, "tokens_after": 0, "tokens_saved": 0})
+    assert compact_text(None)[0] is None
+
+
+def test_local_fields_come_from_the_uncompacted_text(monkeypatch, tmp_path):
+    raw = "\n".join(["Jane Doe"] + [f"Project {i}: {LONG_LINE} {i}" for i in range(100)] + ["jane.doe@example.com"])
+
+    def extract(path, filename, status_callback=None):
+        return {"text": raw, "method": "native", "pages": 1, "pages_ocr": [], "methods_tried": ["native"],
+                "error": None, "ocr_error": None, "quality": 1.0, "seconds": 0.0}
+
+    monkeypatch.setattr(parser_service, "get_parse_cache", lambda: None)
+    monkeypatch.setattr(parser_service, "get_text_cache", lambda: None)
+    monkeypatch.setattr(parser_service, "get_near_duplicate_index", lambda: None)
+    monkeypatch.setattr(parser_service, "extract_for_parsing", extract)
+    monkeypatch.setattr(parser_service, "COMPACT_ENABLED", True)
+    monkeypatch.setattr(parser_service, "compact_text", lambda text: compact_text(text, max_tokens=200))
+    monkeypatch.setattr(parser_service, "LOCAL_EXTRACTION_ENABLED", True)
+    (tmp_path / "cv.pdf").write_bytes(b"%PDF")
+
+    prepared = parser_service.prepare_single_file("cv.pdf", str(tmp_path), None, None)
+    assert "jane.doe@example.com" not in prepared["text"]
+    assert prepared["source_text"] == raw
+    row = parser_service.apply_local_fields({"Email": ""}, prepared["source_text"], "cv.pdf")
+    assert row["Email"] == "jane.doe@example.com"
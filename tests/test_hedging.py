@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+import backend.parser_service as parser_service
+from backend.grok_client import RequestCancelled, check_cancelled
+from backend.hedging import HedgePolicy
+from backend.scheduler import KeyScheduler
+
+
+def test_no_hedge_delay_until_enough_samples():
+    policy = HedgePolicy(percentile=90, min_samples=3, window=10, max_extra_ratio=0.1)
+    policy.record_latency(1.0)
+    assert policy.hedge_delay() is None
+    for latency in (2.0, 3.0, 4.0, 5.0):
+        policy.record_latency(latency)
+    assert policy.hedge_delay() == 5.0
+
+
+def test_hedge_budget_counts_running_losers():
+    policy = HedgePolicy(min_samples=1, max_extra_ratio=0.5)
+    for _ in range(4):
+        policy.note_primary()
+    assert policy.try_spend()
+    policy.note_loser()
+    assert not policy.try_spend()
+    policy.note_loser_stopped()
+    assert policy.try_spend()
+    assert not policy.try_spend()
+
+
+@pytest.fixture
+def hedging(monkeypatch):
+    policy = HedgePolicy(percentile=50, min_samples=1, max_extra_ratio=1.0)
+    policy.record_latency(0.05)
+    monkeypatch.setattr(parser_service, "get_hedge_policy", lambda: policy)
+    monkeypatch.setattr(parser_service, "get_key_scheduler", lambda: KeyScheduler(max_inflight=4))
+    calls = []
+    lock = threading.Lock()
+
+    def parse_with_grok(text, filename, api_key=None, prompt=None, tier=None, cancel=None, source_text=None):
+        with lock:
+            calls.append({"api_key": api_key, "cancel": cancel})
+            first = len(calls) == 1
+        if first:
+            # The primary hangs until it is cancelled (or finishes late)
+            if cancel.wait(policy.slow_seconds):
+                check_cancelled(cancel)
+            return {"Full_Name": "primary"}
+        return {"Full_Name": "hedge"}
+
+    policy.slow_seconds = 5
+    monkeypatch.setattr(parser_service, "parse_with_grok", parse_with_grok)
+    return policy, calls
+
+
+def wait_until(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_slow_primary_is_hedged_on_the_other_key_and_cancelled(hedging):
+    policy, calls = hedging
+    job = {"id": "hedge-job", "priority": 0, "api_keys": ["key-a", "key-b"]}
+    start = time.monotonic()
+    assert parser_service.parse_hedged("text", "cv.pdf", None, job) == {"Full_Name": "hedge"}
+    assert time.monotonic() - start < 2
+    assert len(calls) == 2 and calls[0]["api_key"] != calls[1]["api_key"]
+    assert calls[0]["cancel"].is_set()
+    assert policy.hedges == 1 and policy.hedge_wins == 1
+    wait_until(lambda: policy.losers_running == 0)
+
+
+def test_no_hedge_without_budget(hedging):
+    policy, calls = hedging
+    policy.max_extra_ratio = 0.0
+    policy.slow_seconds = 0.2
+    job = {"id": "hedge-job", "priority": 0, "api_keys": ["key-a", "key-b"]}
+    assert parser_service.parse_hedged("text", "cv.pdf", None, job) == {"Full_Name": "primary"}
+    assert len(calls) == 1
+    assert policy.hedges == 0
+
+
+def test_cancelled_flow_stops_before_sending():
+    class Client:
+        def post(self, *args, **kwargs):
+            raise AssertionError("a cancelled flow must not send its request")
+
+    cancel = threading.Event()
+    cancel.set()
+    steps = parser_service.call_steps({"model": "m", "messages": []})
+    with pytest.raises(RequestCancelled):
+        parser_service.run_steps(steps, parser_service.blocking_io(Client(), cancel))
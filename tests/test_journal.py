@@ -0,0 +1,75 @@
+import pytest
+
+import backend.output_writer as output_writer
+import backend.parser_service as parser_service
+from backend.journal import FILE_FAILED, FILE_PENDING, FILE_SUCCESS, JobJournal
+from backend.result_store import ResultStore
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return JobJournal(tmp_path / "jobs.db")
+
+
+def test_journal_tracks_files_and_rows(journal):
+    journal.create_job("job", "in", "out.xlsx", False, 0, ["a.pdf", "b.pdf", "c.pdf"])
+    journal.record_file("job", "a.pdf", {"Resume_File_Name": "a.pdf"})
+    journal.record_file("job", "b.pdf", None)
+    assert journal.get_job("job")["file_status"] == {"a.pdf": FILE_SUCCESS, "b.pdf": FILE_FAILED, "c.pdf": FILE_PENDING}
+    assert journal.unfinished_files("job") == ["b.pdf", "c.pdf"]
+    assert journal.unfinished_files("job", include_failed=False) == ["c.pdf"]
+    assert journal.finished_rows("job") == [{"Resume_File_Name": "a.pdf"}]
+    assert journal.mark_interrupted() == 1
+    assert journal.get_job("job")["status"] == "interrupted"
+
+
+@pytest.fixture
+def job_env(monkeypatch, tmp_path, journal):
+    store = ResultStore(tmp_path / "store.db")
+    monkeypatch.setattr(parser_service, "get_job_journal", lambda: journal)
+    monkeypatch.setattr(output_writer, "get_result_store", lambda: store)
+    monkeypatch.setattr(parser_service, "PROCESSING_ENGINE", "threads")
+    monkeypatch.setattr(parser_service, "GROK_API_KEYS", ["test-key"])
+    monkeypatch.setattr(parser_service, "DEDUP_ENABLED", False)
+    folder = tmp_path / "resumes"
+    folder.mkdir()
+    for name in ("a.pdf", "b.pdf", "c.pdf"):
+        (folder / name).write_bytes(name.encode())
+    return str(folder), str(tmp_path / "out.xlsx"), store
+
+
+def fake_parser(crash_on=None):
+    def parse(filename, folder, api_key, prompt, status_callback=None, stats_callback=None, job=None):
+        if filename == crash_on:
+            raise RuntimeError("worker crashed")
+        return {"Full_Name": filename, "Resume_File_Name": filename}
+    return parse
+
+
+def test_crashed_job_is_marked_failed_and_resumes_without_duplicates(monkeypatch, journal, job_env):
+    folder, output_path, store = job_env
+    monkeypatch.setattr(parser_service, "process_single_file", fake_parser(crash_on="c.pdf"))
+    with pytest.raises(RuntimeError):
+        parser_service.process_folder(folder, output_path, append=True, job_id="job")
+    job = journal.get_job("job")
+    assert job["status"] == "failed"
+    assert "worker crashed" in job["message"]
+    assert "c.pdf" in journal.unfinished_files("job")
+
+    monkeypatch.setattr(parser_service, "process_single_file", fake_parser())
+    ok, msg = parser_service.process_folder(folder, output_path, append=True, job_id="job", resume=True)
+    assert ok, msg
+    assert journal.get_job("job")["status"] == "completed"
+    assert sorted(row["Resume_File_Name"] for row in store.iter_rows(output_path)) == ["a.pdf", "b.pdf", "c.pdf"]
+
+
+def test_resume_into_a_new_output_rewrites_journaled_rows(monkeypatch, journal, job_env):
+    folder, output_path, store = job_env
+    monkeypatch.setattr(parser_service, "process_single_file", fake_parser(crash_on="c.pdf"))
+    with pytest.raises(RuntimeError):
+        parser_service.process_folder(folder, output_path, append=False, job_id="job")
+
+    monkeypatch.setattr(parser_service, "process_single_file", fake_parser())
+    ok, msg = parser_service.process_folder(folder, output_path, append=False, job_id="job", resume=True)
+    assert ok, msg
+    assert sorted(row["Resume_File_Name"] for row in store.iter_rows(output_path)) == ["a.pdf", "b.pdf", "c.pdf"]
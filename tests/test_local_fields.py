@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+import backend.parser_service as parser_service
+from backend.parser_service import POST, apply_local_fields, extract_local_fields, find_phone, parse_steps, run_steps
+from backend.routing import TIERS, EscalationNeeded
+
+RESUME_TEXT = """Jane Doe
+jane.doe@example.com | +91 98765 43210 | linkedin.com/in/jane-doe/
+Experience 2015 - 2019 2020
+"""
+
+
+@pytest.fixture(autouse=True)
+def local_extraction(monkeypatch):
+    monkeypatch.setattr(parser_service, "LOCAL_EXTRACTION_ENABLED", True)
+    monkeypatch.setattr(parser_service, "LIGHT_PROMPT", False)
+
+
+def reply(**fields):
+    row = {field: default for field, default in parser_service.get_schema(parser_service.PROMPT).items()}
+    row.update({"Full_Name": "Jane Doe", "Skills": "Python", "Graduation_Year": "2015"}, **fields)
+    return {"choices": [{"message": {"content": json.dumps(row)}}]}
+
+
+def run_parse(replies, text=RESUME_TEXT, tier=None):
+    sent = []
+
+    def post(payload):
+        sent.append(payload)
+        return replies[len(sent) - 1]
+
+    row = run_steps(parse_steps(text, "cv.pdf", tier=tier), {POST: post})
+    return row, sent
+
+
+def test_extract_local_fields():
+    assert extract_local_fields(RESUME_TEXT) == {
+        "Email": "jane.doe@example.com", "Phone": "+91 98765 43210", "LinkedIn_URL": "linkedin.com/in/jane-doe",
+    }
+    assert extract_local_fields(None) == {"Email": "", "Phone": "", "LinkedIn_URL": ""}
+
+
+def test_runs_of_years_are_not_phone_numbers():
+    assert find_phone("Worked 2015 - 2019 2020 at Acme") == ""
+
+
+def test_text_value_wins_and_mismatches_are_flagged():
+    row = apply_local_fields({"Email": "jane@old.example.com", "Phone": "+91 98765 43210"}, RESUME_TEXT, "cv.pdf")
+    assert row["Email"] == "jane.doe@example.com"
+    assert row["Field_Mismatches"] == "Email"
+    assert list(row)[:3] == ["Full_Name", "Email", "Phone"]
+
+
+def test_model_value_kept_when_text_has_none():
+    row = apply_local_fields({"Email": "jane@example.com"}, "no contact details", "cv.pdf")
+    assert row["Email"] == "jane@example.com"
+    assert "Field_Mismatches" not in row
+
+
+def test_invalid_local_fields_are_not_re_requested():
+    row, sent = run_parse([reply(Email="N/A", Phone="N/A", LinkedIn_URL="N/A")])
+    assert len(sent) == 1
+    assert row["Email"] == "jane.doe@example.com"
+    assert row["LinkedIn_URL"] == "linkedin.com/in/jane-doe"
+
+
+def test_other_invalid_fields_are_still_re_requested():
+    patch = {"choices": [{"message": {"content": json.dumps({"Graduation_Year": "2016"})}}]}
+    row, sent = run_parse([reply(Email="N/A", Graduation_Year="soon"), patch])
+    assert len(sent) == 2
+    assert "Graduation_Year" in sent[1]["messages"][0]["content"]
+    assert row["Graduation_Year"] == "2016"
+
+
+def test_invalid_local_fields_do_not_escalate_a_fast_tier():
+    row, sent = run_parse([reply(Email="N/A")], tier=TIERS["fast"])
+    assert len(sent) == 1
+    assert row["Email"] == "jane.doe@example.com"
+    with pytest.raises(EscalationNeeded):
+        run_parse([reply(Graduation_Year="soon")], tier=TIERS["fast"])
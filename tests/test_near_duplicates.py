@@ -0,0 +1,91 @@
+import random
+
+import backend.parser_service as parser_service
+from backend.cache import ParseCache
+from backend.near_duplicates import (
+    NUM_PERM, PERM_A, PERM_B, PRIME, NearDuplicateIndex, band_layout, minhash, shingle_hashes, similarity
+)
+
+WORDS = ["python", "sql", "docker", "team", "lead", "built", "api", "data", "cloud", "design", "tested", "shipped"]
+
+
+def resume_text(seed, words=300):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) + str(rng.randint(0, 50)) for _ in range(words))
+
+
+def edited(text, every=60):
+    words = text.split()
+    return " ".join("changed" if i % every == 0 else word for i, word in enumerate(words))
+
+
+def test_minhash_matches_the_exact_formula():
+    text = resume_text(1)
+    hashes = shingle_hashes(text)
+    expected = [min((h * int(PERM_A[i]) + int(PERM_B[i])) % int(PRIME) for h in hashes) for i in range(NUM_PERM)]
+    assert minhash(text).tolist() == expected
+
+
+def test_short_text_has_no_signature():
+    assert minhash("Jane Doe, Python developer") is None
+
+
+def test_similarity_tracks_jaccard():
+    original = minhash(resume_text(1))
+    assert similarity(original, original) == 1.0
+    assert similarity(original, minhash(edited(resume_text(1)))) > 0.8
+    assert similarity(original, minhash(resume_text(2))) < 0.2
+
+
+def test_band_layout_stays_below_the_threshold():
+    bands, rows = band_layout(0.9)
+    assert bands * rows <= NUM_PERM
+    assert (1.0 / bands) ** (1.0 / rows) <= 0.75
+
+
+def test_index_finds_near_duplicates_and_survives_a_reopen(tmp_path):
+    index = NearDuplicateIndex(tmp_path / "near.db", threshold=0.8)
+    index.add(minhash(resume_text(1)), "hash-1", "jane.pdf")
+    index.add(minhash(resume_text(2)), "hash-2", "john.pdf")
+    assert len(index) == 2
+
+    match = index.query(minhash(edited(resume_text(1))))
+    assert match["filename"] == "jane.pdf" and match["similarity"] >= 0.8
+    assert index.query(minhash(resume_text(1)), exclude_hash="hash-1") is None
+    assert index.query(minhash(resume_text(3))) is None
+    index.close()
+
+    reopened = NearDuplicateIndex(tmp_path / "near.db", threshold=0.7)
+    assert len(reopened) == 2
+    assert reopened.query(minhash(edited(resume_text(1))))["filename"] == "jane.pdf"
+
+
+def near_duplicate_of_jane(monkeypatch, tmp_path, mode, cache=None):
+    index = NearDuplicateIndex(tmp_path / "near.db", threshold=0.8)
+    index.add(minhash(resume_text(1)), "hash-1", "jane.pdf")
+    monkeypatch.setattr(parser_service, "NEAR_DUP_MODE", mode)
+    monkeypatch.setattr(parser_service, "get_parse_cache", lambda: cache)
+    text = edited(resume_text(1))
+    prepared = {"filename": "jane_v2.pdf", "text": text, "source_text": text, "content_hash": "hash-1b", "result": None}
+    parser_service.check_near_duplicate(prepared, index, None, None)
+    return prepared
+
+
+def test_flag_mode_marks_the_row(monkeypatch, tmp_path):
+    prepared = near_duplicate_of_jane(monkeypatch, tmp_path, "flag")
+    assert prepared["result"] is None
+    assert prepared["near_duplicate"]["filename"] == "jane.pdf"
+    monkeypatch.setattr(parser_service, "get_near_duplicate_index", lambda: None)
+    prepared["cache_key"] = None
+    row = {"Full_Name": "Jane Doe"}
+    parser_service.store_parse_result(prepared, row, None)
+    assert row["Near_Duplicate_Of"] == "jane.pdf"
+
+
+def test_reuse_mode_reuses_the_cached_row(monkeypatch, tmp_path):
+    cache = ParseCache(tmp_path / "parse.db")
+    cache.put(parser_service.parse_cache_key("hash-1", None), {"Full_Name": "Jane Doe", "Resume_File_Name": "jane.pdf"})
+    prepared = near_duplicate_of_jane(monkeypatch, tmp_path, "reuse", cache)
+    assert prepared["result"]["Full_Name"] == "Jane Doe"
+    assert prepared["result"]["Resume_File_Name"] == "jane_v2.pdf"
+    assert prepared["result"]["Near_Duplicate_Of"] == "jane.pdf"
@@ -0,0 +1,100 @@
+import json
+from collections import Counter
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from queue import Queue
+
+import backend.parser_service as parser_service
+import backend.pipeline as pipeline
+from backend.batching import build_batch_payload, split_batch_response
+from backend.progress import FILE_STARTED
+
+
+def queued(filename, text):
+    prepared = {"filename": filename, "result": None, "text": text, "source_text": text, "extraction": {}}
+    return (1, filename, prepared, None)
+
+
+def entry(full_name, filename):
+    row = dict(parser_service.get_schema(parser_service.PROMPT), Graduation_Year="2015")
+    row.update(Full_Name=full_name, Resume_File_Name=filename)
+    return row
+
+
+def batch_reply(entries):
+    return {"choices": [{"message": {"content": json.dumps(entries)}}]}
+
+
+def test_batch_payload_lists_every_resume_without_streaming():
+    payload = build_batch_payload([("a.pdf", "Resume A"), ("b.pdf", "Resume B")], "PROMPT")
+    content = payload["messages"][1]["content"]
+    assert "=== RESUME: a.pdf ===\nResume A" in content
+    assert "=== RESUME: b.pdf ===\nResume B" in content
+    assert payload["stream"] is False
+    assert "response_format" not in payload
+
+
+def test_batch_reply_is_split_by_file_name():
+    reply = batch_reply([
+        entry("B", "b.pdf"),
+        entry("A", "a.pdf"),
+        entry("X", "unknown.pdf"),
+        dict(entry("C", "c.pdf"), Graduation_Year="soon"),
+    ])
+    rows = split_batch_response(reply, ["a.pdf", "b.pdf", "c.pdf"])
+    assert sorted(rows) == ["a.pdf", "b.pdf"]
+    assert rows["a.pdf"]["Full_Name"] == "A"
+    assert split_batch_response(batch_reply({"resumes": [entry("A", "a.pdf")]}), ["a.pdf"]).keys() == {"a.pdf"}
+    assert split_batch_response({"choices": [{"message": {"content": "not json at all"}}]}, ["a.pdf"]) == {}
+
+
+def test_gather_batch_takes_waiting_short_documents():
+    llm_queue = Queue()
+    for item in (queued("b.pdf", "short"), queued("c.pdf", "short"), None):
+        llm_queue.put(item)
+    batch, leftover, stop = pipeline.gather_batch(queued("a.pdf", "short"), llm_queue)
+    assert [item[1] for item in batch] == ["a.pdf", "b.pdf", "c.pdf"]
+    assert leftover is None and stop
+
+
+def test_gather_batch_hands_back_an_item_that_does_not_fit(monkeypatch):
+    monkeypatch.setattr(pipeline, "is_batchable", lambda text: text == "short")
+    llm_queue = Queue()
+    llm_queue.put(queued("long.pdf", "long"))
+    batch, leftover, stop = pipeline.gather_batch(queued("a.pdf", "short"), llm_queue)
+    assert [item[1] for item in batch] == ["a.pdf"]
+    assert leftover[1] == "long.pdf" and not stop
+
+
+class BrokenPool:
+    """Stand-in for a process pool whose workers die (e.g. an unguarded __main__ under spawn)."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, *args):
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+
+def test_broken_pool_falls_back_to_threads_without_restarting_files(monkeypatch):
+    monkeypatch.setattr(pipeline, "ProcessPoolExecutor", BrokenPool)
+    monkeypatch.setattr(pipeline, "EXTRACTION_WORKERS", 1)
+    monkeypatch.setattr(pipeline, "GROK_INFLIGHT_PER_KEY", 1)
+    monkeypatch.setattr(parser_service, "process_single_file", lambda filename, *args, **kwargs: {"Resume_File_Name": filename})
+    events = []
+    job = {"id": "job", "priority": 0, "api_keys": ["key"], "event_callback": events.append}
+    files = [f"{name}.pdf" for name in "abcde"]
+
+    rows = pipeline.process_pipeline(files, "folder", ["key"], None, None, None, len(files), job=job)
+
+    assert sorted(row["Resume_File_Name"] for row in rows) == files
+    started = Counter(event["filename"] for event in events if event["type"] == FILE_STARTED)
+    assert started == Counter(files)
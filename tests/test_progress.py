@@ -0,0 +1,83 @@
+import pytest
+
+from backend.progress import (
+    JobProgress, make_event, FILE_STARTED, FILE_PARSED, FILE_FAILED, FILE_SKIPPED, MAX_PAGE_SIZE
+)
+
+
+def new_job(count=5):
+    return JobProgress("out.xlsx", {f"f{i}.pdf": "pending" for i in range(count)})
+
+
+def test_counters_follow_events():
+    progress = new_job()
+    progress.apply(make_event(FILE_STARTED, "f0.pdf"))
+    progress.apply(make_event(FILE_STARTED, "f1.pdf"))
+    progress.apply(make_event(FILE_PARSED, "f0.pdf"))
+    progress.apply(make_event(FILE_FAILED, "f1.pdf"))
+    progress.apply(make_event(FILE_SKIPPED, "f2.pdf"))
+
+    summary = progress.summary()
+    assert summary["counts"] == {"pending": 2, "processing": 0, "success": 1, "failed": 1, "skipped": 1}
+    assert (summary["processed_files"], summary["failed_files"], summary["skipped_files"]) == (1, 1, 1)
+    assert summary["timings"]["finished_files"] == 2
+    assert "file_status" not in summary
+
+
+def test_failed_event_does_not_undo_success():
+    progress = new_job(1)
+    progress.apply(make_event(FILE_STARTED, "f0.pdf"))
+    progress.apply(make_event(FILE_PARSED, "f0.pdf"))
+    progress.apply(make_event(FILE_FAILED, "f0.pdf"))
+    assert progress.snapshot()["file_status"]["f0.pdf"] == "success"
+
+
+def test_unknown_event_type():
+    with pytest.raises(ValueError):
+        make_event("file_exploded", "f0.pdf")
+
+
+def test_delta_returns_only_files_changed_since():
+    progress = new_job()
+    for i in range(3):
+        progress.apply(make_event(FILE_STARTED, f"f{i}.pdf"))
+    seq = progress.summary()["seq"]
+    progress.apply(make_event(FILE_PARSED, "f1.pdf"))
+
+    delta = progress.delta(seq)
+    assert delta["files"] == {"f1.pdf": "success"}
+    assert delta["seq"] == seq + 1
+    assert progress.delta(delta["seq"])["files"] == {}
+
+
+def test_delta_keeps_latest_change_per_file():
+    progress = new_job(2)
+    progress.apply(make_event(FILE_STARTED, "f0.pdf"))
+    progress.apply(make_event(FILE_STARTED, "f1.pdf"))
+    progress.apply(make_event(FILE_PARSED, "f0.pdf"))
+
+    # f0 changed twice but appears once, after f1, with its latest state
+    assert list(progress.delta(0)["files"].items()) == [("f1.pdf", "processing"), ("f0.pdf", "success")]
+    assert len(progress._changes) == 2
+
+
+def test_files_page_by_state():
+    progress = new_job(10)
+    for i in range(4):
+        progress.apply(make_event(FILE_STARTED, f"f{i}.pdf"))
+        progress.apply(make_event(FILE_PARSED, f"f{i}.pdf"))
+
+    page = progress.files_page("success", limit=3, offset=0)
+    assert page["matched"] == 4
+    assert list(page["files"]) == ["f0.pdf", "f1.pdf", "f2.pdf"]
+    assert list(progress.files_page("success", limit=3, offset=3)["files"]) == ["f3.pdf"]
+
+    everything = progress.files_page(limit=MAX_PAGE_SIZE + 1)
+    assert everything["limit"] == MAX_PAGE_SIZE
+    assert everything["matched"] == 10
+    assert list(progress.files_page("pending", limit=2)["files"]) == ["f4.pdf", "f5.pdf"]
+
+
+def test_files_page_unknown_state():
+    with pytest.raises(ValueError):
+        new_job().files_page("done")
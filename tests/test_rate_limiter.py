@@ -0,0 +1,57 @@
+from backend.rate_limiter import KeyRateLimiter, RATE_RECOVERY_RESPONSES, parse_duration
+
+
+def throttle(limiter):
+    limiter.release(429, {"retry-after": "0"}, latency=0.1)
+
+
+def succeed(limiter, count, headers=None):
+    for _ in range(count):
+        limiter.release(200, headers, latency=0.1)
+
+
+def test_parse_duration():
+    assert parse_duration("2") == 2.0
+    assert parse_duration("6m0s") == 360.0
+    assert parse_duration("20ms") == 0.02
+    assert parse_duration("soon") is None
+
+
+def test_throttling_halves_rate_and_concurrency():
+    limiter = KeyRateLimiter(rate=10, max_concurrency=8, min_concurrency=1)
+    throttle(limiter)
+    throttle(limiter)
+    assert limiter.rate == 2.5
+    assert limiter.concurrency == 2.0
+    assert limiter.throttled_count == 2
+
+
+def test_rate_recovers_to_configured_rate_after_throttling():
+    limiter = KeyRateLimiter(rate=10, max_concurrency=8, min_concurrency=1)
+    throttle(limiter)
+    throttle(limiter)
+    succeed(limiter, 1)
+    assert 2.5 < limiter.rate < 10
+    succeed(limiter, RATE_RECOVERY_RESPONSES)
+    assert limiter.rate == 10
+    assert limiter.concurrency > 2.0
+
+
+def test_rate_recovers_only_up_to_header_derived_rate():
+    limiter = KeyRateLimiter(rate=0, max_concurrency=4)
+    assert limiter.rate is None
+    limiter.release(200, {"x-ratelimit-limit-requests": "60", "x-ratelimit-reset-requests": "10s"}, latency=0.1)
+    assert limiter.rate == limiter.max_rate == 6.0
+    throttle(limiter)
+    assert limiter.rate == 3.0
+    succeed(limiter, 2 * RATE_RECOVERY_RESPONSES)
+    assert limiter.rate == 6.0
+
+
+def test_degraded_latency_holds_the_rate():
+    limiter = KeyRateLimiter(rate=10, max_concurrency=8)
+    succeed(limiter, 1)
+    throttle(limiter)
+    for _ in range(5):
+        limiter.release(200, None, latency=5.0)
+    assert limiter.rate == 5.0
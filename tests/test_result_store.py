@@ -0,0 +1,122 @@
+import os
+import sqlite3
+
+from backend.output_writer import StreamingExcelWriter, export_results, read_workbook_rows
+from backend.parser_service import skip_already_parsed
+from backend.result_store import ResultIndex, ResultStore, output_key
+
+
+def rows(start, count):
+    return [{"Full_Name": f"Candidate {i}", "Resume_File_Name": f"resume_{i}.pdf"} for i in range(start, start + count)]
+
+
+def write_job(store, output_path, new_rows, append, max_rows=3):
+    writer = StreamingExcelWriter(output_path, append=append, flush_seconds=0, store=store, auto_export_max_rows=max_rows)
+    for row in new_rows:
+        writer.write(row)
+    writer.close()
+    return writer
+
+
+def test_append_and_iterate_rows(tmp_path):
+    store = ResultStore(tmp_path / "store.db")
+    output_path = str(tmp_path / "out.xlsx")
+    store.reset(output_path)
+    assert store.append_rows(output_path, [{"a": 1}, {"b": 2}]) == 2
+    assert store.append_rows(output_path, [{"a": 3, "c": 4}]) == 3
+    output = store.get_output(output_path)
+    assert output["columns"] == ["a", "b", "c"]
+    assert output["row_count"] == 3
+    assert list(store.iter_rows(output_path)) == [{"a": 1}, {"b": 2}, {"a": 3, "c": 4}]
+
+
+def test_export_marks_the_file_in_sync(tmp_path):
+    store = ResultStore(tmp_path / "store.db")
+    output_path = str(tmp_path / "out.xlsx")
+    store.reset(output_path)
+    store.append_rows(output_path, rows(0, 2))
+    assert not store.in_sync(output_path)
+    assert export_results(store, output_path) == 2
+    assert store.in_sync(output_path)
+    assert [row["Full_Name"] for row in read_workbook_rows(output_path)] == ["Candidate 0", "Candidate 1"]
+
+
+def test_outputs_table_without_export_skipped_is_migrated(tmp_path):
+    db_path = tmp_path / "store.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE outputs (output_key TEXT PRIMARY KEY, output_path TEXT NOT NULL, columns TEXT NOT NULL, "
+        "row_count INTEGER NOT NULL, exported_mtime_ns INTEGER, exported_size INTEGER, updated_at REAL NOT NULL)"
+    )
+    output_path = str(tmp_path / "out.xlsx")
+    conn.execute("INSERT INTO outputs VALUES (?, ?, '[]', 0, NULL, NULL, 0)", (output_key(output_path), output_path))
+    conn.commit()
+    conn.close()
+    store = ResultStore(db_path)
+    assert store.get_output(output_path)["export_skipped"] is False
+
+
+def test_skipped_export_keeps_stored_rows_for_the_next_append(tmp_path):
+    store = ResultStore(tmp_path / "store.db")
+    output_path = str(tmp_path / "out.xlsx")
+    writer = write_job(store, output_path, rows(0, 5), append=False)
+    assert not writer.exported
+    assert not os.path.isfile(output_path)
+    assert store.get_output(output_path)["export_skipped"]
+
+    writer = write_job(store, output_path, rows(5, 2), append=True)
+    assert writer.existing_rows == 5
+    assert store.get_output(output_path)["row_count"] == 7
+
+
+def test_deleted_output_starts_over(tmp_path):
+    store = ResultStore(tmp_path / "store.db")
+    output_path = str(tmp_path / "out.xlsx")
+    writer = write_job(store, output_path, rows(0, 2), append=False)
+    assert writer.exported
+    assert not store.get_output(output_path)["export_skipped"]
+    os.remove(output_path)
+
+    writer = write_job(store, output_path, rows(2, 1), append=True)
+    assert writer.existing_rows == 0
+    assert [row["Full_Name"] for row in store.iter_rows(output_path)] == ["Candidate 2"]
+
+
+def test_on_demand_export_clears_export_skipped(tmp_path):
+    store = ResultStore(tmp_path / "store.db")
+    output_path = str(tmp_path / "out.xlsx")
+    write_job(store, output_path, rows(0, 5), append=False)
+    assert export_results(store, output_path) == 5
+    assert not store.get_output(output_path)["export_skipped"]
+
+
+def test_result_index_matches_by_content_or_unchanged_name():
+    index = ResultIndex()
+    index.add("a.pdf", "hash-a")
+    index.add("imported.pdf", None)
+    assert index.contains("a.pdf", "hash-a")
+    assert index.contains("renamed.pdf", "hash-a")
+    assert not index.contains("a.pdf", "hash-a-edited")
+    assert index.contains("imported.pdf", "any-hash")
+    assert not index.contains("new.pdf", "hash-new")
+    index.add("a.pdf", "hash-a2")
+    assert index.contains("a.pdf", "hash-a2")
+
+
+def test_append_skips_files_and_journaled_rows_already_in_the_output(tmp_path):
+    store = ResultStore(tmp_path / "store.db")
+    output_path = str(tmp_path / "out.xlsx")
+    store.reset(output_path)
+    store.append_rows(output_path, rows(0, 2), ["hash-0", "hash-1"])
+    store.mark_export_skipped(output_path)
+    writer = StreamingExcelWriter(output_path, append=True, flush_seconds=0, store=store, auto_export_max_rows=0)
+    events = []
+    files, previous_rows, skipped = skip_already_parsed(
+        writer, ["resume_0.pdf", "copy_of_1.pdf", "resume_9.pdf"], rows(0, 1) + rows(8, 1),
+        {"resume_0.pdf": "hash-0", "copy_of_1.pdf": "hash-1", "resume_9.pdf": "hash-9"},
+        event_callback=events.append
+    )
+    assert files == ["resume_9.pdf"]
+    assert [row["Resume_File_Name"] for row in previous_rows] == ["resume_8.pdf"]
+    assert skipped == 2
+    assert [event["filename"] for event in events] == ["resume_0.pdf", "copy_of_1.pdf"]
@@ -0,0 +1,82 @@
+import pytest
+
+import backend.parser_service as parser_service
+import backend.routing as routing
+from backend.parser_service import DISPATCH, routed_steps, run_steps
+from backend.routing import TIERS, EscalationNeeded, RoutingStats, check_fast_result, choose_tier
+
+
+@pytest.fixture
+def routing_on(monkeypatch):
+    monkeypatch.setattr(routing, "ROUTING_ENABLED", True)
+    monkeypatch.setattr(routing, "GROK_FAST_MODEL", "fast-model")
+    monkeypatch.setattr(routing, "ROUTING_FAST_MAX_TOKENS", 100)
+    monkeypatch.setattr(routing, "ROUTING_MIN_QUALITY", 0.5)
+    monkeypatch.setattr(routing, "ROUTING_FAST_OCR", False)
+    stats = RoutingStats()
+    monkeypatch.setattr(parser_service, "get_routing_stats", lambda: stats)
+    return stats
+
+
+def test_routing_off(monkeypatch):
+    monkeypatch.setattr(routing, "ROUTING_ENABLED", False)
+    assert choose_tier("short text") is None
+    assert routing.routing_signature() == ""
+
+
+def test_choose_tier(routing_on):
+    assert choose_tier("short clean text", {"quality": 0.9, "pages_ocr": []}) is TIERS["fast"]
+    assert choose_tier("word " * 200) is TIERS["strong"]
+    assert choose_tier("short text", {"quality": 0.9, "pages_ocr": [1]}) is TIERS["strong"]
+    assert choose_tier("short text", {"quality": 0.2, "pages_ocr": []}) is TIERS["strong"]
+
+
+def test_routing_signature_follows_the_thresholds(monkeypatch, routing_on):
+    signature = routing.routing_signature()
+    assert "fast-model" in signature
+    monkeypatch.setattr(routing, "ROUTING_FAST_MAX_TOKENS", 200)
+    assert routing.routing_signature() != signature
+
+
+def test_check_fast_result(monkeypatch):
+    monkeypatch.setattr(routing, "ROUTING_REQUIRED_FIELDS", ["Full_Name"])
+    check_fast_result({"Full_Name": "Jane Doe"}, [])
+    with pytest.raises(EscalationNeeded):
+        check_fast_result({"Full_Name": "Jane Doe"}, ["Email"])
+    with pytest.raises(EscalationNeeded):
+        check_fast_result({"Full_Name": ""}, [])
+
+
+def route(text, answers):
+    dispatched = []
+
+    def dispatch(tier):
+        dispatched.append(tier["name"] if tier else None)
+        answer = answers[len(dispatched) - 1]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    return run_steps(routed_steps(text, "cv.pdf"), {DISPATCH: dispatch}), dispatched
+
+
+def test_fast_answer_is_kept(routing_on):
+    row, dispatched = route("short text", [{"Full_Name": "Jane"}])
+    assert row == {"Full_Name": "Jane"}
+    assert dispatched == ["fast"]
+    assert routing_on.snapshot()["fast"]["escalated"] == 0
+
+
+def test_failed_fast_answer_escalates_to_the_strong_model(routing_on):
+    row, dispatched = route("short text", [EscalationNeeded("invalid fields: Email"), {"Full_Name": "Jane"}])
+    assert row == {"Full_Name": "Jane"}
+    assert dispatched == ["fast", "strong"]
+    snapshot = routing_on.snapshot()
+    assert snapshot["fast"]["escalation_rate"] == 1.0
+    assert snapshot["strong"]["requests"] == 1
+
+
+def test_routing_off_dispatches_once_without_a_tier(monkeypatch):
+    monkeypatch.setattr(routing, "ROUTING_ENABLED", False)
+    row, dispatched = route("short text", [{"Full_Name": "Jane"}])
+    assert dispatched == [None]
@@ -0,0 +1,85 @@
+import threading
+import time
+
+from backend.config import MAX_WORKERS
+from backend.scheduler import KeyScheduler
+
+
+def acquire_in_thread(scheduler, job_id, api_keys, priority, granted):
+    thread = threading.Thread(target=lambda: granted.append((job_id, scheduler.acquire(job_id, api_keys, priority))))
+    thread.start()
+    return thread
+
+
+def wait_for_waiters(scheduler, count):
+    deadline = time.monotonic() + 5
+    while sum(len(queue) for queue in scheduler.waiting.values()) < count:
+        assert time.monotonic() < deadline, "waiters never queued"
+        time.sleep(0.01)
+
+
+def test_default_cap():
+    assert KeyScheduler().max_inflight == max(1, MAX_WORKERS)
+
+
+def test_spreads_requests_over_keys():
+    scheduler = KeyScheduler(max_inflight=4)
+    keys = [scheduler.acquire("job", ["sched-a", "sched-b"]) for _ in range(4)]
+    assert sorted(keys) == ["sched-a", "sched-a", "sched-b", "sched-b"]
+    assert scheduler.snapshot()["inflight"] == 4
+
+
+def test_global_cap_blocks_until_release():
+    scheduler = KeyScheduler(max_inflight=1)
+    first = scheduler.acquire("job", ["sched-c"])
+    granted = []
+    thread = acquire_in_thread(scheduler, "job", ["sched-c"], 0, granted)
+    wait_for_waiters(scheduler, 1)
+    assert granted == []
+
+    scheduler.release(first, latency=0.1)
+    thread.join(5)
+    assert granted == [("job", "sched-c")]
+    assert scheduler.inflight == 1
+
+
+def test_higher_priority_job_served_first():
+    scheduler = KeyScheduler(max_inflight=1)
+    first = scheduler.acquire("busy", ["sched-d"])
+    granted = []
+    threads = [acquire_in_thread(scheduler, "low", ["sched-d"], 0, granted)]
+    wait_for_waiters(scheduler, 1)
+    threads.append(acquire_in_thread(scheduler, "high", ["sched-d"], 5, granted))
+    wait_for_waiters(scheduler, 2)
+
+    scheduler.release(first)
+    deadline = time.monotonic() + 5
+    while not granted and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert granted[0][0] == "high"
+    scheduler.release("sched-d")
+    for thread in threads:
+        thread.join(5)
+    assert [job for job, _ in granted] == ["high", "low"]
+
+
+def test_equal_priority_jobs_take_turns():
+    scheduler = KeyScheduler(max_inflight=1)
+    held = scheduler.acquire("big", ["sched-e"])
+    granted = []
+    threads = []
+    for job_id in ("big", "big", "big", "small"):
+        threads.append(acquire_in_thread(scheduler, job_id, ["sched-e"], 0, granted))
+        wait_for_waiters(scheduler, len(threads))
+
+    for _ in threads:
+        served = len(granted)
+        scheduler.release(held)
+        deadline = time.monotonic() + 5
+        while len(granted) == served and time.monotonic() < deadline:
+            time.sleep(0.01)
+        held = granted[-1][1]
+    for thread in threads:
+        thread.join(5)
+    # "big" was served last, so "small" goes before big's remaining requests
+    assert [job for job, _ in granted][0] == "small"
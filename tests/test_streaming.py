@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from backend.streaming import MalformedStreamError, StreamStats, StreamingJSONMonitor, handle_sse_line, stream_result
+
+
+def sse(content):
+    return "data: " + json.dumps({"choices": [{"delta": {"content": content}}]})
+
+
+def test_completes_when_the_top_level_object_closes():
+    monitor = StreamingJSONMonitor()
+    for delta in ("```json\n{", '"Skills": ["Py', 'thon", "{Go}"],', ' "Note": "a \\" }"', "}", "\n```"):
+        monitor.feed(delta)
+    assert monitor.complete
+    content = stream_result(monitor)["choices"][0]["message"]["content"]
+    assert content.startswith("```json\n") and content.endswith("}")
+    assert json.loads(content[len("```json\n"):]) == {
+        "Skills": ["Python", "{Go}"], "Note": 'a " }'
+    }
+
+
+def test_mismatched_closer_aborts():
+    monitor = StreamingJSONMonitor()
+    with pytest.raises(MalformedStreamError):
+        monitor.feed('{"a": [1, 2}')
+
+
+def test_long_preamble_and_long_output_abort():
+    with pytest.raises(MalformedStreamError):
+        StreamingJSONMonitor(max_preamble=10).feed("Sure! Here is the parsed resume: {")
+    monitor = StreamingJSONMonitor(max_output=20)
+    monitor.feed('{"Projects": "')
+    with pytest.raises(MalformedStreamError):
+        monitor.feed("x" * 20)
+
+
+def test_sse_lines():
+    monitor = StreamingJSONMonitor()
+    assert not handle_sse_line(": keep-alive", monitor)
+    assert not handle_sse_line(sse('{"a": '), monitor)
+    assert not handle_sse_line("data: not json", monitor)
+    assert handle_sse_line(sse("1}").encode(), monitor)
+    assert monitor.text == '{"a": 1}'
+    assert handle_sse_line("data: [DONE]", StreamingJSONMonitor())
+
+
+def test_stream_without_json_is_malformed():
+    monitor = StreamingJSONMonitor()
+    monitor.feed("I cannot help with that.")
+    with pytest.raises(MalformedStreamError):
+        stream_result(monitor)
+
+
+def test_stream_stats_percentiles_skip_aborted_totals():
+    stats = StreamStats(window=10)
+    for i in range(1, 5):
+        stats.record(ttft=i / 10, total=float(i))
+    stats.record(ttft=0.05, total=99.0, aborted=True)
+    snapshot = stats.snapshot()
+    assert snapshot["requests"] == 5 and snapshot["aborted"] == 1
+    assert snapshot["total_p95"] == 4.0
+    assert snapshot["ttft_p50"] == 0.2
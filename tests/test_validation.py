@@ -0,0 +1,48 @@
+import pytest
+
+from backend.validation import InvalidResponseError, repair_json, validate_resume, DEFAULT_SCHEMA
+
+
+def test_valid_json_passes_through():
+    assert repair_json('{"a": 1, "b": "x"}') == ({"a": 1, "b": "x"}, None)
+
+
+def test_fenced_python_style_reply():
+    value, cut_key = repair_json("```json\n{'a': True, 'b': None, 'c': [1, 2,],}\n```")
+    assert value == {"a": True, "b": None, "c": [1, 2]}
+    assert cut_key is None
+
+
+def test_unescaped_inner_double_quotes():
+    value, _ = repair_json('{"Projects": "He said "hello" there", "Skills": "Python, "Go"", "Email": "a@b.co"}')
+    assert value == {"Projects": 'He said "hello" there', "Skills": 'Python, "Go"', "Email": "a@b.co"}
+
+
+def test_escaped_quote_in_single_quoted_string():
+    value, _ = repair_json("{'Full_Name': 'O\\'Brien', 'Location': 'Cork'}")
+    assert value == {"Full_Name": "O'Brien", "Location": "Cork"}
+
+
+def test_missing_comma_is_not_merged():
+    with pytest.raises(InvalidResponseError):
+        repair_json('{"a": "x" "b": "y"}')
+
+
+def test_truncated_reply_reports_cut_key():
+    value, cut_key = repair_json('{"Full_Name": "Jane", "Skills": "Python, SQ')
+    assert value == {"Full_Name": "Jane", "Skills": "Python, SQ"}
+    assert cut_key == "Skills"
+
+
+def test_no_json():
+    with pytest.raises(InvalidResponseError):
+        repair_json("Sorry, I cannot help with that.")
+
+
+def test_validate_resume_reports_missing_bad_and_cut_fields():
+    data = {"Full_Name": "Jane", "Email": "not an email", "Skills": ["Python", "SQL"], "Projects": "Parser"}
+    data, failed = validate_resume(data, DEFAULT_SCHEMA, cut_key="Projects")
+    assert data["Skills"] == "Python, SQL"
+    assert data["Phone"] == ""
+    assert "Email" in failed and "Phone" in failed and "Projects" in failed
+    assert "Full_Name" not in failed and "Resume_File_Name" not in failed